@@ -22,6 +22,11 @@ class Hemisphere(object):
 
 
 class Angle(float):
+    """
+    An angle in [0, 2pi).  Arithmetic on angles gives a `LazyAngle`, which
+    is only brought back into range when it is compared or its quadrant is
+    needed, so chains of arithmetic normalize once instead of every step.
+    """
 
     def __new__(cls, radians=None):
         """
@@ -29,7 +34,7 @@ class Angle(float):
         """
         if radians is None:
             radians = 0.0
-        if isinstance(radians, Angle):
+        if type(radians) is Angle:
             return radians
         radians %= 2 * pi
         if radians < 0:
@@ -61,67 +66,122 @@ class Angle(float):
         return min(self, -(~self))
 
     def __pos__(self):
-        return Angle(super(Angle, self).__pos__())
+        return LazyAngle(float.__pos__(self))
 
     def __neg__(self):
-        return Angle(super(Angle, self).__neg__())
+        return LazyAngle(float.__neg__(self))
 
     def __add__(self, other):
-        return Angle(super(Angle, self).__add__(other))
+        return LazyAngle(float.__add__(self, other))
 
     def __radd__(self, other):
-        return Angle(super(Angle, self).__radd__(other))
+        return LazyAngle(float.__radd__(self, other))
 
     def __sub__(self, other):
-        return Angle(super(Angle, self).__sub__(other))
+        return LazyAngle(float.__sub__(self, other))
 
     def __rsub__(self, other):
-        return Angle(super(Angle, self).__rsub__(other))
+        return LazyAngle(float.__rsub__(self, other))
 
     def __mul__(self, other):
-        return Angle(super(Angle, self).__mul__(other))
+        return LazyAngle(float.__mul__(self, other))
 
     def __rmul__(self, other):
-        return Angle(super(Angle, self).__rmul__(other))
+        return LazyAngle(float.__rmul__(self, other))
 
     def __div__(self, other):
-        return Angle(super(Angle, self).__div__(other))
+        return LazyAngle(float.__div__(self, other))
 
     def __rdiv__(self, other):
-        return Angle(super(Angle, self).__rdiv__(other))
+        return LazyAngle(float.__rdiv__(self, other))
 
     def __floordiv__(self, other):
-        return Angle(super(Angle, self).__floordiv__(other))
+        return LazyAngle(float.__floordiv__(self, other))
 
     def __rfloordiv__(self, other):
-        return Angle(super(Angle, self).__rfloordiv__(other))
+        return LazyAngle(float.__rfloordiv__(self, other))
 
     def __truediv__(self, other):
-        return Angle(super(Angle, self).__truediv__(other))
+        return LazyAngle(float.__truediv__(self, other))
 
     def __rtruediv__(self, other):
-        return Angle(super(Angle, self).__rtruediv__(other))
+        return LazyAngle(float.__rtruediv__(self, other))
 
     def __divmod__(self, other):
-        return Angle(super(Angle, self).__divmod__(other))
+        return LazyAngle(float.__divmod__(self, other))
 
     def __rdivmod__(self, other):
-        return Angle(super(Angle, self).__rdivmod__(other))
+        return LazyAngle(float.__rdivmod__(self, other))
 
     def __mod__(self, other):
-        return Angle(super(Angle, self).__mod__(other))
+        return LazyAngle(float.__mod__(self, other))
 
     def __rmod__(self, other):
-        return Angle(super(Angle, self).__rmod__(other))
+        return LazyAngle(float.__rmod__(self, other))
 
     def __pow__(self, other):
-        return Angle(super(Angle, self).__pow__(other))
+        return LazyAngle(float.__pow__(self, other))
 
     def __rpow__(self, other):
-        return Angle(super(Angle, self).__rpow__(other))
+        return LazyAngle(float.__rpow__(self, other))
 
     def __repr__(self):
         return "Angle({})".format(super(Angle, self).__repr__())
 
     def __str__(self):
         return "{}pi".format(float(self) / pi)
+
+
+class LazyAngle(Angle):
+    """
+    The result of arithmetic on angles, which may be outside [0, 2pi).  It
+    acts like the `Angle` it normalizes to, but only normalizes when it has
+    to, and trig functions take it as is.
+    """
+
+    # no normalizing here; that is the point
+    __new__ = float.__new__
+
+    def normalized(self):
+        """
+        :rtype: Angle
+        """
+        return Angle(float(self))
+
+    @property
+    def quadrant(self):
+        return self.normalized().quadrant
+
+    def __invert__(self):
+        return float(self) % (2 * pi) - 2 * pi
+
+    def __abs__(self):
+        radians = float(self) % (2 * pi)
+        return min(radians, 2 * pi - radians)
+
+    def __eq__(self, other):
+        return float(self) % (2 * pi) == other
+
+    def __ne__(self, other):
+        return float(self) % (2 * pi) != other
+
+    def __lt__(self, other):
+        return float(self) % (2 * pi) < other
+
+    def __le__(self, other):
+        return float(self) % (2 * pi) <= other
+
+    def __gt__(self, other):
+        return float(self) % (2 * pi) > other
+
+    def __ge__(self, other):
+        return float(self) % (2 * pi) >= other
+
+    def __hash__(self):
+        return hash(float(self) % (2 * pi))
+
+    def __repr__(self):
+        return "LazyAngle({})".format(float.__repr__(self))
+
+    def __str__(self):
+        return str(self.normalized())
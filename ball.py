@@ -2,8 +2,10 @@
 
 from __future__ import division, print_function
 
-from render import BallRenderer
-from vector2d import Vector2D
+import numpy as np
+
+from spatial import UniformGrid, distance_to_triangle
+from vector2d import VectorArray
 
 __author__ = "Zander Otavka"
 
@@ -12,7 +14,7 @@ class Ball(object):
     """
     :type _number: int
     :type _position: Vector2D
-    :type _renderer: BallRenderer
+    :type _renderer: render.BallRenderer
     """
 
     RADIUS = 11.25
@@ -24,7 +26,6 @@ class Ball(object):
     def __init__(self, number, position):
         self._number = number
         self._position = position
-        self._renderer = BallRenderer(number, position, Ball.RADIUS)
 
     @property
     def number(self):
@@ -37,46 +38,199 @@ class Ball(object):
     @position.setter
     def position(self, new):
         self._position = new
-        self._renderer.position = new
+        if self._renderer is not None:
+            self._renderer.position = new
+
+    def show(self):
+        if self._renderer is None:
+            from render import BallRenderer
+            self._renderer = BallRenderer(self.number, self.position,
+                                          Ball.RADIUS)
 
     def __repr__(self):
         return "Ball({}, {})".format(self.number, self.position)
 
     def delete(self):
-        self._renderer.delete()
+        if self._renderer is not None:
+            self._renderer.delete()
+            self._renderer = None
+
+
+class BallChanges(object):
+    """
+    What one `BallGroup.update` changed, by ball number.
+
+    :type moved: set[int]
+    :type appeared: set[int]
+    :type disappeared: set[int]
+    """
+
+    moved = None
+    appeared = None
+    disappeared = None
+
+    def __init__(self, moved=(), appeared=(), disappeared=()):
+        """
+        :type moved: collections.Iterable[int]
+        :type appeared: collections.Iterable[int]
+        :type disappeared: collections.Iterable[int]
+        """
+        self.moved = set(moved)
+        self.appeared = set(appeared)
+        self.disappeared = set(disappeared)
+
+    @property
+    def changed(self):
+        """
+        :rtype: set[int]
+        """
+        return self.moved | self.appeared | self.disappeared
+
+    def __nonzero__(self):
+        return bool(self.moved or self.appeared or self.disappeared)
+
+    def __repr__(self):
+        return "BallChanges(moved={}, appeared={}, disappeared={})".format(
+            sorted(self.moved), sorted(self.appeared),
+            sorted(self.disappeared))
 
 
 class BallGroup(list):
     """
-    :type _size: int
+    The balls on the table, in number order.  Balls are also kept in a table
+    indexed by number, with None for numbers that are not on the table, so
+    each frame is diffed in place against the last one.
+
+    :type _table: list[Ball]
+    :type _positions: VectorArray
+    :type _changes: BallChanges
+    :type _grid: UniformGrid
+    :type _visible: bool
     """
 
-    _size = None
+    _table = None
+    _positions = None
+    _changes = None
+    _grid = None
+    _visible = None
 
-    def __init__(self):
+    def __init__(self, visible=False):
+        """
+        :param visible: whether to give balls renderers
+        :type visible: bool
+        """
         super(BallGroup, self).__init__()
-        self._size = 0
+        self._table = []
+        self._positions = VectorArray()
+        self._changes = BallChanges()
+        self._visible = visible
 
     def update(self, data):
         """
+        :param data: x and y of each ball by number, zero for balls that are
+                     not on the table; frames may grow or shrink
         :type data: list[int]
+        :return: the numbers of the balls that moved, appeared or disappeared
+        :rtype: set[int]
+        """
+        points = VectorArray.from_flat(data)
+        size = len(points)
+        previous = self._positions
+        if len(previous) != size:
+            # numbers past the end of the shorter frame are off the table
+            kept = min(len(previous), size)
+            previous_x = np.zeros(size)
+            previous_y = np.zeros(size)
+            previous_x[:kept] = previous.x[:kept]
+            previous_y[:kept] = previous.y[:kept]
+            previous = VectorArray(previous_x, previous_y)
+
+        # compare every position at once, and only touch the balls whose
+        # position changed
+        present = points.nonzero()
+        was_present = previous.nonzero()
+        differs = (points.x != previous.x) | (points.y != previous.y)
+        changes = BallChanges(
+            np.flatnonzero(differs & present & was_present).tolist(),
+            np.flatnonzero(differs & present & ~was_present).tolist(),
+            np.flatnonzero(differs & ~present & was_present).tolist())
+        for ball in self._table[size:]:
+            if ball is not None:
+                changes.disappeared.add(ball.number)
+                ball.delete()
+        del self._table[size:]
+        self._table.extend([None] * (size - len(self._table)))
+
+        for number in changes.moved:
+            self._table[number].position = points[number]
+        for number in changes.disappeared:
+            if number < size:
+                self._table[number].delete()
+                self._table[number] = None
+        for number in changes.appeared:
+            ball = Ball(number, points[number])
+            if self._visible:
+                ball.show()
+            self._table[number] = ball
+        if changes.appeared or changes.disappeared:
+            self[:] = [ball for ball in self._table if ball is not None]
+
+        self._positions = points
+        self._changes = changes
+        if changes:
+            self._build_grid()
+        return changes.changed
+
+    @property
+    def changes(self):
+        """
+        What the last update changed.
+
+        :rtype: BallChanges
+        """
+        return self._changes
+
+    def get(self, number):
+        """
+        The ball numbered `number`, or None if it is not on the table.
+
+        :type number: int
+        :rtype: Ball
+        """
+        if 0 <= number < len(self._table):
+            return self._table[number]
+        return None
+
+    @property
+    def positions(self):
+        """
+        Position of every ball by number, as of the last update, with zeros
+        for balls that are not on the table.
+
+        :rtype: VectorArray
+        """
+        return self._positions
+
+    def _build_grid(self):
+        self._grid = UniformGrid(Ball.RADIUS * 2)
+        for ball in self:
+            self._grid.insert(ball, ball.position)
+
+    def in_corridor(self, start, end1, end2, radius):
+        """
+        Find the balls within `radius` of the triangle `start`, `end1`,
+        `end2`, in group order.
+
+        :type start: Vector2D
+        :type end1: Vector2D
+        :type end2: Vector2D
+        :type radius: int or float
+        :rtype: list[Ball]
         """
-        point_list = [Vector2D(data[i:i + 2])
-                      for i in range(0, len(data), 2)]
-        if len(point_list) != self._size:
-            self.delete()
-            for index, point in enumerate(point_list):
-                if point:
-                    self.append(Ball(index, point))
-            self._size = len(point_list)
-        else:
-            for ball in self:
-                point = point_list[ball.number]
-                if point:
-                    ball.offset = point
-                else:
-                    ball.delete()
-                    self.remove(ball)
+        if self._grid is None:
+            return [ball for ball in self if distance_to_triangle(
+                ball.position, start, end1, end2) <= radius]
+        return self._grid.in_corridor(self, start, end1, end2, radius)
 
     def copy(self):
         """
@@ -84,9 +238,15 @@ class BallGroup(list):
         """
         clone = BallGroup()
         clone[:] = self[:]
+        clone._table = self._table[:]
+        clone._positions = self._positions
+        clone._changes = self._changes
+        clone._grid = self._grid
         return clone
 
     def delete(self):
         for ball in self:
             ball.delete()
         self[:] = []
+        self._table = []
+        self._positions = VectorArray()
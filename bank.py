@@ -0,0 +1,322 @@
+"""
+Bank shots, modeled by mirroring pockets across the table rails.
+
+A ball banked off a rail travels the same path as a ball sent in a straight
+line to the pocket's reflection in that rail.  A ball's center bounces one
+radius short of the cushion, so each rail is the line its center bounces
+off, not the cushion itself.  `bank_targets` precomputes the
+reflected pocket targets once per table, and each `BankTarget` knows the
+chain of reflected tables its straight line passes through, so obstacles can
+be found by mapping the shot's corridor back onto the real table instead of
+reflecting every ball into every image.
+"""
+
+from __future__ import division, print_function
+
+from ball import Ball
+from target import ShotTarget
+from vector2d import Vector2D
+
+__author__ = "Zander Otavka"
+
+
+class Mirror(object):
+    """
+    A composition of reflections across axis-aligned rails, which maps each
+    axis as `scale * value + offset`, with a scale of 1 or -1.
+
+    :type _scale: (int, int)
+    :type _offset: (float, float)
+    """
+
+    _scale = None
+    _offset = None
+
+    def __init__(self, scale=(1, 1), offset=(0, 0)):
+        """
+        :type scale: (int, int)
+        :type offset: (float, float)
+        """
+        self._scale = tuple(scale)
+        self._offset = tuple(offset)
+
+    @classmethod
+    def across(cls, axis, value):
+        """
+        Reflection across the line where coordinate `axis` equals `value`.
+
+        :type axis: int
+        :type value: int or float
+        :rtype: Mirror
+        """
+        scale = [1, 1]
+        offset = [0, 0]
+        scale[axis] = -1
+        offset[axis] = 2 * value
+        return cls(scale, offset)
+
+    def then(self, other):
+        """
+        :return: the mirror that applies this one, then `other`
+        :rtype: Mirror
+        """
+        return Mirror([s2 * s1 for s1, s2 in zip(self._scale, other._scale)],
+                      [s2 * o1 + o2 for o1, s2, o2 in zip(
+                          self._offset, other._scale, other._offset)])
+
+    def apply(self, point):
+        """
+        :type point: Vector2D
+        :rtype: Vector2D
+        """
+        return Vector2D((self._scale[0] * point.x + self._offset[0],
+                         self._scale[1] * point.y + self._offset[1]))
+
+    def apply_direction(self, vector):
+        """
+        :type vector: Vector2D
+        :rtype: Vector2D
+        """
+        return Vector2D((self._scale[0] * vector.x,
+                         self._scale[1] * vector.y))
+
+    def invert(self, point):
+        """
+        :type point: Vector2D
+        :rtype: Vector2D
+        """
+        return Vector2D((self._scale[0] * (point.x - self._offset[0]),
+                         self._scale[1] * (point.y - self._offset[1])))
+
+    def __eq__(self, other):
+        return (isinstance(other, Mirror) and
+                self._scale == other._scale and
+                self._offset == other._offset)
+
+    def __ne__(self, other):
+        return not self == other
+
+    def __hash__(self):
+        return hash((self._scale, self._offset))
+
+
+class Rail(object):
+    """
+    The line a ball's center bounces off at one cushion of the table, where
+    coordinate `axis` equals `value`, from `start` to `end` along the other
+    axis.
+    """
+
+    axis = None
+    value = None
+    start = None
+    end = None
+    name = None
+
+    def __init__(self, axis, value, start, end, name=None):
+        """
+        :type axis: int
+        :type value: int or float
+        :type start: int or float
+        :type end: int or float
+        :type name: str
+        """
+        self.axis = axis
+        self.value = value
+        self.start = start
+        self.end = end
+        self.name = name
+
+    @property
+    def mirror(self):
+        """
+        :rtype: Mirror
+        """
+        return Mirror.across(self.axis, self.value)
+
+    def distance_inside(self, point, center):
+        """
+        How far `point` is from this rail, towards `center`, which must be
+        on the table.  Negative if `point` is past the rail.
+
+        :type point: Vector2D
+        :type center: Vector2D
+        :rtype: float
+        """
+        if tuple(center)[self.axis] > self.value:
+            return tuple(point)[self.axis] - self.value
+        return self.value - tuple(point)[self.axis]
+
+
+def table_rails(width, height):
+    """
+    :return: the rails of a table whose cushions are at 0, `width` and
+             `height`, one ball radius inside each cushion
+    :rtype: list[Rail]
+    """
+    radius = Ball.RADIUS
+    return [Rail(0, radius, radius, height - radius, name="Left"),
+            Rail(0, width - radius, radius, height - radius, name="Right"),
+            Rail(1, radius, radius, width - radius, name="Bottom"),
+            Rail(1, height - radius, radius, width - radius, name="Top")]
+
+
+class BankTarget(object):
+    """
+    A pocket reflected across one or more rails, in the order the ball hits
+    them.
+
+    :type _pocket_index: int
+    :type _rails: list[Rail]
+    :type _target: ShotTarget
+    :type _images: list[Mirror]
+    """
+
+    _pocket_index = None
+    _rails = None
+    _target = None
+    _images = None
+
+    def __init__(self, pocket_index, pocket_target, rails):
+        """
+        :type pocket_index: int
+        :type pocket_target: ShotTarget
+        :param rails: the rails the ball hits, in order
+        :type rails: list[Rail]
+        """
+        self._pocket_index = pocket_index
+        self._rails = list(rails)
+
+        # the table the shot starts on, then each table it passes into as it
+        # crosses a rail, unfolded so that the path is a straight line
+        self._images = [Mirror()]
+        for rail in self._rails:
+            self._images.append(rail.mirror.then(self._images[-1]))
+
+        image = self._images[-1]
+        name = "{} off {}".format(pocket_target.name, ", ".join(
+            rail.name for rail in self._rails))
+        self._target = ShotTarget(image.apply(pocket_target.point1),
+                                  image.apply(pocket_target.point2),
+                                  image.apply_direction(pocket_target.force),
+                                  name=name)
+
+    @property
+    def pocket_index(self):
+        return self._pocket_index
+
+    @property
+    def rails(self):
+        return self._rails
+
+    @property
+    def target(self):
+        return self._target
+
+    @property
+    def images(self):
+        """
+        The real table, then each reflected table the shot passes through.
+
+        :rtype: list[Mirror]
+        """
+        return self._images
+
+    def reaches(self, position):
+        """
+        Whether a ball at `position` sent at this target would hit its rails
+        in order, each within the rail's length.
+
+        :type position: Vector2D
+        :rtype: bool
+        """
+        aim = (self._target.point1 + self._target.point2) / 2
+        start = tuple(position)
+        end = tuple(aim)
+        last = 0
+        for rail, image in zip(self._rails, self._images):
+            # where the straight path crosses this rail, on its table
+            axis = rail.axis
+            on_rail = [0, 0]
+            on_rail[axis] = rail.value
+            value = tuple(image.apply(Vector2D(on_rail)))[axis]
+            if end[axis] == start[axis]:
+                return False
+            t = (value - start[axis]) / (end[axis] - start[axis])
+            if not last < t < 1:
+                return False
+            crossing = tuple(image.invert(position + (aim - position) * t))
+            if not rail.start <= crossing[1 - axis] <= rail.end:
+                return False
+            last = t
+        return True
+
+    def obstacles(self, balls, corridor, radius, excluded=()):
+        """
+        Find the balls whose image on any table along the shot is within
+        `radius` of `corridor`, as balls at their image positions.  The
+        corridor is mapped back onto the real table once per image, so the
+        cost does not grow with the number of balls times images.
+
+        :type balls: ball.BallGroup
+        :type corridor: (Vector2D, Vector2D, Vector2D)
+        :type radius: int or float
+        :param excluded: balls that cannot be obstacles
+        :type excluded: list[Ball]
+        :rtype: list[Ball]
+        """
+        obstacles = []
+        for image in self._images:
+            region = [image.invert(point) for point in corridor]
+            for ball in balls.in_corridor(*(region + [radius])):
+                if ball not in excluded:
+                    obstacles.append(
+                        Ball(ball.number, image.apply(ball.position)))
+        return obstacles
+
+    def corridors(self, corridor):
+        """
+        `corridor` mapped back onto the real table through each image, for
+        `core.ShotDependencies`.
+
+        :type corridor: (Vector2D, Vector2D, Vector2D)
+        :rtype: list[(Vector2D, Vector2D, Vector2D)]
+        """
+        return [tuple(image.invert(point) for point in corridor)
+                for image in self._images]
+
+
+def bank_targets(pockets, width, height, cushions=1):
+    """
+    Precompute the bank targets for every pocket off up to `cushions` rails.
+    Rails a pocket is on or past are skipped, as is any rail its reflection
+    would already be on or past, since no ball could bank off them into it.
+
+    :type pockets: list[pocket.Pocket]
+    :type width: int or float
+    :type height: int or float
+    :type cushions: int
+    :rtype: list[BankTarget]
+    """
+    rails = table_rails(width, height)
+    center = Vector2D((width / 2, height / 2))
+    banks = []
+    for index, pocket in enumerate(pockets):
+        target = pocket.target
+        # chains of rails, stored last rail first, with the pocket's position
+        # reflected across them
+        chains = [([], pocket.position)]
+        for _ in range(cushions):
+            next_chains = []
+            for chain, position in chains:
+                for rail in rails:
+                    if chain and rail is chain[0]:
+                        continue
+                    if rail.distance_inside(position, center) <= 0:
+                        continue
+                    next_chains.append(([rail] + chain,
+                                        rail.mirror.apply(position)))
+            banks.extend(BankTarget(index, target, chain)
+                         for chain, _ in next_chains)
+            chains = next_chains
+    return banks
@@ -0,0 +1,274 @@
+#!/usr/bin/env python
+"""
+Solves archives of table layouts offline, without a window.
+
+Layouts are read from a JSONL file, one per line as a list of positions like
+`BallGroup.update` takes or an object with `positions` and an optional `id`,
+or from a binary corpus written by `corpus.py`.  They are solved in batches
+across a pool of worker processes, and one JSON line per layout is written
+out in input order as soon as it and every layout before it are done.  Only
+a few batches are ever in flight, so memory stays bounded however large the
+input is.
+
+Run `python batch.py layouts.jsonl --output results.jsonl`.
+"""
+
+from __future__ import division, print_function
+
+import json
+import sys
+from argparse import ArgumentParser
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from itertools import islice
+from multiprocessing import cpu_count
+from time import time
+
+import config
+from ball import BallGroup
+from corpus import MAGIC as CORPUS_MAGIC, LayoutCorpus
+
+__author__ = "Zander Otavka"
+
+
+# the solver of this worker process and the settings it was built with
+_solver = None
+
+
+def _get_solver(json_data):
+    """
+    :type json_data: dict
+    :return: table and shots, built once per process; the combination
+             search is never cut short by the clock, so results do not
+             depend on how busy the process is
+    :rtype: (table.Table, shot.ShotGroup)
+    """
+    global _solver
+    if _solver is None or _solver[0] != json_data:
+        pockets = config.build_table(json_data)
+        settings = dict(json_data, combination_budget=None)
+        _solver = (json_data, (pockets,
+                               config.build_shots(settings, pockets)))
+    return _solver[1]
+
+
+def _describe(shot):
+    """
+    :type shot: shot.Shot
+    :rtype: dict
+    """
+    angle, force, elevation = shot.to_array()
+    description = {"angle": float(angle), "force": float(force),
+                   "elevation": float(elevation), "rating": shot.rating,
+                   "segments": len(shot.segments)}
+    if shot.robustness is not None:
+        description["robustness"] = shot.robustness
+    return description
+
+
+def solve_batch(json_data, layouts, start=0):
+    """
+    Solve layouts in a worker process.  Each layout is solved from scratch,
+    with robustness sampling seeded from its index in the input, so its
+    result is the same whichever worker solves it and whatever it solved
+    before.
+
+    :param json_data: solver settings, like `config.build_shots` takes
+    :type json_data: dict
+    :param layouts: id and positions of each layout
+    :type layouts: list[(object, list[int])]
+    :param start: index of the first layout in the input
+    :type start: int
+    :return: one result per layout; a layout that cannot be solved gets no
+             shots and an `error`, instead of failing the whole batch
+    :rtype: list[dict]
+    """
+    pockets, shots = _get_solver(json_data)
+    seed = (json_data.get("robustness") or {}).get("seed") or 0
+    results = []
+    for index, (layout_id, positions) in enumerate(layouts, start):
+        begin = time()
+        shots.segment_cache.clear()
+        if shots.rater is not None:
+            shots.rater.reseed([seed, index])
+        try:
+            balls = BallGroup()
+            balls.update(positions)
+            shots.update(pockets, balls)
+        except Exception as e:
+            shots.delete()
+            result = {"id": layout_id, "shots": 0, "best": None,
+                      "alternatives": [],
+                      "error": "{}: {}".format(type(e).__name__, e)}
+        else:
+            ranked_shots = shots.ranked_shots
+            result = {"id": layout_id, "shots": len(shots),
+                      "best": (_describe(ranked_shots[0]) if ranked_shots
+                               else None),
+                      "alternatives": [_describe(shot)
+                                       for shot in ranked_shots[1:]]}
+        result["solve_ms"] = (time() - begin) * 1000
+        results.append(result)
+    return results
+
+
+def read_jsonl(lines):
+    """
+    :param lines: lines of a JSONL file
+    :type lines: collections.Iterable[str]
+    :return: id and positions of each layout; layouts without an id get
+             their line number
+    :rtype: collections.Iterator[(object, list[int])]
+    """
+    for number, line in enumerate(lines):
+        line = line.strip()
+        if not line:
+            continue
+        layout = json.loads(line)
+        if isinstance(layout, dict):
+            yield layout.get("id", number), layout["positions"]
+        else:
+            yield number, layout
+
+
+def read_jsonl_file(path):
+    """
+    :type path: str
+    :return: id and positions of each layout, like `read_jsonl`; the file is
+             closed once they are all read
+    :rtype: collections.Iterator[(object, list[int])]
+    """
+    with open(path, "r") as f:
+        for layout in read_jsonl(f):
+            yield layout
+
+
+def read_corpus(corpus, chunk_size=4096):
+    """
+    :type corpus: LayoutCorpus
+    :type chunk_size: int
+    :return: index and positions of each layout
+    :rtype: collections.Iterator[(int, list[int])]
+    """
+    start = 0
+    for chunk in corpus.chunks(chunk_size):
+        for offset, positions in enumerate(chunk.tolist()):
+            yield start + offset, positions
+        start += len(chunk)
+
+
+def _batches(layouts, batch_size):
+    """
+    :type layouts: collections.Iterator
+    :type batch_size: int
+    :rtype: collections.Iterator[list]
+    """
+    while True:
+        batch = list(islice(layouts, batch_size))
+        if not batch:
+            return
+        yield batch
+
+
+def solve_all(layouts, json_data, executor=None, batch_size=32,
+              max_pending=None):
+    """
+    Solve every layout, yielding results in input order as they are ready.
+
+    :param layouts: id and positions of each layout
+    :type layouts: collections.Iterable[(object, list[int])]
+    :type json_data: dict
+    :param executor: pool to solve batches in, or None to solve them here
+    :type executor: concurrent.futures.Executor
+    :param batch_size: layouts sent to a worker at a time
+    :type batch_size: int
+    :param max_pending: most batches in flight at once, twice the number of
+                        cores by default
+    :type max_pending: int
+    :rtype: collections.Iterator[dict]
+    """
+    batches = _batches(iter(layouts), batch_size)
+    if executor is None:
+        for index, batch in enumerate(batches):
+            for result in solve_batch(json_data, batch, index * batch_size):
+                yield result
+        return
+
+    if max_pending is None:
+        max_pending = cpu_count() * 2
+    pending = deque()
+    for index, batch in enumerate(batches):
+        pending.append(executor.submit(solve_batch, json_data, batch,
+                                       index * batch_size))
+        if len(pending) >= max_pending:
+            for result in pending.popleft().result():
+                yield result
+    while pending:
+        for result in pending.popleft().result():
+            yield result
+
+
+def _open_layouts(path):
+    """
+    :param path: JSONL file, corpus file, or "-" for JSONL on stdin
+    :type path: str
+    :rtype: collections.Iterator[(object, list[int])]
+    """
+    if path == "-":
+        return read_jsonl(sys.stdin)
+    with open(path, "rb") as f:
+        magic = f.read(len(CORPUS_MAGIC))
+    if magic == CORPUS_MAGIC:
+        return read_corpus(LayoutCorpus(path))
+    return read_jsonl_file(path)
+
+
+def main():
+    parser = ArgumentParser(description="Solve an archive of table layouts.")
+    parser.add_argument("input", help="JSONL layouts, a layout corpus, or - "
+                                      "for JSONL on stdin")
+    parser.add_argument("--output", default="-",
+                        help="file to write JSONL results to, or - for "
+                             "stdout")
+    parser.add_argument("--config", default=None,
+                        help="solver settings, like main.py takes")
+    parser.add_argument("--workers", type=int, default=cpu_count(),
+                        help="worker processes, or 0 to solve in this one")
+    parser.add_argument("--batch-size", type=int, default=32)
+    parser.add_argument("--top", type=int, default=3,
+                        help="best shot and alternatives to report")
+    args = parser.parse_args()
+
+    json_data = {}
+    if args.config is not None:
+        json_data = config.load(args.config)
+    json_data["fallback_shots"] = max(args.top, 1) - 1
+
+    if args.output == "-":
+        output = sys.stdout
+    else:
+        output = open(args.output, "w")
+    executor = None
+    if args.workers > 0:
+        executor = ProcessPoolExecutor(args.workers)
+
+    start = time()
+    count = 0
+    try:
+        for result in solve_all(_open_layouts(args.input), json_data,
+                                executor, args.batch_size,
+                                max(args.workers, 1) * 2):
+            output.write(json.dumps(result, sort_keys=True) + "\n")
+            count += 1
+    finally:
+        if executor is not None:
+            executor.shutdown()
+        if output is not sys.stdout:
+            output.close()
+    elapsed = time() - start
+    print("{} layouts in {:.2f} s, {:.1f} layouts/s".format(
+        count, elapsed, count / elapsed if elapsed else 0), file=sys.stderr)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,276 @@
+#!/usr/bin/env python
+"""
+Benchmarks the shot solver on fixed, seeded sets of layouts.
+
+Each set is solved frame by frame through `BallGroup.update` and
+`ShotGroup.update`, the way `main.py` solves frames from the camera, and the
+latency of each frame is recorded.  Results can be saved as a baseline and
+later runs compared against it, so that a change that slows the solver down
+is caught.  Each set is solved a few times, in turn with the other sets so
+that a slow spell on the machine is spread across all of them, and the
+median of the runs is kept.
+
+Run `python benchmark.py --save-baseline baseline.json` once, then
+`python benchmark.py --baseline baseline.json` after each change.  The exit
+status is 1 if anything regressed.
+"""
+
+from __future__ import division, print_function
+
+import json
+import resource
+import sys
+from argparse import ArgumentParser
+from concurrent.futures import ProcessPoolExecutor
+from time import time
+
+import numpy as np
+
+from ball import Ball, BallGroup
+from rng import generate_layouts, uniform
+import config
+
+__author__ = "Zander Otavka"
+
+
+def near_rail(random_state, size, width, height):
+    """
+    Draw positions within a few balls of a rail.
+
+    :type random_state: numpy.random.RandomState
+    :type size: int
+    :type width: int
+    :type height: int
+    :rtype: (numpy.ndarray, numpy.ndarray)
+    """
+    x, y = uniform(random_state, size, width, height)
+    depth = random_state.randint(int(np.ceil(Ball.RADIUS)),
+                                 int(Ball.RADIUS * 6), size)
+    rail = random_state.randint(0, 4, size)
+    x = np.where(rail == 0, depth, np.where(rail == 1, width - depth, x))
+    y = np.where(rail == 2, depth, np.where(rail == 3, height - depth, y))
+    return x, y
+
+
+def clustered(random_state, size, width, height):
+    """
+    Draw positions packed around one of a few spots on the table.
+
+    :type random_state: numpy.random.RandomState
+    :type size: int
+    :type width: int
+    :type height: int
+    :rtype: (numpy.ndarray, numpy.ndarray)
+    """
+    centers = np.array([(width / 4, height / 2), (width * 3 / 4, height / 3),
+                        (width * 3 / 5, height * 3 / 4)])
+    center = centers[random_state.randint(0, len(centers), size)]
+    spread = Ball.RADIUS * 4
+    low = np.ceil(Ball.RADIUS)
+    x = np.clip(np.round(random_state.normal(center[:, 0], spread)),
+                low, int(width - Ball.RADIUS))
+    y = np.clip(np.round(random_state.normal(center[:, 1], spread)),
+                low, int(height - Ball.RADIUS))
+    return x.astype(int), y.astype(int)
+
+
+# name, chance of death and position sampler of each layout set
+LAYOUT_SETS = [
+    ("sparse", .75, uniform),
+    ("dense", 0, uniform),
+    ("near-rail", .2, near_rail),
+    ("clustered", .2, clustered),
+]
+
+# the latency percentiles that are reported
+PERCENTILES = (50, 95, 99)
+
+
+def peak_memory():
+    """
+    Largest resident set size of this process so far, in megabytes.  It
+    never goes down, so each set is run in a process of its own.
+
+    :rtype: float
+    """
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    if sys.platform == "darwin":
+        return peak / (1024 * 1024)
+    return peak / 1024
+
+
+def run_set(layouts, json_data, warmup=10):
+    """
+    Solve every layout in turn with a fresh solver, after solving the first
+    `warmup` of them untimed with another one.
+
+    :param layouts: x and y of each ball by number, one layout per row
+    :type layouts: numpy.ndarray
+    :param json_data: solver settings, like `config.build_shots` takes
+    :type json_data: dict
+    :type warmup: int
+    :return: latency percentiles in milliseconds, candidates solved per
+             second, segment cache hit rate and peak memory in megabytes
+    :rtype: dict
+    """
+    pockets = config.build_table(json_data)
+    if warmup > 0:
+        balls = BallGroup()
+        shots = config.build_shots(json_data, pockets)
+        for layout in layouts[:warmup]:
+            shots.update(pockets, balls, balls.update(layout))
+        shots.delete()
+
+    balls = BallGroup()
+    shots = config.build_shots(json_data, pockets)
+    targets = len(pockets) + len(shots.banks)
+    latencies = []
+    candidates = 0
+    for layout in layouts:
+        start = time()
+        changed = balls.update(layout)
+        shots.update(pockets, balls, changed)
+        latencies.append(time() - start)
+        candidates += (len(balls) - 1) * targets
+    shots.delete()
+
+    result = dict(("p{}_ms".format(percentile), value * 1000)
+                  for percentile, value in zip(
+                      PERCENTILES, np.percentile(latencies, PERCENTILES)))
+    result["candidates_per_second"] = candidates / sum(latencies)
+    result["cache_hit_rate"] = shots.segment_cache.hit_rate
+    result["peak_memory_mb"] = peak_memory()
+    return result
+
+
+def run(count=200, seed=0, json_data=None, repeat=5, warmup=10):
+    """
+    :param count: layouts in each set
+    :type count: int
+    :type seed: int
+    :param json_data: solver settings, the defaults if None
+    :type json_data: dict
+    :param repeat: times to run each set, keeping the median of each metric
+    :type repeat: int
+    :param warmup: layouts to solve untimed before each run
+    :type warmup: int
+    :return: results of each set, by name
+    :rtype: dict[str, dict]
+    """
+    if json_data is None:
+        json_data = {}
+    pockets = config.build_table(json_data)
+    layout_sets = []
+    for index, (name, chance_of_death, draw) in enumerate(LAYOUT_SETS):
+        layout_sets.append((name, generate_layouts(
+            count, 16, pockets.width, pockets.height, chance_of_death,
+            random_state=np.random.RandomState([seed, index]), draw=draw)))
+
+    runs = dict((name, []) for name, _ in layout_sets)
+    for _ in range(max(repeat, 1)):
+        for name, layouts in layout_sets:
+            # a fresh process per run, so its peak memory is its own
+            with ProcessPoolExecutor(1) as executor:
+                runs[name].append(executor.submit(
+                    run_set, layouts, json_data, warmup).result())
+    results = {}
+    for name, set_runs in runs.items():
+        results[name] = dict(
+            (metric, float(np.median([result[metric]
+                                      for result in set_runs])))
+            for metric in set_runs[0])
+    return results
+
+
+def regressions(results, baseline, tolerance, noise_floor=1):
+    """
+    Compare `results` against `baseline`.  Latency and memory regress when
+    they grow, and throughput and cache hit rate when they shrink, by more
+    than `tolerance`.  Latency must also grow by more than `noise_floor`,
+    since a fraction of a fast frame is within timer noise.
+
+    :type results: dict[str, dict]
+    :type baseline: dict[str, dict]
+    :param tolerance: allowed change, as a fraction of the baseline
+    :type tolerance: float
+    :param noise_floor: allowed latency change in milliseconds, however
+                        large a fraction it is
+    :type noise_floor: float
+    :return: a description of each regression
+    :rtype: list[str]
+    """
+    found = []
+    for name, result in sorted(results.items()):
+        if name not in baseline:
+            continue
+        for metric, value in sorted(result.items()):
+            old = baseline[name].get(metric)
+            if old is None:
+                continue
+            if metric in ("candidates_per_second", "cache_hit_rate"):
+                regressed = value < old / (1 + tolerance)
+            else:
+                regressed = value > old * (1 + tolerance)
+                if metric.endswith("_ms"):
+                    regressed = regressed and value - old > noise_floor
+            if regressed:
+                found.append("{} {}: {:.2f} -> {:.2f}".format(
+                    name, metric, old, value))
+    return found
+
+
+def main():
+    parser = ArgumentParser(description="Benchmark the shot solver.")
+    parser.add_argument("--count", type=int, default=200,
+                        help="layouts in each set")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--config", default=None,
+                        help="solver settings, like main.py takes")
+    parser.add_argument("--baseline", default=None,
+                        help="results to check for regressions against")
+    parser.add_argument("--save-baseline", default=None,
+                        help="file to save these results to")
+    parser.add_argument("--tolerance", type=float, default=.1,
+                        help="allowed change from the baseline, as a "
+                             "fraction")
+    parser.add_argument("--noise-floor", type=float, default=1,
+                        help="allowed latency change from the baseline, in "
+                             "milliseconds")
+    parser.add_argument("--repeat", type=int, default=5,
+                        help="times to run each set, keeping the median")
+    parser.add_argument("--warmup", type=int, default=10,
+                        help="layouts to solve untimed before each run")
+    args = parser.parse_args()
+
+    json_data = None
+    if args.config is not None:
+        json_data = config.load(args.config)
+    results = run(args.count, args.seed, json_data, args.repeat, args.warmup)
+
+    print("{:<12}{:>9}{:>9}{:>9}{:>14}{:>11}{:>10}".format(
+        "set", "p50 ms", "p95 ms", "p99 ms", "candidates/s", "cache hit",
+        "peak MB"))
+    for name, _, _ in LAYOUT_SETS:
+        result = results[name]
+        print("{:<12}{:>9.2f}{:>9.2f}{:>9.2f}{:>14.0f}{:>10.0%}{:>10.1f}"
+              .format(name, result["p50_ms"], result["p95_ms"],
+                      result["p99_ms"], result["candidates_per_second"],
+                      result["cache_hit_rate"], result["peak_memory_mb"]))
+
+    if args.save_baseline is not None:
+        with open(args.save_baseline, "w") as f:
+            json.dump(results, f, indent=2, sort_keys=True)
+
+    if args.baseline is not None:
+        with open(args.baseline, "r") as f:
+            baseline = json.load(f)
+        found = regressions(results, baseline, args.tolerance,
+                            args.noise_floor)
+        for regression in found:
+            print("regression: {}".format(regression))
+        if found:
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,111 @@
+"""Contains LRUCache class."""
+
+from __future__ import division, print_function
+
+from collections import OrderedDict
+
+__author__ = "Zander Otavka"
+
+
+class LRUCache(object):
+    """
+    A bounded mapping that evicts the least recently used entry once it holds
+    more than `max_size` entries.
+
+    :type _entries: OrderedDict
+    :type _max_size: int
+    :type _on_evict: (object, object) -> None
+    """
+
+    DEFAULT_MAX_SIZE = 4096
+
+    _entries = None
+    _max_size = None
+    _on_evict = None
+
+    hits = None
+    misses = None
+    evictions = None
+
+    def __init__(self, max_size=None, on_evict=None):
+        """
+        :param max_size: most entries to keep, or 0 to disable caching
+        :type max_size: int
+        :param on_evict: called with the key and value of each evicted entry
+        :type on_evict: (object, object) -> None
+        """
+        self._entries = OrderedDict()
+        if max_size is None:
+            max_size = LRUCache.DEFAULT_MAX_SIZE
+        self._max_size = max_size
+        self._on_evict = on_evict
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    @property
+    def max_size(self):
+        return self._max_size
+
+    @max_size.setter
+    def max_size(self, new):
+        self._max_size = new
+        self._evict()
+
+    @property
+    def hit_rate(self):
+        """
+        :rtype: float
+        """
+        lookups = self.hits + self.misses
+        return self.hits / lookups if lookups else 0.0
+
+    def get(self, key, default=None):
+        try:
+            value = self._entries.pop(key)
+        except KeyError:
+            self.misses += 1
+            return default
+        self._entries[key] = value
+        self.hits += 1
+        return value
+
+    def clear(self):
+        self._entries.clear()
+
+    def stats(self):
+        """
+        :return: size, hits, misses, evictions and hit rate
+        :rtype: dict
+        """
+        return {"size": len(self), "max_size": self._max_size,
+                "hits": self.hits, "misses": self.misses,
+                "evictions": self.evictions, "hit_rate": self.hit_rate}
+
+    def reset_stats(self):
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def _evict(self):
+        while len(self._entries) > self._max_size:
+            key, value = self._entries.popitem(last=False)
+            self.evictions += 1
+            if self._on_evict is not None:
+                self._on_evict(key, value)
+
+    def __setitem__(self, key, value):
+        self._entries.pop(key, None)
+        self._entries[key] = value
+        self._evict()
+
+    def __contains__(self, key):
+        return key in self._entries
+
+    def __len__(self):
+        return len(self._entries)
+
+    def __str__(self):
+        return "<{}.{} - {}/{} entries, {} hits, {} misses>".format(
+            type(self).__module__, type(self).__name__, len(self),
+            self.max_size, self.hits, self.misses)
@@ -0,0 +1,55 @@
+"""Builds the table and shot solver described by `config.json`."""
+
+from __future__ import division, print_function
+
+import json
+
+from bank import bank_targets
+from core import SegmentCache
+from robustness import RobustnessRater
+from shot import ShotGroup
+from table import Table
+
+__author__ = "Zander Otavka"
+
+
+def load(path="config.json"):
+    """
+    :type path: str
+    :rtype: dict
+    """
+    with open(path, "r") as f:
+        return json.load(f)
+
+
+def build_table(json_data):
+    """
+    :type json_data: dict
+    :rtype: Table
+    """
+    # table dimensions and pocket openings, in pixels of .1 inches
+    return Table.standard(**json_data.get("table", {}))
+
+
+def build_shots(json_data, pockets, pool=None):
+    """
+    :type json_data: dict
+    :type pockets: Table
+    :type pool: parallel.ShotPool
+    :rtype: ShotGroup
+    :raises ValueError: if `vectorized` is set and there is a `pool`
+    """
+    if json_data.get("robustness") is not None:
+        rater = RobustnessRater(**json_data["robustness"])
+    else:
+        rater = None
+    return ShotGroup(SegmentCache(json_data.get("segment_cache_size"),
+                                  json_data.get("position_resolution")),
+                     pool, json_data.get("fallback_shots", 0) + 1,
+                     json_data.get("max_segments", 2),
+                     json_data.get("combination_budget"), rater=rater,
+                     banks=bank_targets(pockets, pockets.width,
+                                        pockets.height,
+                                        json_data.get("bank_cushions", 0)),
+                     exact_windows=json_data.get("exact_windows", False),
+                     vectorized=json_data.get("vectorized"))
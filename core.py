@@ -0,0 +1,425 @@
+"""
+Pure geometry of solving shots.
+
+Nothing here touches rendering, so shots can be solved without an OpenGL
+context, e.g. in worker processes or headless tools.
+"""
+
+from __future__ import division, print_function
+
+from math import pi, cos
+
+from angle import Hemisphere
+from ball import Ball
+from cache import LRUCache
+from predicates import cross, dot, in_corridor, orientation, quadrant
+from spatial import distance_to_triangle
+from sweep import free_windows, widest_window
+from target import ShotTarget
+from vector2d import Vector2D
+
+__author__ = "Zander Otavka"
+
+
+class ShotStatus(object):
+    POSSIBLE = 0
+    OBSTRUCTED = 1
+    NO_POSITIVE_FORCE = 2
+
+
+class SegmentSolution(object):
+    """
+    The result of solving one shot segment.  Only possible segments have
+    shot vectors and a target.
+
+    :type status: int
+    :type vector1: Vector2D
+    :type vector2: Vector2D
+    :type target: ShotTarget
+    """
+
+    status = None
+    vector1 = None
+    vector2 = None
+    target = None
+
+    def __init__(self, status, vector1=None, vector2=None, target=None):
+        """
+        :type status: int
+        :type vector1: Vector2D
+        :type vector2: Vector2D
+        :type target: ShotTarget
+        """
+        self.status = status
+        self.vector1 = vector1
+        self.vector2 = vector2
+        self.target = target
+
+    @property
+    def possible(self):
+        return self.status == ShotStatus.POSSIBLE
+
+
+class ShotDependencies(object):
+    """
+    Records the balls a shot's segments looked at and the corridors they
+    searched for obstacles, so that the shot only has to be recomputed when
+    one of those balls changes or another ball moves into a corridor.
+
+    :type _ball_numbers: set[int]
+    :type _corridors: list[(Vector2D, Vector2D, Vector2D)]
+    """
+
+    _ball_numbers = None
+    _corridors = None
+
+    def __init__(self):
+        self._ball_numbers = set()
+        self._corridors = []
+
+    def add_segment(self, actor_ball, obstacles, *corridors):
+        """
+        :type actor_ball: Ball
+        :type obstacles: list[Ball]
+        :param corridors: regions of the table searched for obstacles
+        :type corridors: (Vector2D, Vector2D, Vector2D)
+        """
+        self._ball_numbers.add(actor_ball.number)
+        self._ball_numbers.update(ball.number for ball in obstacles)
+        self._corridors.extend(corridors)
+
+    def is_affected_by(self, changes):
+        """
+        :param changes: new position of each ball that changed, or None for
+                        balls that disappeared
+        :type changes: dict[int, Vector2D]
+        :rtype: bool
+        """
+        for number, position in changes.items():
+            if number in self._ball_numbers:
+                return True
+            if position is None:
+                continue
+            for corridor in self._corridors:
+                distance = distance_to_triangle(position, *corridor)
+                if distance <= Ball.RADIUS * 2:
+                    return True
+        return False
+
+
+class SegmentCache(LRUCache):
+    """
+    Remembers segment solutions across frames.  Keys are built from positions
+    rounded to the camera's resolution, so layouts that are re-sent with a
+    little sensor noise still hit.
+
+    :type _resolution: int or float
+    """
+
+    DEFAULT_RESOLUTION = 1
+
+    _resolution = None
+
+    def __init__(self, max_size=None, resolution=None, on_evict=None):
+        """
+        :type max_size: int
+        :param resolution: smallest position difference the camera reports
+        :type resolution: int or float
+        :type on_evict: (object, object) -> None
+        """
+        super(SegmentCache, self).__init__(max_size, on_evict)
+        if resolution is None:
+            resolution = SegmentCache.DEFAULT_RESOLUTION
+        self._resolution = resolution
+
+    @property
+    def resolution(self):
+        return self._resolution
+
+    def _quantize(self, vector):
+        """
+        :type vector: Vector2D
+        :rtype: (int, int)
+        """
+        return (int(round(vector.x / self._resolution)),
+                int(round(vector.y / self._resolution)))
+
+    def key(self, target, position, obstacles, exact=False):
+        """
+        :type target: ShotTarget
+        :type position: Vector2D
+        :type obstacles: list[Ball]
+        :param exact: whether the segment is solved with `sweep.free_windows`
+        :type exact: bool
+        :rtype: tuple
+        """
+        return (exact, self._quantize(position),
+                self._quantize(target.point1),
+                self._quantize(target.point2),
+                self._quantize(target.force),
+                tuple(self._quantize(ball.position) for ball in obstacles))
+
+
+def _narrow_greedily(position, v1, v2, obstacles):
+    """
+    Narrow the shot vectors `v1` and `v2` in place around each of
+    `obstacles` in turn.
+
+    :type position: Vector2D
+    :type v1: Vector2D
+    :type v2: Vector2D
+    :type obstacles: list[Ball]
+    :return: whether the shot is still possible
+    :rtype: bool
+    """
+    # find ball radius offsets
+    if (abs(v2.direction - (v1.direction + pi / 2)) <
+            abs(v2.direction - (v1.direction - pi / 2))):
+        sign = 1
+    else:
+        sign = -1
+    off1 = Vector2D.from_polar(Ball.RADIUS * 2,
+                               v1.direction - sign * pi / 2)
+    off2 = Vector2D.from_polar(Ball.RADIUS * 2,
+                               v2.direction + sign * pi / 2)
+
+    # derive a system of inequalities from the vectors and offsets
+    p1 = position + off1
+    p2 = position + off2
+    v1quad = quadrant(v1)
+    v2quad = quadrant(v2)
+    hem = None
+
+    def get_east_west_cmp():
+        if v1.normalized().y < v2.normalized().y:
+            return 1, -1
+        else:
+            return -1, 1
+    if v1quad in Hemisphere.EAST and v2quad in Hemisphere.EAST:
+        hem = Hemisphere.EAST
+        cmp1, cmp2 = get_east_west_cmp()
+    elif v1quad in Hemisphere.WEST and v2quad in Hemisphere.WEST:
+        hem = Hemisphere.WEST
+        cmp1, cmp2 = get_east_west_cmp()
+    elif (v1.direction - v2.direction > pi / 2 ==
+          v1quad in Hemisphere.WEST):
+        cmp1 = cmp2 = 1
+    else:
+        cmp1 = cmp2 = -1
+
+    # restrict shot angles based on obstacles
+    for other_ball in obstacles:
+        if in_corridor(other_ball.position, position, p1, v1, cmp1, p2, v2,
+                       cmp2, hem):
+            p1_to_ball = other_ball.position - p1
+            p2_to_ball = other_ball.position - p2
+            a1 = abs(p1_to_ball.direction - v1.direction)
+            a2 = abs(p2_to_ball.direction - v2.direction)
+            if min(a1, a2) > abs(v1.direction - v2.direction):
+                return False
+            if a1 < a2:
+                v1.direction = p1_to_ball.direction
+            else:
+                v2.direction = p2_to_ball.direction
+            # assert not is_possible_collision(*other_ball.position)
+    return True
+
+
+def _narrow_exactly(position, v1, v2, obstacles):
+    """
+    Turn the shot vectors `v1` and `v2` in place to the edges of the widest
+    window that misses all of `obstacles`.
+
+    :type position: Vector2D
+    :type v1: Vector2D
+    :type v2: Vector2D
+    :type obstacles: list[Ball]
+    :return: whether there is any such window
+    :rtype: bool
+    """
+    point1 = position + v1
+    point2 = position + v2
+    windows = free_windows(position, point1, point2,
+                           [ball.position for ball in obstacles],
+                           Ball.RADIUS * 2)
+    if not windows:
+        return False
+    first, last = widest_window(windows)
+    if orientation(position, point1, point2) < 0:
+        first, last = last, first
+    v1.direction = first
+    v2.direction = last
+    return True
+
+
+def solve_segment(target, position, obstacles, exact=False):
+    """
+    Narrow the shot from `position` to `target` around `obstacles`.
+
+    :type target: ShotTarget
+    :type position: Vector2D
+    :type obstacles: list[Ball]
+    :param exact: aim through the widest window between the obstacles,
+                  found by `sweep.free_windows`, instead of narrowing around
+                  one obstacle at a time in the order they are given
+    :type exact: bool
+    :rtype: SegmentSolution
+    """
+    # get a pair of vectors pointing at the pocket
+    v1 = target.point1 - position
+    v2 = target.point2 - position
+    if exact:
+        possible = _narrow_exactly(position, v1, v2, obstacles)
+    else:
+        possible = _narrow_greedily(position, v1, v2, obstacles)
+    if not possible:
+        return SegmentSolution(ShotStatus.OBSTRUCTED)
+
+    # calculate necessary force to transfer to target, and sum with the
+    # length of the shot
+    v1_v2_avg = Vector2D(v1 + v2) / 2
+    force_offset_angle = abs(target.force.direction - v1_v2_avg.direction)
+    if force_offset_angle > pi / 2:
+        # positive force cannot be applied due to shot angle
+        return SegmentSolution(ShotStatus.NO_POSITIVE_FORCE)
+    force_magnitude = (target.force.magnitude / cos(force_offset_angle) +
+                       v1_v2_avg.magnitude)
+
+    # calculate target from shot vectors and necessary force
+    target_p1 = position + Vector2D.from_polar(-Ball.RADIUS * 2, v1.direction)
+    target_p2 = position + Vector2D.from_polar(-Ball.RADIUS * 2, v2.direction)
+    target_force = Vector2D.from_polar(force_magnitude, v1_v2_avg.direction)
+    return SegmentSolution(ShotStatus.POSSIBLE, v1, v2,
+                           ShotTarget(target_p1, target_p2, target_force))
+
+
+def _solve_segment_cached(target, position, obstacles, cache=None,
+                          exact=False):
+    """
+    Like `solve_segment`, but look the solution up in `cache` first.
+
+    :type target: ShotTarget
+    :type position: Vector2D
+    :type obstacles: list[Ball]
+    :type cache: SegmentCache
+    :type exact: bool
+    :rtype: SegmentSolution
+    """
+    if cache is None:
+        return solve_segment(target, position, obstacles, exact)
+    key = cache.key(target, position, obstacles, exact)
+    solution = cache.get(key)
+    if solution is None:
+        solution = solve_segment(target, position, obstacles, exact)
+        cache[key] = solution
+    return solution
+
+
+def solve_shot(target, actor_balls, balls, dependencies=None, cache=None,
+               solutions=None, bank=None, exact=False):
+    """
+    Solve the segments of a shot into `target`, one per actor ball, starting
+    from the ball that is sunk and ending with the cue ball.  Each segment
+    aims at the target of the one before it, and can be obstructed by any of
+    `balls` except its own actor ball and the ones already struck before it.
+    Solving stops at the first impossible segment.
+
+    :type target: ShotTarget
+    :type actor_balls: list[Ball]
+    :param balls: object balls; the cue ball is never an obstacle
+    :type balls: ball.BallGroup
+    :type dependencies: ShotDependencies
+    :param cache: cache for the first segment, which does not depend on the
+                  cue ball
+    :type cache: SegmentCache
+    :param solutions: obstacles in each segment's path and its solution, for
+                      leading segments that were already solved elsewhere,
+                      e.g. in another process or as part of a shorter chain
+    :type solutions: list[(list[Ball], SegmentSolution)]
+    :param bank: the bank target that `target` is, if the first segment is
+                 banked off the rails
+    :type bank: bank.BankTarget
+    :param exact: solve segments exactly; see `solve_segment`
+    :type exact: bool
+    :return: obstacles in the path of each segment that was solved, and its
+             solution
+    :rtype: list[(list[Ball], SegmentSolution)]
+    """
+    if solutions is None:
+        solutions = []
+    results = []
+    for index, actor_ball in enumerate(actor_balls):
+        # only balls in the shot's path can obstruct it
+        corridor = (actor_ball.position, target.point1, target.point2)
+        corridors = [corridor]
+        if index == 0 and bank is not None:
+            corridors = bank.corridors(corridor)
+        if index < len(solutions) and solutions[index] is not None:
+            obstacles, solution = solutions[index]
+        else:
+            struck = actor_balls[:index + 1]
+            if index == 0 and bank is not None:
+                obstacles = bank.obstacles(balls, corridor, Ball.RADIUS * 2,
+                                           struck)
+            else:
+                obstacles = [ball for ball in balls.in_corridor(
+                    *(corridor + (Ball.RADIUS * 2,))) if ball not in struck]
+            solution = _solve_segment_cached(target, actor_ball.position,
+                                             obstacles,
+                                             cache if index == 0 else None,
+                                             exact)
+        if dependencies is not None:
+            dependencies.add_segment(actor_ball, obstacles, *corridors)
+
+        results.append((obstacles, solution))
+        if not solution.possible:
+            break
+        target = solution.target
+    return results
+
+
+def within_cut_angle(position, target, max_angle):
+    """
+    Whether a ball at `position` could send `target`'s force by hitting it at
+    most `max_angle` off the force direction.  Passing pi / 2 only rules out
+    segments that `solve_segment` would reject for needing negative force.
+
+    :type position: Vector2D
+    :type target: ShotTarget
+    :type max_angle: float
+    :rtype: bool
+    """
+    force = target.force
+    v1 = target.point1 - position
+    v2 = target.point2 - position
+    min_cos = cos(max_angle)
+    for v in (v1, v2):
+        if dot(v, force) >= min_cos * v.magnitude * force.magnitude:
+            return True
+
+    # the force may point between the edges of the window
+    return ((cross(v1, force) > 0) == (cross(force, v2) > 0) and
+            dot(v1 + v2, force) > 0)
+
+
+def shot_promise(target, target_position, cue_position):
+    """
+    Cheaply guess how good a direct shot will be, without looking at
+    obstacles, so that the most promising candidates can be solved first.
+    Wider target windows and straighter cuts are more promising.
+
+    :type target: ShotTarget
+    :param target_position: position of the ball that is sunk
+    :type target_position: Vector2D
+    :type cue_position: Vector2D
+    :rtype: float
+    """
+    v1 = target.point1 - target_position
+    v2 = target.point2 - target_position
+    width = abs(cross(v1, v2)) / (v1.magnitude * v2.magnitude)
+
+    # cosine of the cut angle, off the middle of the target window
+    aim = v1 + v2
+    approach = target_position - cue_position
+    cut = dot(aim, approach) / (aim.magnitude * approach.magnitude)
+    return width * max(cut, 0)
@@ -0,0 +1,186 @@
+#!/usr/bin/env python
+"""
+A corpus of random ball layouts on disk, for benchmarks and batch solves.
+
+The file is a small header followed by one column per position value, x of
+ball 0, y of ball 0, x of ball 1 and so on, each holding that value for
+every layout as an unsigned 16-bit integer.  Layouts are generated in chunks
+seeded from the corpus seed and the chunk's index, so the same seed and
+count always give the same corpus.
+
+Run `python corpus.py layouts.corpus --count 1000000` to write one.
+"""
+
+from __future__ import division, print_function
+
+from argparse import ArgumentParser
+from struct import Struct
+
+import numpy as np
+
+from rng import generate_layouts
+
+__author__ = "Zander Otavka"
+
+
+MAGIC = b"PLC1"
+
+# magic, balls per layout, table width and height, seed and layout count
+HEADER = Struct("<4sHHHQQ")
+
+# layouts are generated and written this many at a time
+CHUNK_SIZE = 65536
+
+
+def write_corpus(path, count, number=16, width=1080, height=540, seed=0,
+                 chance_of_death=.2, unkillable_balls=(0, 8)):
+    """
+    :type path: str
+    :type count: int
+    :type number: int
+    :type width: int
+    :type height: int
+    :type seed: int
+    :type chance_of_death: float
+    :type unkillable_balls: tuple[int]
+    """
+    with open(path, "wb") as f:
+        f.write(HEADER.pack(MAGIC, number, width, height, seed, count))
+    columns = np.memmap(path, dtype="<u2", mode="r+", offset=HEADER.size,
+                        shape=(number * 2, count))
+    for chunk, start in enumerate(range(0, count, CHUNK_SIZE)):
+        size = min(CHUNK_SIZE, count - start)
+        random_state = np.random.RandomState([seed, chunk])
+        layouts = generate_layouts(size, number, width, height,
+                                   chance_of_death, unkillable_balls,
+                                   random_state)
+        columns[:, start:start + size] = layouts.T
+    columns.flush()
+    del columns
+
+
+class LayoutCorpus(object):
+    """
+    A corpus file, memory-mapped read-only.
+
+    :type _number: int
+    :type _width: int
+    :type _height: int
+    :type _seed: int
+    :type _columns: numpy.ndarray
+    """
+
+    _number = None
+    _width = None
+    _height = None
+    _seed = None
+    _columns = None
+
+    def __init__(self, path):
+        """
+        :type path: str
+        """
+        with open(path, "rb") as f:
+            header = f.read(HEADER.size)
+        if len(header) < HEADER.size:
+            raise ValueError("{} is not a layout corpus".format(path))
+        magic, number, width, height, seed, count = HEADER.unpack(header)
+        if magic != MAGIC:
+            raise ValueError("{} is not a layout corpus".format(path))
+        self._number = number
+        self._width = width
+        self._height = height
+        self._seed = seed
+        self._columns = np.memmap(path, dtype="<u2", mode="r",
+                                  offset=HEADER.size,
+                                  shape=(number * 2, count))
+
+    @property
+    def number(self):
+        return self._number
+
+    @property
+    def width(self):
+        return self._width
+
+    @property
+    def height(self):
+        return self._height
+
+    @property
+    def seed(self):
+        return self._seed
+
+    @property
+    def columns(self):
+        """
+        One row per position value, one column per layout.
+
+        :rtype: numpy.ndarray
+        """
+        return self._columns
+
+    @property
+    def xs(self):
+        """
+        x of each ball, one row per ball.
+
+        :rtype: numpy.ndarray
+        """
+        return self._columns[0::2]
+
+    @property
+    def ys(self):
+        """
+        y of each ball, one row per ball.
+
+        :rtype: numpy.ndarray
+        """
+        return self._columns[1::2]
+
+    def layouts(self, start=0, stop=None):
+        """
+        Layouts `start` to `stop`, copied into rows like
+        `BallGroup.update` takes.
+
+        :type start: int
+        :type stop: int
+        :rtype: numpy.ndarray
+        """
+        return np.ascontiguousarray(self._columns[:, start:stop].T)
+
+    def chunks(self, size=CHUNK_SIZE):
+        """
+        :type size: int
+        :return: every layout, `size` rows at a time
+        :rtype: collections.Iterator[numpy.ndarray]
+        """
+        for start in range(0, len(self), size):
+            yield self.layouts(start, start + size)
+
+    def __len__(self):
+        return self._columns.shape[1]
+
+    def __getitem__(self, index):
+        """
+        :rtype: numpy.ndarray
+        """
+        return self._columns[:, index]
+
+
+def main():
+    parser = ArgumentParser(description="Write a corpus of random ball "
+                                        "layouts.")
+    parser.add_argument("path")
+    parser.add_argument("--count", type=int, default=1000000)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--width", type=int, default=1080)
+    parser.add_argument("--height", type=int, default=540)
+    parser.add_argument("--chance-of-death", type=float, default=.2)
+    args = parser.parse_args()
+    write_corpus(args.path, args.count, width=args.width, height=args.height,
+                 seed=args.seed, chance_of_death=args.chance_of_death)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,271 @@
+#!/usr/bin/env python
+"""
+Records incoming ball frames to a memory-mapped log, and replays logs
+through the solver.
+
+A log is a small header followed by fixed-size records, each holding the
+time a frame arrived, its sequence number and its ball positions.  The
+header keeps the number of records written, so a log that was cut off
+mid-session can still be read up to its last whole record.
+
+Run `python framelog.py session.log` to replay a log as fast as possible, or
+with `--real-time` to keep the gaps between frames that were recorded.
+"""
+
+from __future__ import division, print_function
+
+import mmap
+import os
+from argparse import ArgumentParser
+from struct import Struct
+from time import sleep, strftime, time
+
+import numpy as np
+
+from protocol import BALL_COUNT
+
+__author__ = "Zander Otavka"
+
+
+MAGIC = b"PFL1"
+
+# magic, positions per record and number of records
+HEADER = Struct("<4sHQ")
+
+RECORD = Struct("<dH{}H".format(BALL_COUNT * 2))
+RECORD_DTYPE = np.dtype([("timestamp", "<f8"), ("sequence", "<u2"),
+                         ("positions", "<u2", (BALL_COUNT * 2,))])
+
+
+class FrameRecorder(object):
+    """
+    Appends frames to a new log file through a memory map, which grows a
+    chunk at a time.  An existing log is never overwritten.
+
+    :type _path: str
+    :type _file: file
+    :type _map: mmap.mmap
+    :type _count: int
+    :type _capacity: int
+    :type _chunk: int
+    """
+
+    DEFAULT_CHUNK = 4096
+    DEFAULT_PATH = "frames-%Y%m%d-%H%M%S.log"
+
+    _path = None
+    _file = None
+    _map = None
+    _count = None
+    _capacity = None
+    _chunk = None
+
+    def __init__(self, path=None, chunk=None):
+        """
+        :param path: file to create, formatted with `time.strftime`;
+                     `DEFAULT_PATH` if None
+        :type path: str
+        :param chunk: how many records to make room for at a time
+        :type chunk: int
+        :raises OSError: if the file already exists
+        """
+        if path is None:
+            path = FrameRecorder.DEFAULT_PATH
+        if chunk is None:
+            chunk = FrameRecorder.DEFAULT_CHUNK
+        self._path = strftime(path)
+        self._chunk = chunk
+        self._count = 0
+        self._capacity = chunk
+        self._file = os.fdopen(os.open(self._path, os.O_RDWR | os.O_CREAT |
+                                       os.O_EXCL, 0o644), "w+b")
+        self._file.truncate(self._size(self._capacity))
+        self._map = mmap.mmap(self._file.fileno(), self._size(self._capacity))
+        HEADER.pack_into(self._map, 0, MAGIC, BALL_COUNT * 2, 0)
+
+    @property
+    def path(self):
+        return self._path
+
+    @staticmethod
+    def _size(count):
+        return HEADER.size + RECORD.size * count
+
+    def __len__(self):
+        return self._count
+
+    def record(self, positions, sequence=0, timestamp=None):
+        """
+        :param positions: x and y of each ball by number, like
+                          `BallGroup.update` takes
+        :type positions: numpy.ndarray or list[int]
+        :type sequence: int
+        :param timestamp: when the frame was read from the XBee, now by
+                          default
+        :type timestamp: float
+        """
+        if timestamp is None:
+            timestamp = time()
+        if self._count == self._capacity:
+            self._capacity += self._chunk
+            self._map.resize(self._size(self._capacity))
+        RECORD.pack_into(self._map, self._size(self._count), timestamp,
+                         sequence & 0xFFFF, *[int(value)
+                                              for value in positions])
+        self._count += 1
+        HEADER.pack_into(self._map, 0, MAGIC, BALL_COUNT * 2, self._count)
+
+    def close(self):
+        """Trim the unused end of the log and close it."""
+        if self._map is None:
+            return
+        self._map.flush()
+        self._map.close()
+        self._map = None
+        self._file.truncate(self._size(self._count))
+        self._file.close()
+
+
+class FrameLog(object):
+    """
+    A recorded log, read through a memory map without copying.  Its columns
+    are NumPy views of the file.
+
+    :type _map: mmap.mmap
+    :type _records: numpy.ndarray
+    """
+
+    _map = None
+    _records = None
+
+    def __init__(self, path):
+        """
+        :type path: str
+        """
+        with open(path, "rb") as f:
+            self._map = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        magic, values, count = HEADER.unpack_from(self._map)
+        if magic != MAGIC or values != BALL_COUNT * 2:
+            raise ValueError("{} is not a frame log".format(path))
+        count = min(count,
+                    (len(self._map) - HEADER.size) // RECORD_DTYPE.itemsize)
+        self._records = np.frombuffer(self._map, dtype=RECORD_DTYPE,
+                                      count=count, offset=HEADER.size)
+
+    @property
+    def timestamps(self):
+        """
+        :rtype: numpy.ndarray
+        """
+        return self._records["timestamp"]
+
+    @property
+    def sequences(self):
+        """
+        :rtype: numpy.ndarray
+        """
+        return self._records["sequence"]
+
+    @property
+    def positions(self):
+        """
+        One row of ball positions per frame.
+
+        :rtype: numpy.ndarray
+        """
+        return self._records["positions"]
+
+    def __len__(self):
+        return len(self._records)
+
+    def __getitem__(self, index):
+        """
+        :return: timestamp, sequence number and positions of a frame
+        :rtype: (float, int, numpy.ndarray)
+        """
+        record = self._records[index]
+        return (float(record["timestamp"]), int(record["sequence"]),
+                record["positions"])
+
+    def close(self):
+        self._records = None
+        self._map.close()
+
+
+def replay(log, pockets, shots, balls=None, real_time=False,
+           latency_budget=None):
+    """
+    Feed every frame of `log` through `BallGroup.update` and
+    `ShotGroup.update`, the way `main.on_get_data` does.
+
+    :type log: FrameLog
+    :type pockets: table.Table
+    :type shots: shot.ShotGroup
+    :type balls: ball.BallGroup
+    :param real_time: wait out the recorded gaps between frames, instead of
+                      going as fast as possible
+    :type real_time: bool
+    :param latency_budget: seconds each frame may be solved for
+    :type latency_budget: float
+    :return: seconds each frame took to solve, and whether each finished
+    :rtype: (list[float], list[bool])
+    """
+    from ball import BallGroup
+
+    if balls is None:
+        balls = BallGroup()
+    latencies = []
+    finished = []
+    start = time()
+    for index in range(len(log)):
+        timestamp, _, positions = log[index]
+        if real_time:
+            delay = (timestamp - log.timestamps[0]) - (time() - start)
+            if delay > 0:
+                sleep(delay)
+        frame_start = time()
+        deadline = None
+        if latency_budget is not None:
+            deadline = frame_start + latency_budget
+        changed = balls.update(positions)
+        finished.append(shots.update(pockets, balls, changed, deadline))
+        latencies.append(time() - frame_start)
+    return latencies, finished
+
+
+def main():
+    import config
+
+    parser = ArgumentParser(description="Replay a recorded frame log "
+                                        "through the shot solver.")
+    parser.add_argument("log", help="frame log written by FrameRecorder")
+    parser.add_argument("--config", default="config.json",
+                        help="solver settings, like main.py takes")
+    parser.add_argument("--real-time", action="store_true",
+                        help="keep the recorded gaps between frames")
+    args = parser.parse_args()
+
+    if os.path.exists(args.config):
+        json_data = config.load(args.config)
+    else:
+        json_data = {}
+    pockets = config.build_table(json_data)
+    shots = config.build_shots(json_data, pockets)
+    log = FrameLog(args.log)
+    start = time()
+    latencies, finished = replay(log, pockets, shots,
+                                 real_time=args.real_time,
+                                 latency_budget=json_data.get(
+                                     "latency_budget"))
+    elapsed = time() - start
+    if latencies:
+        print("{} frames in {:.2f} s, {:.1f} frames/s".format(
+            len(latencies), elapsed, len(latencies) / elapsed))
+        print("solve ms: mean {:.2f}, max {:.2f}; {} ran out of time".format(
+            np.mean(latencies) * 1000, np.max(latencies) * 1000,
+            finished.count(False)))
+    log.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,149 @@
+"""
+Hands frames from the XBee's reader thread to the solver.
+
+Only the newest frame is kept.  A frame that arrives before the solver takes
+the last one replaces it, so the solver always works on the freshest layout
+instead of falling behind a queue of stale ones.
+"""
+
+from __future__ import division, print_function
+
+from threading import Event, Lock
+from time import time
+
+__author__ = "Zander Otavka"
+
+
+class IngestMetrics(object):
+    """
+    Counts of what happened to incoming frames, and how long they waited.
+
+    :type received: int
+    :type superseded: int
+    :type corrupt: int
+    :type stale: int
+    :type resynced: int
+    :type handled: int
+    :type total_latency: float
+    :type max_latency: float
+    """
+
+    received = 0
+    superseded = 0
+    corrupt = 0
+    stale = 0
+    resynced = 0
+    handled = 0
+    total_latency = 0.0
+    max_latency = 0.0
+
+    @property
+    def dropped(self):
+        """
+        Frames that were received but never solved.
+
+        :rtype: int
+        """
+        return self.superseded + self.corrupt + self.stale
+
+    @property
+    def mean_latency(self):
+        """
+        Mean seconds a frame waited to be taken, or None before any were.
+
+        :rtype: float
+        """
+        taken = self.received - self.superseded
+        if taken == 0:
+            return None
+        return self.total_latency / taken
+
+    def record_latency(self, latency):
+        """
+        :type latency: float
+        """
+        self.total_latency += latency
+        self.max_latency = max(self.max_latency, latency)
+
+    def __str__(self):
+        mean_latency = self.mean_latency
+        return ("<ingest.IngestMetrics - {} received, {} handled, {} dropped "
+                "({} superseded, {} corrupt, {} stale), {} resynced, latency "
+                "mean {} max {:.1f} ms>".format(
+                    self.received, self.handled, self.dropped,
+                    self.superseded, self.corrupt, self.stale, self.resynced,
+                    "-" if mean_latency is None else
+                    "{:.1f}".format(mean_latency * 1000),
+                    self.max_latency * 1000))
+
+
+class LatestFrame(object):
+    """
+    A one frame mailbox that is safe to put into from another thread.
+
+    :type _lock: Lock
+    :type _waiting: Event
+    :type _frame: str
+    :type _arrival: float
+    :type _metrics: IngestMetrics
+    """
+
+    _lock = None
+    _waiting = None
+    _frame = None
+    _arrival = None
+    _metrics = None
+
+    def __init__(self, metrics=None):
+        """
+        :type metrics: IngestMetrics
+        """
+        self._lock = Lock()
+        self._waiting = Event()
+        if metrics is None:
+            metrics = IngestMetrics()
+        self._metrics = metrics
+
+    @property
+    def metrics(self):
+        return self._metrics
+
+    def put(self, frame):
+        """
+        Replace the waiting frame, if any, with `frame`.
+
+        :type frame: str or bytearray
+        """
+        with self._lock:
+            if self._frame is not None:
+                self._metrics.superseded += 1
+            self._frame = frame
+            self._arrival = time()
+            self._metrics.received += 1
+            self._waiting.set()
+
+    def wait(self, timeout=None):
+        """
+        Block until a frame is waiting, or `timeout` seconds pass.
+
+        :type timeout: float
+        :return: whether a frame is waiting
+        :rtype: bool
+        """
+        return self._waiting.wait(timeout)
+
+    def take(self):
+        """
+        :return: the newest frame and the `time.time()` it was put, or None
+                 and None if none arrived since the last call
+        :rtype: (str or bytearray, float)
+        """
+        with self._lock:
+            frame = self._frame
+            arrival = self._arrival
+            self._frame = None
+            self._arrival = None
+            self._waiting.clear()
+        if frame is not None:
+            self._metrics.record_latency(time() - arrival)
+        return frame, arrival
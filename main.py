@@ -1,110 +1,161 @@
 #!/usr/bin/env python
-"""
-Find the best shot on the pool table.
-
-Each pixel is .1 inches.
-"""
+"""Find the best shot on the pool table."""
 
 from __future__ import division, print_function
 
-import json
-from math import sqrt
-
-from pyglet.window import Window
-from pyglet.app import run, event_loop
-from pyglet.gl import glClearColor
+import signal
+from time import time
 
 from portmanager import PortManager
+from parallel import ShotPool
 from ball import BallGroup
-from shot import ShotGroup
-from render import PrimitiveRenderer, batch
-from pocket import Pocket
-from vector2d import Vector2D
+from config import load, build_table, build_shots
+from framelog import FrameRecorder
 from rng import get_ball_positions
+from timing import timers
 
 __author__ = "Zander Otavka"
 
 
-TABLE_WIDTH = 1080
-TABLE_HEIGHT = 540
-
-CORNER_POCKET_OPENING = 45
-SIDE_POCKET_OPENING = 50
-
-
-with open("config.json", "r") as f:
-    json_data = json.load(f)
-port = PortManager(json_data["port"])
-
-window = Window(TABLE_WIDTH, TABLE_HEIGHT)
-balls = BallGroup()
-shots = ShotGroup()
-
-CORNER_POCKET_OFFSET = sqrt(CORNER_POCKET_OPENING ** 2 / 2)
-SIDE_POCKET_DEPTH = sqrt(CORNER_POCKET_OFFSET ** 2 / 2)
-pockets = [
-    Pocket(Vector2D((0, 0)),
-           Vector2D((0, CORNER_POCKET_OFFSET)),
-           Vector2D((CORNER_POCKET_OFFSET, 0)),
-           name="Bottom Left"),
-
-    Pocket(Vector2D((TABLE_WIDTH, 0)),
-           Vector2D((-CORNER_POCKET_OFFSET, 0)),
-           Vector2D((0, CORNER_POCKET_OFFSET)),
-           name="Bottom Right"),
+json_data = load()
+port = PortManager(json_data["port"], json_data.get("baudrate", 9600),
+                   json_data.get("fake_data", True))
+
+# without a window, nothing touches pyglet's display or OpenGL
+headless = json_data.get("headless", False)
+
+# start workers before anything else so they inherit as little as possible
+if json_data.get("parallel"):
+    pool = ShotPool(json_data.get("workers"))
+    pool.warm_up()
+else:
+    pool = None
+
+pockets = build_table(json_data)
+balls = BallGroup(visible=not headless)
+shots = build_shots(json_data, pockets, pool)
+latency_budget = json_data.get("latency_budget")
+poll_interval = json_data.get("poll_interval", 1 / 120)
+
+# `true` records to a log named after the time the session started
+if json_data.get("record") is True:
+    recorder = FrameRecorder()
+elif json_data.get("record"):
+    recorder = FrameRecorder(json_data["record"])
+else:
+    recorder = None
+if recorder is not None:
+    print("recording frames to {}".format(recorder.path))
+
+# per-stage timing, which SIGUSR1 switches on and off
+timing = json_data.get("timing", {})
+address = timing.get("address")
+timers.configure(timing.get("enabled", False), timing.get("window"),
+                 timing.get("interval"), timing.get("path"),
+                 tuple(address) if address is not None else None)
+timers.watch("segment_cache", shots.segment_cache.stats)
+signal.signal(signal.SIGUSR1, timers.toggle)
 
-    Pocket(Vector2D((TABLE_WIDTH, TABLE_HEIGHT)),
-           Vector2D((-CORNER_POCKET_OFFSET, 0)),
-           Vector2D((0, -CORNER_POCKET_OFFSET)),
-           name="Top Right"),
-
-    Pocket(Vector2D((0, TABLE_HEIGHT)),
-           Vector2D((0, -CORNER_POCKET_OFFSET)),
-           Vector2D((CORNER_POCKET_OFFSET, 0)),
-           name="Top Left"),
-
-    Pocket(Vector2D((TABLE_WIDTH / 2, -SIDE_POCKET_DEPTH)),
-           Vector2D((-SIDE_POCKET_OPENING / 2, SIDE_POCKET_DEPTH)),
-           Vector2D((SIDE_POCKET_OPENING / 2, SIDE_POCKET_DEPTH)),
-           name="Bottom Center"),
+# generate fake, randomized data
+PortManager.FAKE_DATA = get_ball_positions(16, pockets.width, pockets.height,
+                                           pockets)
 
-    Pocket(Vector2D((TABLE_WIDTH / 2, TABLE_HEIGHT + SIDE_POCKET_DEPTH)),
-           Vector2D((-SIDE_POCKET_OPENING / 2, -SIDE_POCKET_DEPTH)),
-           Vector2D((SIDE_POCKET_OPENING / 2, -SIDE_POCKET_DEPTH)),
-           name="Top Center"),
-]
+# frames that ran out of `latency_budget`, and frames whose combination
+# search ran out of `combination_budget`
+deadline_misses = 0
+combination_cutoffs = 0
+timers.watch("frames", lambda: {"handled": port.metrics.handled,
+                                "deadline_misses": deadline_misses,
+                                "combination_cutoffs": combination_cutoffs})
 
-glClearColor(0.2, 0.6, 0.3, 1)
+if not headless:
+    from pyglet.window import Window
+    from pyglet.gl import glClearColor
+    from render import PrimitiveRenderer, batch
 
-# generate fake, randomized data
-PortManager.FAKE_DATA = get_ball_positions(16, TABLE_WIDTH, TABLE_HEIGHT, pockets)
+    window = Window(pockets.width, pockets.height)
+    for pocket in pockets:
+        pocket.show()
+    glClearColor(0.2, 0.6, 0.3, 1)
 
-
-@window.event
-def on_draw():
-    window.clear()
-    batch.draw()
+    @window.event
+    def on_draw():
+        window.clear()
+        batch.draw()
 
 
 @port.event
 def on_get_data(data):
-    balls.update(data)
-    shots.update(pockets, balls)
-
-    best_shot = shots.best_shot
-    best_shot.highlight()
-    port.send_data(best_shot.to_array())
-
-    PrimitiveRenderer.update_all_vertex_lists()
+    global deadline_misses, combination_cutoffs
+    deadline = None
+    if latency_budget is not None:
+        deadline = time() + latency_budget
+    if recorder is not None:
+        recorder.record(data, port.last_sequence, port.last_arrival)
+
+    with timers.stage("balls"):
+        changed = balls.update(data)
+    with timers.stage("shots"):
+        finished = shots.update(pockets, balls, changed, deadline)
+    if not finished:
+        # the best shots found so far are sent anyway
+        deadline_misses += 1
+    elif not shots.combinations_finished:
+        combination_cutoffs += 1
+
+    with timers.stage("select"):
+        ranked_shots = shots.ranked_shots
+    if ranked_shots and not headless:
+        with timers.stage("highlight"):
+            shots.highlight(ranked_shots[0])
+    with timers.stage("send"):
+        port.send_shots([shot.to_array() for shot in ranked_shots])
+
+    if not headless:
+        with timers.stage("render"):
+            PrimitiveRenderer.update_all_vertex_lists()
+    timers.maybe_dump()
 
 
-@event_loop.event
 def on_exit():
+    if deadline_misses:
+        print("Ran out of time on {} of {} frames, and sent the best shots "
+              "found so far".format(deadline_misses, port.metrics.handled))
+    if combination_cutoffs:
+        print("Combination search ran out of budget on {} of {} "
+              "frames".format(combination_cutoffs, port.metrics.handled))
     port.close()
     balls.delete()
     shots.delete()
+    pockets.delete()
+    if recorder is not None:
+        recorder.close()
+    if pool is not None:
+        pool.close()
+    timers.close()
+
+
+def run_headless():
+    """Solve frames as soon as they arrive, until interrupted."""
+    try:
+        while True:
+            if port.wait(poll_interval):
+                port.poll()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        on_exit()
 
 
 if __name__ == "__main__":
     port.open()
-    run()
+    if headless:
+        run_headless()
+    else:
+        from pyglet.app import run, event_loop
+        from pyglet.clock import schedule_interval
+
+        event_loop.push_handlers(on_exit)
+        # frames are solved on the main thread, newest first, between draws
+        schedule_interval(port.poll, poll_interval)
+        run()
@@ -0,0 +1,135 @@
+#!/usr/bin/env python
+"""
+Time the basic `Vector2D` and `Angle` operations against the classes they
+replaced, which stored vector components in a list behind properties and
+normalized every angle that arithmetic produced.
+
+Run `python microbench.py` and compare the speedup column.
+"""
+
+from __future__ import division, print_function
+
+from math import atan2, hypot, sin, cos, pi
+from timeit import Timer
+
+from angle import Angle
+from vector2d import Vector2D
+
+__author__ = "Zander Otavka"
+
+
+class _EagerAngle(float):
+    """The old `Angle`, which normalized the result of every operation."""
+
+    def __new__(cls, radians=None):
+        if radians is None:
+            radians = 0.0
+        if isinstance(radians, _EagerAngle):
+            return radians
+        radians %= 2 * pi
+        if radians < 0:
+            radians += 2 * pi
+        return super(_EagerAngle, cls).__new__(cls, radians)
+
+    def __invert__(self):
+        return float(self) - 2 * pi
+
+    def __abs__(self):
+        return min(self, -(~self))
+
+    def __add__(self, other):
+        return _EagerAngle(super(_EagerAngle, self).__add__(other))
+
+    def __sub__(self, other):
+        return _EagerAngle(super(_EagerAngle, self).__sub__(other))
+
+
+class _ListVector2D(object):
+    """The old `Vector2D`, with its components in a list."""
+
+    _components = None
+
+    def __init__(self, (x, y)=(0, 0)):
+        self._components = [x, y]
+
+    @classmethod
+    def from_polar(cls, magnitude, direction):
+        return cls((cos(direction) * magnitude, sin(direction) * magnitude))
+
+    @property
+    def x(self):
+        return self._components[0]
+
+    @property
+    def y(self):
+        return self._components[1]
+
+    @property
+    def magnitude(self):
+        return hypot(self.x, self.y)
+
+    @property
+    def direction(self):
+        return _EagerAngle(atan2(self.y, self.x))
+
+    def normalized(self):
+        return _ListVector2D.from_polar(1, self.direction)
+
+    def __add__(self, other):
+        return _ListVector2D((self.x + other.x, self.y + other.y))
+
+    def __sub__(self, other):
+        return _ListVector2D((self.x - other.x, self.y - other.y))
+
+
+# name, then a statement run against `v`, `w`, `a` and `b`
+OPERATIONS = [
+    ("construct", "V((3.0, 4.0))"),
+    ("read x and y", "v.x; v.y"),
+    ("add", "v + w"),
+    ("subtract", "v - w"),
+    ("magnitude", "v.magnitude"),
+    ("direction", "v.direction"),
+    ("normalized", "v.normalized()"),
+    ("angle difference", "abs(a - b)"),
+    ("angle chain", "abs(a - (b + 1.5707963267948966))"),
+    ("angle compare", "a - b > 1.5707963267948966"),
+]
+
+
+def _time(statement, namespace, number):
+    """
+    :return: best time per run, in nanoseconds
+    :rtype: float
+    """
+    timer = Timer(statement, setup="pass")
+    timer.inner.__globals__.update(namespace)
+    return min(timer.repeat(5, number)) / number * 1e9
+
+
+def run(number=100000):
+    """
+    :param number: runs of each operation per repeat
+    :type number: int
+    :return: name, old time, new time and speedup of each operation
+    :rtype: list[(str, float, float, float)]
+    """
+    old = {"V": _ListVector2D, "v": _ListVector2D((3.0, 4.0)),
+           "w": _ListVector2D((1.0, -2.0)), "a": _EagerAngle(1.0),
+           "b": _EagerAngle(6.0)}
+    new = {"V": Vector2D, "v": Vector2D((3.0, 4.0)),
+           "w": Vector2D((1.0, -2.0)), "a": Angle(1.0), "b": Angle(6.0)}
+    results = []
+    for name, statement in OPERATIONS:
+        old_time = _time(statement, old, number)
+        new_time = _time(statement, new, number)
+        results.append((name, old_time, new_time, old_time / new_time))
+    return results
+
+
+if __name__ == "__main__":
+    print("{:<18}{:>10}{:>10}{:>10}".format("operation", "old ns", "new ns",
+                                           "speedup"))
+    for name, old_time, new_time, speedup in run():
+        print("{:<18}{:>10.0f}{:>10.0f}{:>9.2f}x".format(
+            name, old_time, new_time, speedup))
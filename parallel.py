@@ -0,0 +1,191 @@
+"""Solves shot candidates across a pool of worker processes."""
+
+from __future__ import division, print_function
+
+from array import array
+from concurrent.futures import ProcessPoolExecutor, TimeoutError
+from multiprocessing import cpu_count
+from time import time
+
+from ball import BallGroup
+from core import SegmentSolution, ShotStatus, solve_shot
+from target import ShotTarget
+from vector2d import Vector2D
+
+__author__ = "Zander Otavka"
+
+
+def _unpack_vector(values, offset):
+    return Vector2D((values[offset], values[offset + 1]))
+
+
+def _unpack_target(values, offset):
+    return ShotTarget(_unpack_vector(values, offset),
+                      _unpack_vector(values, offset + 2),
+                      _unpack_vector(values, offset + 4))
+
+
+def _warm_up():
+    """Run a tiny solve so that worker start-up cost is paid in advance."""
+    _solve_shard(array("d", (100, 100, 200, 200)),
+                 array("d", (0, 40, 40, 0, -20, -20)), [(1, 0)])
+
+
+def _solve_shard(data, pocket_targets, candidates, exact=False):
+    """
+    Solve some candidates in a worker process.
+
+    :param data: x and y of each ball by number, like `BallGroup.update`
+                 takes, cue ball first
+    :type data: array
+    :param pocket_targets: point1, point2 and force of each pocket target,
+                           six values apiece
+    :type pocket_targets: array
+    :param candidates: target ball number and pocket index of each candidate
+    :type candidates: list[(int, int)]
+    :param exact: solve segments exactly; see `core.solve_segment`
+    :type exact: bool
+    :return: for each candidate, the numbers of the obstacles in each
+             segment's path, the segment's status, and its packed shot
+             vectors and target if it is possible
+    :rtype: list[list[(list[int], int, array)]]
+    """
+    balls = BallGroup()
+    balls.update(data)
+    cue = balls.pop(0)
+    balls_by_number = dict((ball.number, ball) for ball in balls)
+    targets = [_unpack_target(pocket_targets, i)
+               for i in range(0, len(pocket_targets), 6)]
+
+    results = []
+    for number, index in candidates:
+        solutions = solve_shot(targets[index],
+                               [balls_by_number[number], cue], balls,
+                               exact=exact)
+        segments = []
+        for obstacles, solution in solutions:
+            if solution.possible:
+                packed = array("d", list(solution.vector1) +
+                               list(solution.vector2) +
+                               list(solution.target.point1) +
+                               list(solution.target.point2) +
+                               list(solution.target.force))
+            else:
+                packed = None
+            segments.append(([ball.number for ball in obstacles],
+                             solution.status, packed))
+        results.append(segments)
+    return results
+
+
+class ShotPool(object):
+    """
+    Process pool that solves shot candidates for `ShotGroup.update`.  Workers
+    only ever see flat arrays of numbers, never `Ball`s from the parent
+    process.
+
+    :type _executor: ProcessPoolExecutor
+    :type _workers: int
+    """
+
+    DEFAULT_MIN_CANDIDATES = 16
+
+    _executor = None
+    _workers = None
+
+    min_candidates = None
+
+    def __init__(self, workers=None, min_candidates=None):
+        """
+        :param workers: number of worker processes, one per core by default
+        :type workers: int
+        :param min_candidates: fewest candidates worth sending to the pool;
+                               smaller updates are solved serially
+        :type min_candidates: int
+        """
+        if workers is None:
+            workers = cpu_count()
+        if min_candidates is None:
+            min_candidates = ShotPool.DEFAULT_MIN_CANDIDATES
+        self._workers = workers
+        self._executor = ProcessPoolExecutor(workers)
+        self.min_candidates = min_candidates
+
+    @property
+    def workers(self):
+        return self._workers
+
+    def warm_up(self):
+        """Start every worker and wait until they are ready."""
+        futures = [self._executor.submit(_warm_up)
+                   for _ in range(self._workers)]
+        for future in futures:
+            future.result()
+
+    def evaluate(self, model, cue, balls, candidates, deadline=None,
+                 exact=False):
+        """
+        Solve candidates in parallel.  Results come back in the same order
+        as `candidates`, so shots are built exactly as on the serial path.
+        Candidates are sharded in order, so the first ones come back first.
+
+        :type model: table.TableModel
+        :type cue: ball.Ball
+        :param balls: object balls
+        :type balls: ball.BallGroup
+        :param candidates: target ball and pocket index of each candidate
+        :type candidates: list[(ball.Ball, int)]
+        :param deadline: `time.time()` to stop waiting for workers at
+        :type deadline: float
+        :param exact: solve segments exactly; see `core.solve_segment`
+        :type exact: bool
+        :return: solutions to pass to `Shot`, for each candidate, or None for
+                 candidates whose shard did not finish before `deadline`
+        :rtype: list[list]
+        """
+        all_balls = [cue] + list(balls)
+        balls_by_number = dict((ball.number, ball) for ball in all_balls)
+        data = array("d", [0, 0] * (max(balls_by_number) + 1))
+        for ball in all_balls:
+            data[ball.number * 2:ball.number * 2 + 2] = array(
+                "d", ball.position)
+        pocket_targets = model.packed_targets()
+
+        keys = [(target_ball.number, index)
+                for target_ball, index in candidates]
+        shard_size = max(-(-len(keys) // self._workers), 1)
+        futures = [self._executor.submit(_solve_shard, data, pocket_targets,
+                                         keys[i:i + shard_size], exact)
+                   for i in range(0, len(keys), shard_size)]
+
+        solutions = []
+        for i, future in enumerate(futures):
+            timeout = None
+            if deadline is not None:
+                timeout = max(deadline - time(), 0)
+            try:
+                shard = future.result(timeout)
+            except TimeoutError:
+                for late in futures[i:]:
+                    late.cancel()
+                solutions.extend([None] * (len(keys) - len(solutions)))
+                break
+            for segments in shard:
+                shot_solutions = [None, None]
+                for segment_index, (obstacle_numbers, status,
+                                    packed) in enumerate(segments):
+                    obstacles = [balls_by_number[number]
+                                 for number in obstacle_numbers]
+                    if status == ShotStatus.POSSIBLE:
+                        solution = SegmentSolution(
+                            status, _unpack_vector(packed, 0),
+                            _unpack_vector(packed, 2),
+                            _unpack_target(packed, 4))
+                    else:
+                        solution = SegmentSolution(status)
+                    shot_solutions[segment_index] = obstacles, solution
+                solutions.append(shot_solutions)
+        return solutions
+
+    def close(self):
+        self._executor.shutdown()
@@ -2,7 +2,6 @@
 
 from __future__ import division, print_function
 
-from render import PocketRenderer
 from target import ShotTarget
 from vector2d import Vector2D
 
@@ -11,15 +10,19 @@ __author__ = "Zander Otavka"
 
 class Pocket(object):
     """
-    :type _renderer: PocketRenderer
+    :type _target: ShotTarget
+    :type _renderer: render.PocketRenderer
+    :type table: table.Table
     """
 
     _position = None
     _offset1 = None
     _offset2 = None
+    _target = None
     _renderer = None
 
     name = None
+    table = None
 
     def __init__(self, position, offset1, offset2, name=None):
         """
@@ -31,7 +34,6 @@ class Pocket(object):
         self._position = position
         self._offset1 = offset1
         self._offset2 = offset2
-        self._renderer = PocketRenderer(position, offset1, offset2)
         self.name = name
 
     @property
@@ -41,7 +43,9 @@ class Pocket(object):
     @position.setter
     def position(self, new):
         self._position = new
-        self._renderer.position = new
+        self._invalidate()
+        if self._renderer is not None:
+            self._renderer.position = new
 
     @property
     def offset1(self):
@@ -50,7 +54,9 @@ class Pocket(object):
     @offset1.setter
     def offset1(self, new):
         self._offset1 = new
-        self._renderer.offset1 = new
+        self._invalidate()
+        if self._renderer is not None:
+            self._renderer.offset1 = new
 
     @property
     def offset2(self):
@@ -59,17 +65,34 @@ class Pocket(object):
     @offset2.setter
     def offset2(self, new):
         self._offset2 = new
-        self._renderer.offset2 = new
+        self._invalidate()
+        if self._renderer is not None:
+            self._renderer.offset2 = new
 
     @property
     def target(self):
         """
         :rtype: ShotTarget
         """
-        p1 = self.position + self.offset1
-        p2 = self.position + self.offset2
-        offset_avg = Vector2D(self.offset1 + self.offset2) / 2
-        return ShotTarget(p1, p2, -offset_avg, name=self.name)
+        if self._target is None:
+            p1 = self.position + self.offset1
+            p2 = self.position + self.offset2
+            offset_avg = Vector2D(self.offset1 + self.offset2) / 2
+            self._target = ShotTarget(p1, p2, -offset_avg, name=self.name)
+        return self._target
+
+    def _invalidate(self):
+        self._target = None
+        if self.table is not None:
+            self.table.invalidate()
+
+    def show(self):
+        if self._renderer is None:
+            from render import PocketRenderer
+            self._renderer = PocketRenderer(self.position, self.offset1,
+                                            self.offset2)
 
     def delete(self):
-        self._renderer.delete()
+        if self._renderer is not None:
+            self._renderer.delete()
+            self._renderer = None
@@ -2,10 +2,16 @@
 
 from __future__ import division, print_function
 
+import numpy as np
 from serial import Serial
 from xbee import XBee
 from pyglet.event import EventDispatcher
 
+from ingest import LatestFrame
+from timing import timers
+from protocol import (BALL_COUNT, FrameError, pack_balls, pack_shots,
+                      unpack_balls, is_newer, is_restart)
+
 __author__ = "Zander Otavka"
 
 
@@ -13,8 +19,20 @@ class PortManager(EventDispatcher):
     """
     :type _serial_port: Serial
     :type _xbee: XBee
+    :type _positions: numpy.ndarray
+    :type _last_sequence: int
+    :type _last_arrival: float
+    :type _stale_run: int
+    :type _mailbox: LatestFrame
     """
 
+    # this many stale frames in a row means the sender restarted, even if
+    # its first frames after restarting were lost
+    RESYNC_AFTER = 3
+
+    # XBee broadcast address, until the robot has its own
+    ROBOT_ADDRESS = b"\xff\xff"
+
     FAKE_DATA = [
         200, 100,
         400, 285,
@@ -36,39 +54,153 @@ class PortManager(EventDispatcher):
 
     _serial_port = None
     _xbee = None
+    _positions = None
+    _last_sequence = None
+    _last_arrival = None
+    _stale_run = 0
+    _mailbox = None
 
-    def __init__(self, port):
+    def __init__(self, port, baudrate=9600, fake=True):
         """
         :type port: unicode
+        :type baudrate: int
+        :param fake: solve `FAKE_DATA` once instead of opening `port`
+        :type fake: bool
         """
-        # self._serial_port = Serial(port, 9600)
         print("open port: {}".format(port))
-        self._serial_port = Serial()
+        if fake:
+            self._serial_port = Serial()
+        else:
+            self._serial_port = Serial(port, baudrate)
+        self._positions = np.zeros(BALL_COUNT * 2)
+        self._mailbox = LatestFrame()
+
+    @property
+    def last_sequence(self):
+        """
+        Sequence number of the last frame dispatched.
+
+        :rtype: int
+        """
+        return self._last_sequence
+
+    @property
+    def last_arrival(self):
+        """
+        `time.time()` the last frame dispatched was read from the XBee.
+
+        :rtype: float
+        """
+        return self._last_arrival
+
+    @property
+    def metrics(self):
+        """
+        :rtype: ingest.IngestMetrics
+        """
+        return self._mailbox.metrics
 
     def send_data(self, data):
         """
-        :type data: tuple
+        :param data: a packed frame, see `protocol`
+        :type data: bytearray
+        """
+        if self._xbee is None:
+            print("send {} bytes: {!r}".format(len(data), bytes(data)))
+        else:
+            self._xbee.tx(dest_addr=PortManager.ROBOT_ADDRESS,
+                          data=bytes(data))
+
+    def send_shots(self, commands):
+        """
+        Send several shot commands, best first, in one transmission, so the
+        robot can fall back on the next one without waiting for another
+        solve.  The frame carries the sequence number of the ball frame
+        that the shots were solved for.
+
+        :type commands: list[tuple]
+        """
+        self.send_data(pack_shots(self._last_sequence or 0, commands))
+
+    def receive(self, frame):
+        """
+        Hold on to a ball frame until the next `poll`, replacing any frame
+        that has not been handled yet.  Safe to call from the XBee's reader
+        thread.
+
+        :type frame: str or bytearray or buffer
+        """
+        self._mailbox.put(frame)
+
+    def wait(self, timeout=None):
+        """
+        Block until a frame is ready to `poll`, or `timeout` seconds pass.
+
+        :type timeout: float
+        :rtype: bool
+        """
+        return self._mailbox.wait(timeout)
+
+    def poll(self, dt=None):
+        """
+        Parse the newest ball frame into the position buffer and dispatch
+        it, unless it is corrupt or older than the last frame.  If the sender
+        restarted its sequence numbers, they are followed from the new frame
+        on.  Meant to be scheduled on the main thread's clock.
+
+        :param dt: seconds since the last poll, from `pyglet.clock`
+        :type dt: float
+        :return: whether a frame was dispatched
+        :rtype: bool
         """
-        # TODO: implement PortManager.send_data
-        print("send data: {} to xbee: {}".format(data, self._xbee))
+        frame, arrival = self._mailbox.take()
+        if frame is None:
+            return False
+        metrics = self._mailbox.metrics
+        try:
+            with timers.stage("parse"):
+                sequence, positions = unpack_balls(frame, self._positions)
+        except FrameError as e:
+            metrics.corrupt += 1
+            print("dropped frame: {}".format(e))
+            return False
+        if (self._last_sequence is not None and
+                not is_newer(sequence, self._last_sequence)):
+            self._stale_run += 1
+            if (not is_restart(sequence, self._last_sequence) and
+                    self._stale_run < PortManager.RESYNC_AFTER):
+                metrics.stale += 1
+                return False
+            metrics.resynced += 1
+        self._stale_run = 0
+        self._last_sequence = sequence
+        self._last_arrival = arrival
+        metrics.handled += 1
+        self.dispatch_event("on_get_data", positions)
+        return True
 
     def open(self):
-        def on_get_data_callback(data):
-            # TODO: parse the data into an array
-            array = data
-            self.dispatch_event("on_get_data", array)
-        # self._xbee = XBee(self._serial_port, callback=on_get_data_callback)
-        on_get_data_callback(PortManager.FAKE_DATA)
+        def on_get_data_callback(packet):
+            self.receive(packet["rf_data"])
+        if self._serial_port.is_open:
+            self._xbee = XBee(self._serial_port,
+                              callback=on_get_data_callback)
+        else:
+            self.receive(pack_balls(0, PortManager.FAKE_DATA))
 
     def close(self):
         print("closing port {}".format(self._serial_port))
-        self._xbee.halt()
+        print(self.metrics)
+        if self._xbee is not None:
+            self._xbee.halt()
         self._serial_port.close()
 
     # noinspection PyMethodMayBeStatic
     def on_get_data(self, data):
         """
-        :type data: list[int]
+        :param data: x and y of each ball by number; the buffer is reused for
+                     the next frame
+        :type data: numpy.ndarray
         """
         pass
 
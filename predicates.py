@@ -0,0 +1,112 @@
+"""
+Trig-free geometric predicates.
+
+Everything here is built on cross and dot products of vector components, so
+there are no transcendental calls and no singularities for vertical lines.
+"""
+
+from __future__ import division, print_function
+
+from angle import Quadrant
+
+__author__ = "Zander Otavka"
+
+
+def sign(value):
+    """
+    :type value: int or float
+    :rtype: int
+    """
+    return (value > 0) - (value < 0)
+
+
+def cross(a, b):
+    """
+    z component of the cross product of `a` and `b`, which is positive if
+    `b` is counterclockwise from `a`.
+
+    :type a: vector2d.Vector2D
+    :type b: vector2d.Vector2D
+    :rtype: float
+    """
+    return a.x * b.y - a.y * b.x
+
+
+def dot(a, b):
+    """
+    :type a: vector2d.Vector2D
+    :type b: vector2d.Vector2D
+    :rtype: float
+    """
+    return a.x * b.x + a.y * b.y
+
+
+def orientation(a, b, c):
+    """
+    1 if `a`, `b`, `c` turn counterclockwise, -1 if clockwise and 0 if they
+    are collinear.
+
+    :type a: vector2d.Vector2D
+    :type b: vector2d.Vector2D
+    :type c: vector2d.Vector2D
+    :rtype: int
+    """
+    return sign((b.x - a.x) * (c.y - a.y) - (b.y - a.y) * (c.x - a.x))
+
+
+def quadrant(vector):
+    """
+    The quadrant `Angle.quadrant` gives for `vector.direction`, from the
+    signs of its components.
+
+    :type vector: vector2d.Vector2D
+    :rtype: int
+    """
+    x = vector.x
+    y = vector.y
+    if y > 0:
+        return Quadrant.SECOND if x >= 0 else Quadrant.THIRD
+    if y < 0:
+        return Quadrant.FOURTH if x <= 0 else Quadrant.FIRST
+    return Quadrant.THIRD if x < 0 else Quadrant.FIRST
+
+
+def compare_to_line(direction, offset):
+    """
+    Which side of the line along `direction` a point `offset` from the line
+    is on, as `cmp(offset.y, tan(direction) * offset.x)` would say.  The
+    line's slope sign is read from `direction` itself, so vertical lines are
+    not a special case.
+
+    :type direction: vector2d.Vector2D
+    :type offset: vector2d.Vector2D
+    :rtype: int
+    """
+    facing = sign(direction.x) or sign(direction.y)
+    return sign(direction.x * offset.y - direction.y * offset.x) * facing
+
+
+def in_corridor(point, position, point1, vector1, side1, point2, vector2,
+                side2, hemisphere=None):
+    """
+    Whether `point` is on side `side1` of the line through `point1` along
+    `vector1`, on side `side2` of the line through `point2` along
+    `vector2`, and, if `hemisphere` is given, in that hemisphere as seen
+    from `position`.  Sides are as `compare_to_line` gives them.
+
+    :type point: vector2d.Vector2D
+    :type position: vector2d.Vector2D
+    :type point1: vector2d.Vector2D
+    :type vector1: vector2d.Vector2D
+    :type side1: int
+    :type point2: vector2d.Vector2D
+    :type vector2: vector2d.Vector2D
+    :type side2: int
+    :type hemisphere: (int, int)
+    :rtype: bool
+    """
+    if compare_to_line(vector1, point - point1) != side1:
+        return False
+    if compare_to_line(vector2, point - point2) != side2:
+        return False
+    return hemisphere is None or quadrant(point - position) in hemisphere
@@ -0,0 +1,193 @@
+"""
+Binary frames sent over the XBee link.
+
+Every frame is little endian and starts with a two byte magic number and a
+sequence number, and ends with a 16-bit checksum, the sum of every 16-bit
+word before it.  Ball frames come from the camera with the x and y of each
+ball as unsigned 16-bit integers, zero for balls that are not on the table.
+Shot frames go to the robot with a count and then each shot command, and
+carry the sequence number of the ball frame they answer.
+"""
+
+from __future__ import division, print_function
+
+from math import pi
+from struct import Struct
+
+import numpy as np
+
+__author__ = "Zander Otavka"
+
+
+BALL_COUNT = 16
+
+BALL_MAGIC = b"PB"
+SHOT_MAGIC = b"PS"
+
+HEADER = Struct("<2sH")
+CHECKSUM = Struct("<H")
+POSITIONS = Struct("<{}H".format(BALL_COUNT * 2))
+SHOT_COUNT = Struct("<H")
+
+# angles are sent as a fraction of a whole turn and force as a float
+SHOT_COMMAND = Struct("<HfH")
+ANGLE_SCALE = 0x10000 / (2 * pi)
+
+BALL_FRAME_SIZE = HEADER.size + POSITIONS.size + CHECKSUM.size
+
+
+class FrameError(ValueError):
+    """A frame that is truncated, has the wrong magic or fails its checksum."""
+
+
+def checksum(buffer, size):
+    """
+    Sum of the first `size` bytes of `buffer`, as 16-bit words, modulo 2^16.
+
+    :type buffer: str or bytearray or buffer
+    :param size: an even number of bytes
+    :type size: int
+    :rtype: int
+    """
+    words = np.frombuffer(buffer, dtype="<u2", count=size // 2)
+    return int(words.sum(dtype=np.uint32)) & 0xFFFF
+
+
+def _check(buffer, magic, size):
+    """
+    :type buffer: str or bytearray or buffer
+    :type magic: bytes
+    :param size: size of the frame without its checksum
+    :type size: int
+    :return: the frame's sequence number
+    :rtype: int
+    """
+    if len(buffer) < size + CHECKSUM.size:
+        raise FrameError("frame is {} bytes, expected {}".format(
+            len(buffer), size + CHECKSUM.size))
+    frame_magic, sequence = HEADER.unpack_from(buffer)
+    if frame_magic != magic:
+        raise FrameError("bad magic {!r}".format(frame_magic))
+    expected, = CHECKSUM.unpack_from(buffer, size)
+    if checksum(buffer, size) != expected:
+        raise FrameError("bad checksum in frame {}".format(sequence))
+    return sequence
+
+
+def pack_balls(sequence, data):
+    """
+    :type sequence: int
+    :param data: x and y of each ball by number, like `BallGroup.update`
+                 takes
+    :type data: list[int]
+    :rtype: bytearray
+    """
+    frame = bytearray(BALL_FRAME_SIZE)
+    HEADER.pack_into(frame, 0, BALL_MAGIC, sequence & 0xFFFF)
+    POSITIONS.pack_into(frame, HEADER.size, *data)
+    size = HEADER.size + POSITIONS.size
+    CHECKSUM.pack_into(frame, size, checksum(frame, size))
+    return frame
+
+
+def unpack_balls(buffer, out=None):
+    """
+    Check a ball frame and read its positions straight out of `buffer`,
+    without copying them into Python objects first.
+
+    :type buffer: str or bytearray or buffer
+    :param out: array to write the positions into, as floats, e.g. the one
+                passed to `BallGroup.update` last frame
+    :type out: numpy.ndarray
+    :return: the frame's sequence number and positions
+    :rtype: (int, numpy.ndarray)
+    """
+    sequence = _check(buffer, BALL_MAGIC, HEADER.size + POSITIONS.size)
+    positions = np.frombuffer(buffer, dtype="<u2", count=BALL_COUNT * 2,
+                              offset=HEADER.size)
+    if out is None:
+        out = np.empty(BALL_COUNT * 2)
+    out[:] = positions
+    return sequence, out
+
+
+def _angle_to_word(radians):
+    """
+    :type radians: float
+    :rtype: int
+    """
+    return int(round(radians % (2 * pi) * ANGLE_SCALE)) & 0xFFFF
+
+
+def pack_shots(sequence, commands):
+    """
+    :type sequence: int
+    :param commands: angle, force and elevation of each shot, best first,
+                     as returned by `shot.Shot.to_array`
+    :type commands: list[tuple]
+    :rtype: bytearray
+    """
+    size = HEADER.size + SHOT_COUNT.size + SHOT_COMMAND.size * len(commands)
+    frame = bytearray(size + CHECKSUM.size)
+    HEADER.pack_into(frame, 0, SHOT_MAGIC, sequence & 0xFFFF)
+    SHOT_COUNT.pack_into(frame, HEADER.size, len(commands))
+    offset = HEADER.size + SHOT_COUNT.size
+    for angle, force, elevation in commands:
+        SHOT_COMMAND.pack_into(frame, offset, _angle_to_word(angle), force,
+                               _angle_to_word(elevation))
+        offset += SHOT_COMMAND.size
+    CHECKSUM.pack_into(frame, size, checksum(frame, size))
+    return frame
+
+
+def unpack_shots(buffer):
+    """
+    :type buffer: str or bytearray or buffer
+    :return: the frame's sequence number, and the angle, force and elevation
+             of each shot
+    :rtype: (int, list[(float, float, float)])
+    """
+    if len(buffer) < HEADER.size + SHOT_COUNT.size:
+        raise FrameError("frame is {} bytes, too short for a count".format(
+            len(buffer)))
+    count, = SHOT_COUNT.unpack_from(buffer, HEADER.size)
+    offset = HEADER.size + SHOT_COUNT.size
+    sequence = _check(buffer, SHOT_MAGIC,
+                      offset + SHOT_COMMAND.size * count)
+    commands = []
+    for _ in range(count):
+        angle, force, elevation = SHOT_COMMAND.unpack_from(buffer, offset)
+        commands.append((angle / ANGLE_SCALE, force,
+                         elevation / ANGLE_SCALE))
+        offset += SHOT_COMMAND.size
+    return sequence, commands
+
+
+# frames further behind the last one than this are taken to come from a
+# sender that restarted, not to be late
+RESTART_GAP = 256
+
+
+def is_restart(sequence, last):
+    """
+    Whether a frame that is not newer than `last` shows that the sender
+    restarted its sequence numbers, either from zero or from far enough
+    behind `last` that it cannot just be late.
+
+    :type sequence: int
+    :type last: int
+    :rtype: bool
+    """
+    return sequence == 0 or (last - sequence) & 0xFFFF > RESTART_GAP
+
+
+def is_newer(sequence, last):
+    """
+    Whether `sequence` comes after `last`, allowing for the 16-bit sequence
+    number wrapping around.
+
+    :type sequence: int
+    :type last: int
+    :rtype: bool
+    """
+    return 0 < (sequence - last) & 0xFFFF < 0x8000
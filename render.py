@@ -11,6 +11,7 @@ from pyglet.gl import GL_LINE_LOOP, GL_TRIANGLE_FAN, GL_QUADS
 from pyglet.text import Label
 
 from angle import Angle
+from predicates import cross
 from vector2d import Vector2D
 from target import ShotTarget
 
@@ -534,15 +535,13 @@ class PocketRenderer(PrimitiveRenderer):
         self._vertex_list = batch.add(4, self.mode, self._group, "v2f", "c3B")
 
     def update_vertex_list(self):
-        offset_angle = (self.offset2 - self.offset1).direction
-        p1_to_back = -self.offset1
-        p1_to_back.direction -= offset_angle
-        back_distance = p1_to_back.y
-        back_offset_vector = Vector2D.from_polar(back_distance,
-                                                 offset_angle + pi / 2)
+        # distances are measured square to the line between the jaws
+        jaw_line = (self.offset2 - self.offset1).normalized()
+        normal = Vector2D((-jaw_line.y, jaw_line.x))
+        back_distance = cross(jaw_line, -self.offset1)
+        back_offset_vector = normal * back_distance
         front_distance = -copysign(PocketRenderer.FRONT_DISTANCE, back_distance)
-        front_offset_vector = Vector2D.from_polar(front_distance,
-                                                  offset_angle + pi / 2)
+        front_offset_vector = normal * front_distance
         points = [self.offset1 + back_offset_vector + self.position,
                   self.offset2 + back_offset_vector + self.position,
                   self.offset2 + front_offset_vector + self.position,
@@ -563,6 +562,8 @@ class ShotSegmentRenderer(Renderer):
     _HIGHLIGHTED_GROUP = OrderedGroup(2)
 
     _renderer = None
+    _color = None
+    _highlighted = False
 
     def __init__(self, ball_number, position, target, vector1, vector2):
         """
@@ -572,13 +573,16 @@ class ShotSegmentRenderer(Renderer):
         :type vector1: Vector2D
         :type vector2: Vector2D
         """
-        color = BallRenderer.COLORS[ball_number]
+        self._color = BallRenderer.COLORS[ball_number]
         self._renderer = PolygonRenderer(
-            color, (position + vector1, target.point1,
-                    target.point2, position + vector2),
+            self._color, (position + vector1, target.point1,
+                          target.point2, position + vector2),
             GL_LINE_LOOP, ShotSegmentRenderer._SHOT_SEGMENT_GROUP)
 
     def highlight(self):
+        if self._highlighted:
+            return
+        self._highlighted = True
         self._renderer.color = ShotSegmentRenderer.HIGHLIGHT_COLOR
         self._renderer.set_group(ShotSegmentRenderer._HIGHLIGHTED_GROUP)
         # new_renderer = PolygonRenderer(
@@ -590,5 +594,12 @@ class ShotSegmentRenderer(Renderer):
         # self._renderer.delete()
         # self._renderer = new_renderer
 
+    def unhighlight(self):
+        if not self._highlighted:
+            return
+        self._highlighted = False
+        self._renderer.color = self._color
+        self._renderer.set_group(ShotSegmentRenderer._SHOT_SEGMENT_GROUP)
+
     def delete(self):
         self._renderer.delete()
@@ -5,6 +5,8 @@ from __future__ import division, print_function
 from random import randint, random
 from math import ceil
 
+import numpy as np
+
 from ball import Ball
 from pocket import Pocket
 from vector2d import Vector2D
@@ -38,3 +40,75 @@ def get_ball_positions(number, width, height, pockets, chance_of_death=.2,
                 else:
                     points.append(point)
     return sum((list(point) for point in points), list())
+
+
+def uniform(random_state, size, width, height):
+    """
+    Draw ball positions anywhere on the table, the default for
+    `generate_layouts`.
+
+    :type random_state: numpy.random.RandomState
+    :type size: int
+    :type width: int
+    :type height: int
+    :return: x and y of each position
+    :rtype: (numpy.ndarray, numpy.ndarray)
+    """
+    low = int(ceil(Ball.RADIUS))
+    return (random_state.randint(low, int(width - Ball.RADIUS) + 1, size),
+            random_state.randint(low, int(height - Ball.RADIUS) + 1, size))
+
+
+def generate_layouts(count, number, width, height, chance_of_death=.2,
+                     unkillable_balls=(0, 8), random_state=None, draw=None):
+    """
+    Many layouts at once, like `get_ball_positions` makes one at a time.
+    Each ball is placed in every layout together, and only the layouts where
+    it landed on an earlier ball draw it again.  Balls that are not on the
+    table are left at zero and never get in the way.
+
+    :type count: int
+    :type number: int
+    :type width: int
+    :type height: int
+    :type chance_of_death: float
+    :type unkillable_balls: tuple[int]
+    :type random_state: numpy.random.RandomState
+    :param draw: draws positions for balls, like `uniform`, which it is by
+                 default; positions must be on the table
+    :type draw: (numpy.random.RandomState, int, int, int) ->
+                (numpy.ndarray, numpy.ndarray)
+    :return: x and y of each ball by number, one layout per row
+    :rtype: numpy.ndarray
+    """
+    if random_state is None:
+        random_state = np.random.RandomState()
+    if draw is None:
+        draw = uniform
+    min_distance_squared = (Ball.RADIUS * 2) ** 2
+
+    x = np.zeros((count, number), dtype=np.int32)
+    y = np.zeros((count, number), dtype=np.int32)
+    for i in range(number):
+        if i in unkillable_balls:
+            pending = np.arange(count)
+        else:
+            pending = np.flatnonzero(
+                random_state.random_sample(count) >= chance_of_death)
+        while len(pending):
+            new_x, new_y = draw(random_state, len(pending), width, height)
+            placed_x = x[pending, :i]
+            placed_y = y[pending, :i]
+            dx = placed_x - new_x[:, np.newaxis]
+            dy = placed_y - new_y[:, np.newaxis]
+            overlaps = (((dx * dx + dy * dy) < min_distance_squared) &
+                        ((placed_x != 0) | (placed_y != 0))).any(axis=1)
+            accepted = pending[~overlaps]
+            x[accepted, i] = new_x[~overlaps]
+            y[accepted, i] = new_y[~overlaps]
+            pending = pending[overlaps]
+
+    layouts = np.empty((count, number * 2), dtype=np.uint16)
+    layouts[:, 0::2] = x
+    layouts[:, 1::2] = y
+    return layouts
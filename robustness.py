@@ -0,0 +1,196 @@
+"""
+Monte Carlo rating of how well shots tolerate execution noise.
+
+The robot never hits exactly the angle and force it is sent, so a shot's
+target window width is only a rough guide to how likely it is to go in.
+`RobustnessRater` samples perturbed cue angles and forces for every shot at
+once with NumPy, checking each sample against the cue ball segment's shot
+vectors, and stops sampling a shot as soon as its confidence interval shows
+whether it is among the best.
+"""
+
+from __future__ import division, print_function
+
+from math import pi
+from time import time
+
+import numpy as np
+
+__author__ = "Zander Otavka"
+
+
+def _wrap(radians):
+    """Wrap angles into [-pi, pi)."""
+    return np.mod(radians + pi, 2 * pi) - pi
+
+
+def _wilson_interval(successes, samples, z):
+    """
+    Vectorized Wilson score interval of a success probability.
+
+    :rtype: (numpy.ndarray, numpy.ndarray)
+    """
+    samples = np.maximum(samples, 1)
+    p = successes / samples
+    z2 = z * z
+    center = (p + z2 / (2 * samples)) / (1 + z2 / samples)
+    spread = (z / (1 + z2 / samples) *
+              np.sqrt(p * (1 - p) / samples + z2 / (4 * samples * samples)))
+    return center - spread, center + spread
+
+
+class RobustnessRater(object):
+    """
+    Rates shots by the fraction of noisy executions that still sink them.  A
+    sample succeeds if its angle lies between the cue ball segment's shot
+    vectors and its force is no more than `force_tolerance` short of the
+    force the shot needs.  Force noise is proportional to the force, so hard
+    shots are riskier than soft ones.
+
+    Sample counts are kept on each `Shot`, so shots that survive from one
+    update to the next keep refining the same estimate instead of starting
+    over.
+
+    :type _random: numpy.random.RandomState
+    """
+
+    DEFAULT_ANGLE_SIGMA = 0.01
+    DEFAULT_FORCE_SIGMA = 0.05
+    DEFAULT_FORCE_TOLERANCE = 20
+    DEFAULT_BATCH_SIZE = 256
+    DEFAULT_MAX_SAMPLES = 4096
+    DEFAULT_Z = 1.96
+
+    _random = None
+
+    angle_sigma = None
+    force_sigma = None
+    force_tolerance = None
+    batch_size = None
+    max_samples = None
+    z = None
+
+    def __init__(self, angle_sigma=None, force_sigma=None,
+                 force_tolerance=None, batch_size=None, max_samples=None,
+                 z=None, seed=None):
+        """
+        :param angle_sigma: standard deviation of the cue angle, in radians
+        :type angle_sigma: float
+        :param force_sigma: standard deviation of the force, as a fraction
+                            of the force
+        :type force_sigma: float
+        :param force_tolerance: how far short of the needed force a shot can
+                                be and still go in
+        :type force_tolerance: float
+        :param batch_size: samples per shot between confidence checks
+        :type batch_size: int
+        :param max_samples: most samples to ever take of one shot
+        :type max_samples: int
+        :param z: z-score of the confidence intervals
+        :type z: float
+        :param seed: seed for the random samples, for repeatable ratings
+        :type seed: int
+        """
+        if angle_sigma is None:
+            angle_sigma = RobustnessRater.DEFAULT_ANGLE_SIGMA
+        if force_sigma is None:
+            force_sigma = RobustnessRater.DEFAULT_FORCE_SIGMA
+        if force_tolerance is None:
+            force_tolerance = RobustnessRater.DEFAULT_FORCE_TOLERANCE
+        if batch_size is None:
+            batch_size = RobustnessRater.DEFAULT_BATCH_SIZE
+        if max_samples is None:
+            max_samples = RobustnessRater.DEFAULT_MAX_SAMPLES
+        if z is None:
+            z = RobustnessRater.DEFAULT_Z
+        self.angle_sigma = angle_sigma
+        self.force_sigma = force_sigma
+        self.force_tolerance = force_tolerance
+        self.batch_size = batch_size
+        self.max_samples = max_samples
+        self.z = z
+        self._random = np.random.RandomState(seed)
+
+    def reseed(self, seed):
+        """
+        Restart the random samples from `seed`, so that the next ratings
+        do not depend on what was rated before.
+
+        :type seed: int or list[int]
+        """
+        self._random.seed(seed)
+
+    def rate(self, shots, top_count=1, deadline=None):
+        """
+        Sample `shots` until the best `top_count` of them are separated from
+        the rest, every shot that might be among them has `max_samples`
+        samples, or `deadline` passes.  Every shot gets at least one batch.
+
+        :type shots: list[shot.Shot]
+        :type top_count: int
+        :param deadline: `time.time()` to stop sampling at
+        :type deadline: float
+        :return: estimated probability that each shot goes in
+        :rtype: numpy.ndarray
+        """
+        count = len(shots)
+        if count == 0:
+            return np.zeros(0)
+
+        # offsets of the cue ball segment's window from the aimed angle, and
+        # how much force noise each shot can take, all relative to the aim
+        aim = np.empty(count)
+        edge1 = np.empty(count)
+        edge2 = np.empty(count)
+        force = np.empty(count)
+        successes = np.empty(count)
+        samples = np.empty(count)
+        for i, shot in enumerate(shots):
+            segment = shot.segments[-1]
+            aim[i] = shot.angle
+            edge1[i] = segment.vector1.direction
+            edge2[i] = segment.vector2.direction
+            force[i] = shot.force_strength
+            successes[i] = shot.successes
+            samples[i] = shot.samples
+        edge1 = _wrap(edge1 - aim)
+        edge2 = _wrap(edge2 - aim)
+        low = np.minimum(edge1, edge2)
+        high = np.maximum(edge1, edge2)
+        shortfall = -self.force_tolerance / np.maximum(force, 1e-9)
+
+        top_count = min(max(top_count, 1), count - 1)
+        while True:
+            lower, upper = _wilson_interval(successes, samples, self.z)
+            order = np.argsort(-(successes / np.maximum(samples, 1)),
+                               kind="mergesort")
+
+            # a shot is settled once it is full, or once its interval shows
+            # which side of each of the top ranks it is on
+            contested = samples == 0
+            for rank in range(1, top_count + 1):
+                above = order[:rank]
+                below = order[rank:]
+                contested[above] |= lower[above] <= upper[below].max()
+                contested[below] |= upper[below] >= lower[above].min()
+            active = contested & (samples < self.max_samples)
+            indices = np.flatnonzero(active)
+            if len(indices) == 0:
+                break
+            if (deadline is not None and time() > deadline and
+                    samples.all()):
+                break
+
+            size = (len(indices), self.batch_size)
+            angles = self._random.normal(0, self.angle_sigma, size)
+            forces = self._random.normal(0, self.force_sigma, size)
+            hits = ((angles >= low[indices, None]) &
+                    (angles <= high[indices, None]) &
+                    (forces >= shortfall[indices, None]))
+            successes[indices] += hits.sum(axis=1)
+            samples[indices] += self.batch_size
+
+        for i, shot in enumerate(shots):
+            shot.successes = int(successes[i])
+            shot.samples = int(samples[i])
+        return successes / np.maximum(samples, 1)
@@ -2,134 +2,42 @@
 
 from __future__ import division, print_function
 
-from math import pi, tan, cos
+from heapq import heappush, heappushpop
+from math import pi
+from time import time
 
-from vector2d import Vector2D
-from angle import Hemisphere
 from ball import Ball, BallGroup
-from render import ShotSegmentRenderer
+from core import (ShotDependencies, SegmentCache, SegmentSolution, solve_shot,
+                  within_cut_angle, shot_promise)
+from solver import solve_candidates
+from table import TableModel
 from target import ShotTarget
-from pocket import Pocket
+from vector2d import Vector2D
 
 __author__ = "Zander Otavka"
 
 
-class ImpossibleShotError(Exception):
-    pass
-
-
 class ShotSegment(object):
     """
+    :type _actor_number: int
     :type _position: Vector2D
-    :type _vector1: Vector2D
-    :type _vector2: Vector2D
-    :type _target: ShotTarget
-    :type _renderer: ShotSegmentRenderer
+    :type _solution: SegmentSolution
+    :type _renderer: render.ShotSegmentRenderer
     """
 
+    _actor_number = None
     _position = None
-    _vector1 = None
-    _vector2 = None
-    _target = None
+    _solution = None
     _renderer = None
 
-    def __init__(self, target, actor_ball, balls):
+    def __init__(self, actor_ball, solution):
         """
-        :type target: ShotTarget
         :type actor_ball: Ball
-        :type balls: BallGroup
+        :type solution: SegmentSolution
         """
+        self._actor_number = actor_ball.number
         self._position = actor_ball.position
-
-        # get a pair of vectors pointing at the pocket
-        v1 = target.point1 - actor_ball.position
-        v2 = target.point2 - actor_ball.position
-
-        # find ball radius offsets
-        if (abs(v2.direction - (v1.direction + pi / 2)) <
-                abs(v2.direction - (v1.direction - pi / 2))):
-            sign = 1
-        else:
-            sign = -1
-        off1 = Vector2D.from_polar(Ball.RADIUS * 2,
-                                   v1.direction - sign * pi / 2)
-        off2 = Vector2D.from_polar(Ball.RADIUS * 2,
-                                   v2.direction + sign * pi / 2)
-
-        # derive a system of inequalities from the vectors and offsets
-        p1 = actor_ball.position + off1
-        p2 = actor_ball.position + off2
-        v1quad = v1.direction.quadrant
-        v2quad = v2.direction.quadrant
-        hem = None
-
-        def get_east_west_cmp():
-            if v1.normalized().y < v2.normalized().y:
-                return 1, -1
-            else:
-                return -1, 1
-        if v1quad in Hemisphere.EAST and v2quad in Hemisphere.EAST:
-            hem = Hemisphere.EAST
-            cmp1, cmp2 = get_east_west_cmp()
-        elif v1quad in Hemisphere.WEST and v2quad in Hemisphere.WEST:
-            hem = Hemisphere.WEST
-            cmp1, cmp2 = get_east_west_cmp()
-        elif (v1.direction - v2.direction > pi / 2 ==
-              v1quad in Hemisphere.WEST):
-            cmp1 = cmp2 = 1
-        else:
-            cmp1 = cmp2 = -1
-
-        def is_possible_collision(x, y):
-            in_correct_hemisphere = (
-                ((Vector2D((x, y)) - self.position).direction.quadrant in hem)
-                if hem is not None else True
-            )
-            return (cmp(y - p1.y, tan(v1.direction) * (x - p1.x)) == cmp1 and
-                    cmp(y - p2.y, tan(v2.direction) * (x - p2.x)) == cmp2 and
-                    in_correct_hemisphere)
-
-        # restrict shot angles based on obstacles
-        for other_ball in balls:
-            if is_possible_collision(*other_ball.position):
-                p1_to_ball = other_ball.position - p1
-                p2_to_ball = other_ball.position - p2
-                a1 = abs(p1_to_ball.direction - v1.direction)
-                a2 = abs(p2_to_ball.direction - v2.direction)
-                if min(a1, a2) > abs(v1.direction - v2.direction):
-                    raise ImpossibleShotError("Shot fully obstructed by balls.")
-                if a1 < a2:
-                    v1.direction = p1_to_ball.direction
-                else:
-                    v2.direction = p2_to_ball.direction
-                # assert not is_possible_collision(*other_ball.position)
-
-        # calculate necessary force to transfer to target, and sum with the
-        # length of the shot
-        v1_v2_avg = Vector2D(v1 + v2) / 2
-        force_offset_angle = abs(target.force.direction - v1_v2_avg.direction)
-        if force_offset_angle > pi / 2:
-            raise ImpossibleShotError("Positive force cannot be applied due to "
-                                      "shot angle.")
-        force_magnitude = (target.force.magnitude / cos(force_offset_angle) +
-                           v1_v2_avg.magnitude)
-
-        # calculate target from shot vectors and necessary force
-        target_p1 = self.position + Vector2D.from_polar(-Ball.RADIUS * 2,
-                                                        v1.direction)
-        target_p2 = self.position + Vector2D.from_polar(-Ball.RADIUS * 2,
-                                                        v2.direction)
-        target_force = Vector2D.from_polar(force_magnitude, v1_v2_avg.direction)
-        self._target = ShotTarget(target_p1, target_p2, target_force)
-
-        # save shot vectors
-        self._vector1 = v1
-        self._vector2 = v2
-
-        # create renderer
-        self._renderer = ShotSegmentRenderer(actor_ball.number,
-                                             self.position, self.target,
-                                             self.vector1, self.vector2)
+        self._solution = solution
 
     @property
     def position(self):
@@ -137,46 +45,97 @@ class ShotSegment(object):
 
     @property
     def vector1(self):
-        return self._vector1
+        return self._solution.vector1
 
     @property
     def vector2(self):
-        return self._vector2
+        return self._solution.vector2
 
     @property
     def target(self):
-        return self._target
+        return self._solution.target
+
+    def show(self):
+        if self._renderer is None:
+            from render import ShotSegmentRenderer
+            self._renderer = ShotSegmentRenderer(self._actor_number,
+                                                 self.position, self.target,
+                                                 self.vector1, self.vector2)
+
+    def hide(self):
+        if self._renderer is not None:
+            self._renderer.delete()
+            self._renderer = None
 
     def highlight(self):
+        self.show()
         self._renderer.highlight()
 
+    def unhighlight(self):
+        if self._renderer is not None:
+            self._renderer.unhighlight()
+
     def delete(self):
-        self._renderer.delete()
+        self.hide()
 
 
 class Shot(object):
     """
     :type _segments: list(ShotSegment)
+    :type successes: int
+    :type samples: int
     """
 
     _segments = None
-    _renderer = None
 
-    def __init__(self, target, target_ball, cue, balls):
+    # robustness samples taken so far, see `robustness.RobustnessRater`
+    successes = 0
+    samples = 0
+
+    def __init__(self, segments):
+        """
+        :param segments: segments from the ball that is sunk back to the cue
+        :type segments: list[ShotSegment]
+        """
+        self._segments = segments
+
+    @classmethod
+    def solve(cls, target, actor_balls, balls, dependencies=None,
+              segment_cache=None, solutions=None, bank=None, exact=False):
         """
+        Solve a shot, or return None if it is impossible.
+
         :type target: ShotTarget
-        :type target_ball: Ball
-        :type cue: Ball
+        :param actor_balls: the ball that is sunk, any balls that pass it on
+                            in a combination shot, and the cue ball
+        :type actor_balls: list[Ball]
+        :param balls: object balls
         :type balls: BallGroup
+        :type dependencies: ShotDependencies
+        :param segment_cache: cache for the target ball to pocket segment,
+                              which does not depend on the cue ball
+        :type segment_cache: SegmentCache
+        :param solutions: the solution for leading segments, if they were
+                          already solved elsewhere; see `core.solve_shot`
+        :type solutions: list
+        :param bank: the bank target that `target` is, for bank shots
+        :type bank: bank.BankTarget
+        :param exact: aim through the widest free window; see
+                      `core.solve_segment`
+        :type exact: bool
+        :rtype: Shot
         """
-        self._segments = []
-        try:
-            self._segments.append(ShotSegment(target, target_ball, balls))
-            self._segments.append(ShotSegment(self._segments[0].target, cue,
-                                              balls))
-        except ImpossibleShotError:
-            self.delete()
-            raise
+        results = solve_shot(target, actor_balls, balls, dependencies,
+                             segment_cache, solutions, bank, exact)
+        if len(results) < len(actor_balls) or not results[-1][1].possible:
+            return None
+        return cls([ShotSegment(actor_ball, solution)
+                    for actor_ball, (_, solution) in zip(actor_balls,
+                                                         results)])
+
+    @property
+    def segments(self):
+        return self._segments
 
     @property
     def angle(self):
@@ -190,6 +149,17 @@ class Shot(object):
     def force_strength(self):
         return self._segments[-1].target.force.magnitude
 
+    @property
+    def robustness(self):
+        """
+        Fraction of noisy samples that went in, or None if there are none.
+
+        :rtype: float
+        """
+        if self.samples == 0:
+            return None
+        return self.successes / self.samples
+
     @property
     def rating(self):
         """
@@ -199,14 +169,29 @@ class Shot(object):
         dist = (target.point1 - target.point2).magnitude
         return dist
 
+    def show(self):
+        for segment in self._segments:
+            segment.show()
+
+    def hide(self):
+        for segment in self._segments:
+            segment.hide()
+
     def highlight(self):
         for segment in self._segments:
             segment.highlight()
 
+    def unhighlight(self):
+        for segment in self._segments:
+            segment.unhighlight()
+
     def to_array(self):
         return self.angle, self.force_strength, self.elevation
 
     def delete(self):
+        # an update that was interrupted can leave deleted shots behind
+        if self._segments is None:
+            return
         for segment in self._segments:
             segment.delete()
         self._segments = None
@@ -216,9 +201,142 @@ class Shot(object):
 
 
 class ShotGroup(list):
+    """
+    :type _candidates: dict[(int, int), (ShotDependencies, Shot)]
+    :type _model: TableModel
+    :type _segment_cache: SegmentCache
+    :type _pool: parallel.ShotPool
+    :type _ranked: list[tuple]
+    :type _ranked_count: int
+    :type _highlighted: Shot
+    :type _combinations: list[Shot]
+    :type _finished: bool
+    :type _combinations_finished: bool
+    :type _rater: robustness.RobustnessRater
+    :type _banks: list[bank.BankTarget]
+    """
 
-    def __init__(self):
+    _candidates = None
+    _model = None
+    _segment_cache = None
+    _pool = None
+    _ranked = None
+    _ranked_count = None
+    _highlighted = None
+    _combinations = None
+    _finished = True
+    _combinations_finished = True
+    _rater = None
+    _banks = None
+
+    VECTORIZED_BATCH_SIZE = 64
+
+    max_segments = None
+    combination_budget = None
+    max_cut_angle = None
+    exact_windows = None
+    vectorized = None
+
+    def __init__(self, segment_cache=None, pool=None, ranked_count=1,
+                 max_segments=2, combination_budget=None, max_cut_angle=None,
+                 rater=None, banks=None, exact_windows=False,
+                 vectorized=None):
+        """
+        :type segment_cache: SegmentCache
+        :param pool: worker processes to solve candidates in parallel with,
+                     when there are enough of them to be worth it
+        :type pool: parallel.ShotPool
+        :param ranked_count: how many of the best shots to keep track of
+        :type ranked_count: int
+        :param max_segments: most segments in a shot; more than two allows
+                             combination shots through other object balls
+        :type max_segments: int
+        :param combination_budget: seconds per update to spend searching for
+                                   combination shots, or None for no limit
+        :type combination_budget: float
+        :param max_cut_angle: largest angle off a target's force direction
+                              that a combination shot may hit it at
+        :type max_cut_angle: float
+        :param rater: rates shots by robustness to execution noise instead of
+                      by target window width
+        :type rater: robustness.RobustnessRater
+        :param banks: bank targets to try as well as the pockets, from
+                      `bank.bank_targets`
+        :type banks: list[bank.BankTarget]
+        :param exact_windows: aim each segment through the widest window
+                              between its obstacles, instead of narrowing
+                              around them one at a time
+        :type exact_windows: bool
+        :param vectorized: solve direct and bank shots in batches with
+                           `solver.solve_candidates`, instead of one at a
+                           time; ignored with `exact_windows`, and on by
+                           default unless there is a `pool`
+        :type vectorized: bool
+        :raises ValueError: if both `pool` and `vectorized` are given
+        """
         super(ShotGroup, self).__init__()
+        self._candidates = {}
+        if segment_cache is None:
+            segment_cache = SegmentCache()
+        self._segment_cache = segment_cache
+        self._pool = pool
+        self._ranked = []
+        self._ranked_count = max(ranked_count, 1)
+        self._combinations = []
+        self.max_segments = max_segments
+        self.combination_budget = combination_budget
+        if max_cut_angle is None:
+            max_cut_angle = pi / 2
+        self.max_cut_angle = max_cut_angle
+        self._rater = rater
+        if banks is None:
+            banks = []
+        self._banks = banks
+        self.exact_windows = exact_windows
+        if vectorized is None:
+            vectorized = pool is None
+        if vectorized and pool is not None:
+            raise ValueError("cannot solve shots both vectorized and in a "
+                             "pool")
+        self.vectorized = vectorized
+
+    @property
+    def segment_cache(self):
+        return self._segment_cache
+
+    @property
+    def pool(self):
+        return self._pool
+
+    @property
+    def banks(self):
+        return self._banks
+
+    @property
+    def rater(self):
+        return self._rater
+
+    @property
+    def finished(self):
+        """
+        Whether the last update looked at every candidate before its
+        deadline.
+
+        :rtype: bool
+        """
+        return self._finished
+
+    @property
+    def combinations_finished(self):
+        """
+        Whether the last update's combination search looked at every chain
+        before `combination_budget` ran out.  Running out of budget does not
+        make the update unfinished, since every direct and bank shot was
+        still looked at.
+
+        :rtype: bool
+        """
+        return self._combinations_finished
 
     @property
     def best_shot(self):
@@ -226,28 +344,284 @@ class ShotGroup(list):
         :rtype: Shot
         """
         assert len(self) > 0
-        sorted_list = sorted(self, key=lambda s: s.rating)
-        return sorted_list[-1]
+        return max(self._ranked)[-1]
+
+    @property
+    def ranked_shots(self):
+        """
+        The best `ranked_count` shots from the last update, best first.  Ties
+        go to the later shot, like `best_shot`.
+
+        :rtype: list[Shot]
+        """
+        return [entry[-1] for entry in sorted(self._ranked, reverse=True)]
 
-    def update(self, pockets, balls):
+    def update(self, pockets, balls, changed=None, deadline=None):
         """
-        :type pockets: list[Pocket]
+        Find every possible shot.  If `changed` is given, shots from the last
+        update whose dependencies are untouched are kept instead of being
+        recomputed.
+
+        If `deadline` is given, the most promising candidates are solved
+        first, and the search stops when time runs out, keeping the shots
+        found so far.  Candidates that were not solved are picked up by the
+        next update.
+
+        There are no shots while the cue ball or every object ball is off
+        the table.
+
+        :type pockets: table.Table or list[pocket.Pocket]
         :type balls: BallGroup
+        :param changed: numbers of the balls that moved, appeared or
+                        disappeared since the last update, as returned by
+                        `BallGroup.update`
+        :type changed: set[int]
+        :param deadline: `time.time()` to stop searching at
+        :type deadline: float
+        :return: whether every candidate was looked at before `deadline`;
+                 a combination search cut short by `combination_budget`
+                 instead is reported by `combinations_finished`
+        :rtype: bool
         """
-        self.delete()
+        model = TableModel.of(pockets)
+        if len(balls) < 2 or balls[0].number != 0:
+            # there is nothing to shoot without the cue ball and an object
+            # ball
+            self.delete()
+            self._model = model
+            return True
+        if changed is None or model != self._model:
+            self.delete()
+            changes = None
+        else:
+            changes = dict.fromkeys(changed)
+            for ball in balls:
+                if ball.number in changes:
+                    changes[ball.number] = ball.position
+        self._model = model
+        for shot in self._combinations:
+            self._delete_shot(shot)
+        self._combinations = []
+
         balls = balls.copy()
         cue = balls.pop(0)
+
+        # candidates aim at each pocket, then at each bank target
+        targets = list(model.targets) + [bank.target for bank in self._banks]
+        banks = [None] * len(model) + self._banks
+
+        # keep the candidates that are still valid, and find the rest
+        keys = []
+        pending = []
         for target_ball in balls:
-            obstacle_balls = balls.copy()
-            obstacle_balls.remove(target_ball)
-            for pocket in pockets:
-                try:
-                    self.append(Shot(pocket.target, target_ball, cue,
-                                     obstacle_balls))
-                except ImpossibleShotError:
+            for index in range(len(targets)):
+                if (banks[index] is not None and
+                        not banks[index].reaches(target_ball.position)):
+                    continue
+                key = target_ball.number, index
+                keys.append(key)
+                previous = self._candidates.get(key)
+                if (previous is not None and
+                        not previous[0].is_affected_by(changes)):
                     continue
+                if previous is not None and previous[1] is not None:
+                    self._delete_shot(previous[1])
+                self._candidates.pop(key, None)
+                pending.append((target_ball, index))
+
+        # drop shots at balls that are no longer on the table
+        candidates = dict((key, self._candidates.pop(key)) for key in keys
+                          if key in self._candidates)
+        for _, shot in self._candidates.values():
+            if shot is not None:
+                self._delete_shot(shot)
+
+        if deadline is not None:
+            def promise((target_ball, index)):
+                if (index < len(model) and
+                        not model.in_cone(index, target_ball.position)):
+                    return 0
+                return shot_promise(targets[index], target_ball.position,
+                                    cue.position)
+            pending.sort(key=promise, reverse=True)
+
+        # the pool only knows about pockets, so bank shots are solved here
+        solutions = [None] * len(pending)
+        if self.vectorized and not self.exact_windows:
+            # solve in batches, so the deadline is still checked
+            size = max(len(pending), 1)
+            if deadline is not None:
+                size = ShotGroup.VECTORIZED_BATCH_SIZE
+            for start in range(0, len(pending), size):
+                if deadline is not None and time() > deadline:
+                    break
+                solutions[start:start + size] = solve_candidates(
+                    targets, banks, cue, balls, pending[start:start + size],
+                    self._segment_cache)
+        elif self._pool is not None:
+            direct = [i for i, (_, index) in enumerate(pending)
+                      if banks[index] is None]
+            if len(direct) >= self._pool.min_candidates:
+                results = self._pool.evaluate(model, cue, balls,
+                                              [pending[i] for i in direct],
+                                              deadline, self.exact_windows)
+                for i, shot_solutions in zip(direct, results):
+                    solutions[i] = shot_solutions
+
+        finished = True
+        for (target_ball, index), shot_solutions in zip(pending, solutions):
+            if (shot_solutions is None and deadline is not None and
+                    time() > deadline):
+                finished = False
+                continue
+            dependencies = ShotDependencies()
+            shot = Shot.solve(targets[index], [target_ball, cue], balls,
+                              dependencies, self._segment_cache,
+                              shot_solutions, banks[index],
+                              self.exact_windows)
+            candidates[target_ball.number, index] = dependencies, shot
+
+        self._candidates = candidates
+        self[:] = []
+        self._ranked = []
+        for key in keys:
+            if key in candidates and candidates[key][1] is not None:
+                self._add(candidates[key][1])
+
+        combinations_finished = finished
+        if finished and self.max_segments > 2:
+            combinations_finished = self._search_combinations(
+                model, balls, cue, deadline)
+            if (not combinations_finished and deadline is not None and
+                    time() > deadline):
+                finished = False
+
+        # robustness is sampled for all shots at once, so they can only be
+        # ranked once they are all found; window width breaks ties
+        if self._rater is not None:
+            self._ranked = []
+            robustness = self._rater.rate(self, self._ranked_count, deadline)
+            for index, shot in enumerate(self):
+                self._rank((robustness[index], shot.rating, index, shot))
+        self._finished = finished
+        self._combinations_finished = combinations_finished
+        return finished
+
+    def _add(self, shot):
+        """
+        Append `shot`, ranking it by window width unless there is a rater.
+
+        :type shot: Shot
+        """
+        if self._rater is None:
+            self._rank((shot.rating, len(self), shot))
+        self.append(shot)
+
+    def _rank(self, entry):
+        """
+        Keep the best shots in a bounded min-heap as they are found, so
+        ranking them never needs a full sort.
+
+        :param entry: sort key, ending with a unique index and the shot
+        :type entry: tuple
+        """
+        if len(self._ranked) < self._ranked_count:
+            heappush(self._ranked, entry)
+        else:
+            heappushpop(self._ranked, entry)
+
+    def _search_combinations(self, model, balls, cue, deadline=None):
+        """
+        Find combination shots, where the cue ball sinks a ball by way of
+        other object balls.  Chains are searched breadth first, so shorter
+        ones come first, and only grow through balls that can hit the last
+        ball in the chain within `max_cut_angle`.  Combination shots are
+        recomputed every update.
+
+        :type model: TableModel
+        :param balls: object balls
+        :type balls: BallGroup
+        :type cue: Ball
+        :param deadline: `time.time()` to stop searching at, if sooner than
+                         `combination_budget` from now
+        :type deadline: float
+        :return: whether the search finished within `combination_budget` and
+                 before `deadline`
+        :rtype: bool
+        """
+        if self.combination_budget is not None:
+            budget_end = time() + self.combination_budget
+            if deadline is None or budget_end < deadline:
+                deadline = budget_end
+
+        # chains of object balls from the one that is sunk, along with their
+        # solved segments; the first segments mostly come from the cache
+        frontier = []
+        for target_ball in balls:
+            for index, target in enumerate(model.targets):
+                if deadline is not None and time() > deadline:
+                    return False
+                results = solve_shot(target, [target_ball], balls,
+                                     cache=self._segment_cache,
+                                     exact=self.exact_windows)
+                if results[-1][1].possible:
+                    frontier.append((index, [target_ball], results))
+
+        for _ in range(self.max_segments - 2):
+            next_frontier = []
+            for index, chain, results in frontier:
+                target = results[-1][1].target
+                for ball in balls:
+                    if ball in chain or not within_cut_angle(
+                            ball.position, target, self.max_cut_angle):
+                        continue
+                    if deadline is not None and time() > deadline:
+                        return False
+                    extended_chain = chain + [ball]
+                    extended_results = solve_shot(
+                        model.targets[index], extended_chain, balls,
+                        solutions=results, exact=self.exact_windows)
+                    if not extended_results[-1][1].possible:
+                        continue
+                    next_frontier.append((index, extended_chain,
+                                          extended_results))
+                    shot = Shot.solve(model.targets[index],
+                                      extended_chain + [cue], balls,
+                                      solutions=extended_results,
+                                      exact=self.exact_windows)
+                    if shot is not None:
+                        self._combinations.append(shot)
+                        self._add(shot)
+            frontier = next_frontier
+        return True
+
+    def highlight(self, shot):
+        """
+        Display `shot` highlighted, and stop displaying the shot that was
+        highlighted before.  Only the highlighted shot has renderers.
+
+        :type shot: Shot
+        """
+        if self._highlighted is not shot and self._highlighted is not None:
+            self._highlighted.hide()
+        self._highlighted = shot
+        shot.highlight()
+
+    def _delete_shot(self, shot):
+        """
+        :type shot: Shot
+        """
+        if shot is self._highlighted:
+            self._highlighted = None
+        shot.delete()
 
     def delete(self):
         for shot in self:
             shot.delete()
         self[:] = []
+        self._candidates = {}
+        self._ranked = []
+        self._highlighted = None
+        self._combinations = []
+        self._finished = True
+        self._combinations_finished = True
@@ -0,0 +1,396 @@
+"""
+Vectorized shot solver.
+
+Evaluates many (target ball, pocket) candidates at once with NumPy, following
+the same geometry as `core.solve_segment`.  Obstacles are still visited one
+at a time in `BallGroup` order, because a segment narrows its shot vectors
+greedily and the result depends on that order, but each step updates
+all candidates together instead of running per-object `Vector2D` arithmetic.
+Bank candidates are solved the same way, against every ball's image on each
+reflected table the bank shot passes through.  `ShotGroup.update` solves
+direct and bank shots here, in batches so that its deadline is still
+checked, unless it aims through exact windows.  First segments already in
+the `SegmentCache` are looked up instead of solved again.
+"""
+
+from __future__ import division, print_function
+
+from math import pi
+
+import numpy as np
+
+from angle import Hemisphere
+from ball import Ball
+from bank import Mirror
+from core import SegmentSolution, ShotStatus
+from target import ShotTarget
+from vector2d import Vector2D, VectorArray
+
+__author__ = "Zander Otavka"
+
+
+_EAST = np.array(Hemisphere.EAST)
+_WEST = np.array(Hemisphere.WEST)
+
+
+def _direction(x, y):
+    """Vectorized `Vector2D.direction`."""
+    return VectorArray(x, y).direction
+
+
+_angle_abs = VectorArray.angle_abs
+_quadrant = VectorArray.quadrant_of
+
+
+def _compare_to_line(dx, dy, ox, oy):
+    """Vectorized `predicates.compare_to_line`."""
+    facing = np.where(dx != 0, np.sign(dx), np.sign(dy))
+    return np.sign(dx * oy - dy * ox) * facing
+
+
+def _distance_to_line_segment(px, py, ax, ay, bx, by):
+    """Vectorized `spatial._distance_to_line_segment`."""
+    dx = bx - ax
+    dy = by - ay
+    length_squared = dx * dx + dy * dy
+    with np.errstate(divide="ignore", invalid="ignore"):
+        t = np.where(length_squared == 0, 0,
+                     ((px - ax) * dx + (py - ay) * dy) / length_squared)
+    t = np.clip(t, 0, 1)
+    return np.hypot(px - (ax + t * dx), py - (ay + t * dy))
+
+
+def _distance_to_triangle(px, py, ax, ay, bx, by, cx, cy):
+    """Vectorized `spatial.distance_to_triangle`."""
+    d1 = (bx - ax) * (py - ay) - (by - ay) * (px - ax)
+    d2 = (cx - bx) * (py - by) - (cy - by) * (px - bx)
+    d3 = (ax - cx) * (py - cy) - (ay - cy) * (px - cx)
+    inside = (((d1 >= 0) & (d2 >= 0) & (d3 >= 0)) |
+              ((d1 <= 0) & (d2 <= 0) & (d3 <= 0)))
+    distance = np.minimum(
+        _distance_to_line_segment(px, py, ax, ay, bx, by),
+        np.minimum(_distance_to_line_segment(px, py, bx, by, cx, cy),
+                   _distance_to_line_segment(px, py, cx, cy, ax, ay)))
+    return np.where(inside, 0.0, distance)
+
+
+def balls_to_array(balls):
+    """
+    :type balls: list[Ball]
+    :rtype: numpy.ndarray
+    """
+    return VectorArray.from_points(
+        ball.position for ball in balls).to_array().reshape(-1, 2)
+
+
+def targets_to_array(targets):
+    """
+    Pack shot targets into rows of `point1.x, point1.y, point2.x, point2.y,
+    force.x, force.y`.
+
+    :type targets: list[target.ShotTarget]
+    :rtype: numpy.ndarray
+    """
+    return np.array([list(t.point1) + list(t.point2) + list(t.force)
+                     for t in targets], dtype=float).reshape(-1, 6)
+
+
+def obstacles_in_path(position, targets, obstacles, allowed):
+    """
+    Find the obstacles within two ball radii of each candidate's corridor,
+    the same ones `BallGroup.in_corridor` finds.
+
+    :param position: actor ball position per candidate, shape (C, 2)
+    :param targets: packed shot targets per candidate, shape (C, 6)
+    :param obstacles: obstacle ball positions, shape (M, 2)
+    :param allowed: which obstacles each candidate may be blocked by,
+                    shape (C, M)
+    :return: which obstacles are in each candidate's path, shape (C, M)
+    :rtype: numpy.ndarray
+    """
+    distance = _distance_to_triangle(
+        obstacles[:, 0], obstacles[:, 1],
+        position[:, 0, None], position[:, 1, None],
+        targets[:, 0, None], targets[:, 1, None],
+        targets[:, 2, None], targets[:, 3, None])
+    return allowed & (distance <= Ball.RADIUS * 2)
+
+
+def solve_segments(position, targets, obstacles, in_path, possible):
+    """
+    Solve one shot segment per candidate, the same way `core.solve_segment`
+    does.
+
+    :param position: actor ball position per candidate, shape (C, 2)
+    :param targets: packed shot targets per candidate, shape (C, 6)
+    :param obstacles: obstacle ball positions, shape (M, 2)
+    :param in_path: which obstacles are in each candidate's path, in the
+                    order they are narrowed around, from `obstacles_in_path`
+    :param possible: mask of candidates worth solving, shape (C,)
+    :return: the packed targets of the solved segments, their shot vectors
+             as `vector1.x, vector1.y, vector2.x, vector2.y` rows, and the
+             `ShotStatus` of each candidate; only candidates in `possible`
+             are meaningful
+    :rtype: (numpy.ndarray, numpy.ndarray, numpy.ndarray)
+    """
+    solving = possible.copy()
+    status = np.full(len(solving), ShotStatus.POSSIBLE, dtype=int)
+    px, py = position[:, 0], position[:, 1]
+
+    # get a pair of vectors pointing at the target
+    v1x, v1y = targets[:, 0] - px, targets[:, 1] - py
+    v2x, v2y = targets[:, 2] - px, targets[:, 3] - py
+    d1 = _direction(v1x, v1y)
+    d2 = _direction(v2x, v2y)
+
+    # find ball radius offsets
+    sign = np.where(_angle_abs(d2 - (d1 + pi / 2)) <
+                    _angle_abs(d2 - (d1 - pi / 2)), 1, -1)
+    p1x = px + np.cos(d1 - sign * pi / 2) * Ball.RADIUS * 2
+    p1y = py + np.sin(d1 - sign * pi / 2) * Ball.RADIUS * 2
+    p2x = px + np.cos(d2 + sign * pi / 2) * Ball.RADIUS * 2
+    p2y = py + np.sin(d2 + sign * pi / 2) * Ball.RADIUS * 2
+
+    # derive a system of inequalities from the vectors and offsets; the
+    # chained comparison that picks between the last two cases in
+    # `core._narrow_greedily` never holds, so those candidates always get
+    # -1, -1
+    q1 = _quadrant(d1)
+    q2 = _quadrant(d2)
+    east = np.in1d(q1, _EAST) & np.in1d(q2, _EAST)
+    west = np.in1d(q1, _WEST) & np.in1d(q2, _WEST) & ~east
+    east_west_cmp = np.where(np.sin(d1) < np.sin(d2), 1, -1)
+    cmp1 = np.where(east | west, east_west_cmp, -1)
+    cmp2 = np.where(east | west, -east_west_cmp, -1)
+
+    # restrict shot angles based on obstacles in the shot's path
+    for index in range(len(obstacles)):
+        active = in_path[:, index] & solving
+        if not active.any():
+            continue
+        bx, by = obstacles[index]
+        d1 = _direction(v1x, v1y)
+        d2 = _direction(v2x, v2y)
+
+        ball_quadrant = _quadrant(_direction(bx - px, by - py))
+        in_correct_hemisphere = np.where(
+            east, np.in1d(ball_quadrant, _EAST),
+            np.where(west, np.in1d(ball_quadrant, _WEST), True))
+        collision = (
+            active & in_correct_hemisphere &
+            (_compare_to_line(v1x, v1y, bx - p1x, by - p1y) == cmp1) &
+            (_compare_to_line(v2x, v2y, bx - p2x, by - p2y) == cmp2)
+        )
+        if not collision.any():
+            continue
+
+        b1 = _direction(bx - p1x, by - p1y)
+        b2 = _direction(bx - p2x, by - p2y)
+        a1 = _angle_abs(b1 - d1)
+        a2 = _angle_abs(b2 - d2)
+        obstructed = collision & (np.minimum(a1, a2) > _angle_abs(d1 - d2))
+        status[obstructed] = ShotStatus.OBSTRUCTED
+        solving &= ~obstructed
+        collision &= ~obstructed
+
+        narrow1 = collision & (a1 < a2)
+        narrow2 = collision & ~(a1 < a2)
+        m1 = np.hypot(v1x, v1y)
+        m2 = np.hypot(v2x, v2y)
+        v1x = np.where(narrow1, np.cos(b1) * m1, v1x)
+        v1y = np.where(narrow1, np.sin(b1) * m1, v1y)
+        v2x = np.where(narrow2, np.cos(b2) * m2, v2x)
+        v2y = np.where(narrow2, np.sin(b2) * m2, v2y)
+
+    # calculate necessary force to transfer to target, and sum with the
+    # length of the shot
+    d1 = _direction(v1x, v1y)
+    d2 = _direction(v2x, v2y)
+    avg_x = (v1x + v2x) / 2
+    avg_y = (v1y + v2y) / 2
+    avg_direction = _direction(avg_x, avg_y)
+    force_offset_angle = _angle_abs(
+        _direction(targets[:, 4], targets[:, 5]) - avg_direction)
+    status[solving & (force_offset_angle > pi / 2)] = \
+        ShotStatus.NO_POSITIVE_FORCE
+    with np.errstate(divide="ignore", invalid="ignore"):
+        force_magnitude = (np.hypot(targets[:, 4], targets[:, 5]) /
+                           np.cos(force_offset_angle) +
+                           np.hypot(avg_x, avg_y))
+
+    # calculate target from shot vectors and necessary force
+    segment_targets = np.column_stack((
+        px - np.cos(d1) * Ball.RADIUS * 2,
+        py - np.sin(d1) * Ball.RADIUS * 2,
+        px - np.cos(d2) * Ball.RADIUS * 2,
+        py - np.sin(d2) * Ball.RADIUS * 2,
+        np.cos(avg_direction) * force_magnitude,
+        np.sin(avg_direction) * force_magnitude,
+    ))
+    vectors = np.column_stack((v1x, v1y, v2x, v2y))
+    return segment_targets, vectors, status
+
+
+def _solution(status, vectors, target):
+    """
+    :type status: int
+    :param vectors: a row of shot vectors from `solve_segments`
+    :type vectors: list[float]
+    :param target: a row of packed targets from `solve_segments`
+    :type target: list[float]
+    :rtype: SegmentSolution
+    """
+    if status != ShotStatus.POSSIBLE:
+        return SegmentSolution(status)
+    return SegmentSolution(status, Vector2D(vectors[0:2]),
+                           Vector2D(vectors[2:4]),
+                           ShotTarget(Vector2D(target[0:2]),
+                                      Vector2D(target[2:4]),
+                                      Vector2D(target[4:6])))
+
+
+def _image_obstacles(balls, banks):
+    """
+    Reflect the object balls onto every table that any of `banks` passes
+    through.  The real table comes first, then tables one rail away, and so
+    on, so each bank's images stay in the order `BankTarget.obstacles`
+    visits them.
+
+    :type balls: list[Ball]
+    :type banks: list[bank.BankTarget]
+    :return: the image of each ball on each table, in table then group
+             order, and the index of each table per bank
+    :rtype: (list[Ball], list[list[int]])
+    """
+    mirrors = [Mirror()]
+    depths = [0]
+    for bank in banks:
+        for depth, mirror in enumerate(bank.images):
+            if mirror not in mirrors:
+                mirrors.append(mirror)
+                depths.append(depth)
+    order = sorted(range(len(mirrors)), key=lambda i: depths[i])
+    mirrors = [mirrors[i] for i in order]
+    images = [Ball(ball.number, mirror.apply(ball.position))
+              for mirror in mirrors for ball in balls]
+    tables = [[mirrors.index(mirror) for mirror in bank.images]
+              for bank in banks]
+    return images, tables
+
+
+def solve_candidates(targets, banks, cue, balls, candidates, cache=None):
+    """
+    Solve direct and bank shot candidates all at once.  Results are the same
+    as `core.solve_shot` gives for each candidate on its own, so shots are
+    built exactly as on the serial path.
+
+    :param targets: every pocket's target, then every bank target
+    :type targets: list[ShotTarget]
+    :param banks: the bank target each of `targets` is, or None for pockets
+    :type banks: list[bank.BankTarget]
+    :type cue: Ball
+    :param balls: object balls
+    :type balls: ball.BallGroup
+    :param candidates: target ball and index into `targets` of each
+                       candidate
+    :type candidates: list[(Ball, int)]
+    :param cache: cache for the first segment, like `core.solve_shot` uses;
+                  only candidates it misses are solved
+    :type cache: core.SegmentCache
+    :return: solutions to pass to `Shot.solve`, for each candidate, like
+             `parallel.ShotPool.evaluate` returns
+    :rtype: list[list]
+    """
+    if not candidates:
+        return []
+    object_balls = list(balls)
+    count = len(object_balls)
+    index_of = dict((ball.number, i) for i, ball in enumerate(object_balls))
+    ball_indices = np.array([index_of[target_ball.number]
+                             for target_ball, _ in candidates], dtype=int)
+    candidate_banks = []
+    for _, index in candidates:
+        if banks[index] is not None and banks[index] not in candidate_banks:
+            candidate_banks.append(banks[index])
+    images, tables = _image_obstacles(object_balls, candidate_banks)
+    positions = balls_to_array(images)
+
+    # which images of which balls can block each candidate's first segment,
+    # and which can block the cue ball on the real table
+    table_count = len(images) // count
+    on_table = np.zeros((len(candidates), table_count), dtype=bool)
+    for candidate, (_, index) in enumerate(candidates):
+        if banks[index] is None:
+            on_table[candidate, 0] = True
+        else:
+            on_table[candidate,
+                     tables[candidate_banks.index(banks[index])]] = True
+    ball_of = np.tile(np.arange(count), table_count)
+    table_of = np.repeat(np.arange(table_count), count)
+    others = ball_of[None, :] != ball_indices[:, None]
+    allowed1 = on_table[:, table_of] & others
+    allowed2 = (table_of == 0)[None, :] & others
+
+    # the target ball into the pocket, where the cache misses
+    position1 = balls_to_array(object_balls)[ball_indices]
+    targets1 = targets_to_array([targets[index] for _, index in candidates])
+    in_path1 = obstacles_in_path(position1, targets1, positions, allowed1)
+    first = []
+    misses = np.zeros(len(candidates), dtype=bool)
+    for candidate, (target_ball, index) in enumerate(candidates):
+        if banks[index] is None:
+            obstacles = [object_balls[i]
+                         for i in np.flatnonzero(in_path1[candidate])]
+        else:
+            obstacles = [images[i]
+                         for i in np.flatnonzero(in_path1[candidate])]
+        key = solution = None
+        if cache is not None:
+            key = cache.key(targets[index], target_ball.position, obstacles)
+            solution = cache.get(key)
+        misses[candidate] = solution is None
+        first.append((obstacles, solution, key))
+    solved_targets, solved_vectors, solved_status = solve_segments(
+        position1, targets1, positions, in_path1, misses)
+    solved_targets = solved_targets.tolist()
+    solved_vectors = solved_vectors.tolist()
+    solved_status = solved_status.tolist()
+
+    possible1 = np.zeros(len(candidates), dtype=bool)
+    targets2 = np.zeros((len(candidates), 6))
+    for candidate in range(len(candidates)):
+        obstacles, solution, key = first[candidate]
+        if solution is None:
+            solution = _solution(solved_status[candidate],
+                                 solved_vectors[candidate],
+                                 solved_targets[candidate])
+            if key is not None:
+                cache[key] = solution
+            if solution.possible:
+                targets2[candidate] = solved_targets[candidate]
+        elif solution.possible:
+            targets2[candidate] = targets_to_array([solution.target])[0]
+        first[candidate] = obstacles, solution
+        possible1[candidate] = solution.possible
+
+    # then the cue ball into the target ball wherever that is possible
+    cue_positions = np.tile(np.array(tuple(cue.position), dtype=float),
+                            (len(candidates), 1))
+    in_path2 = obstacles_in_path(cue_positions, targets2, positions,
+                                 allowed2 & possible1[:, None])
+    targets2, vectors2, status2 = solve_segments(
+        cue_positions, targets2, positions, in_path2, possible1)
+    targets2 = targets2.tolist()
+    vectors2 = vectors2.tolist()
+    status2 = status2.tolist()
+
+    solutions = []
+    for candidate in range(len(candidates)):
+        shot_solutions = [first[candidate], None]
+        if possible1[candidate]:
+            obstacles = [object_balls[i]
+                         for i in np.flatnonzero(in_path2[candidate])]
+            shot_solutions[1] = obstacles, _solution(
+                status2[candidate], vectors2[candidate], targets2[candidate])
+        solutions.append(shot_solutions)
+    return solutions
@@ -0,0 +1,185 @@
+"""Contains UniformGrid spatial index and corridor geometry helpers."""
+
+from __future__ import division, print_function
+
+from math import floor, hypot
+
+__author__ = "Zander Otavka"
+
+
+def _distance_to_line_segment(px, py, ax, ay, bx, by):
+    """
+    :rtype: float
+    """
+    dx = bx - ax
+    dy = by - ay
+    length_squared = dx * dx + dy * dy
+    if length_squared == 0:
+        return hypot(px - ax, py - ay)
+    t = ((px - ax) * dx + (py - ay) * dy) / length_squared
+    t = min(max(t, 0), 1)
+    return hypot(px - (ax + t * dx), py - (ay + t * dy))
+
+
+def distance_to_triangle(point, a, b, c):
+    """
+    Distance from `point` to the closest point in the triangle `a`, `b`, `c`,
+    which is zero if `point` is inside it.
+
+    :type point: vector2d.Vector2D
+    :type a: vector2d.Vector2D
+    :type b: vector2d.Vector2D
+    :type c: vector2d.Vector2D
+    :rtype: float
+    """
+    px, py = point
+    ax, ay = a
+    bx, by = b
+    cx, cy = c
+    d1 = (bx - ax) * (py - ay) - (by - ay) * (px - ax)
+    d2 = (cx - bx) * (py - by) - (cy - by) * (px - bx)
+    d3 = (ax - cx) * (py - cy) - (ay - cy) * (px - cx)
+    if (d1 >= 0 and d2 >= 0 and d3 >= 0) or (d1 <= 0 and d2 <= 0 and d3 <= 0):
+        return 0.0
+    return min(_distance_to_line_segment(px, py, ax, ay, bx, by),
+               _distance_to_line_segment(px, py, bx, by, cx, cy),
+               _distance_to_line_segment(px, py, cx, cy, ax, ay))
+
+
+class UniformGrid(object):
+    """
+    Buckets items by position into square cells, so that regions of the table
+    can be searched without looking at every item.
+
+    :type _cell_size: float
+    :type _cells: dict[(int, int), list]
+    :type _bounds: [int, int, int, int]
+    """
+
+    _cell_size = None
+    _cells = None
+    _bounds = None
+
+    def __init__(self, cell_size):
+        """
+        :type cell_size: int or float
+        """
+        self._cell_size = cell_size
+        self._cells = {}
+
+    @property
+    def cell_size(self):
+        return self._cell_size
+
+    def cell_of(self, position):
+        """
+        :type position: vector2d.Vector2D
+        :rtype: (int, int)
+        """
+        x, y = position
+        return (int(floor(x / self._cell_size)),
+                int(floor(y / self._cell_size)))
+
+    def insert(self, item, position):
+        """
+        :type position: vector2d.Vector2D
+        """
+        column, row = cell = self.cell_of(position)
+        self._cells.setdefault(cell, []).append(item)
+        if self._bounds is None:
+            self._bounds = [column, row, column, row]
+        else:
+            bounds = self._bounds
+            bounds[0] = min(bounds[0], column)
+            bounds[1] = min(bounds[1], row)
+            bounds[2] = max(bounds[2], column)
+            bounds[3] = max(bounds[3], row)
+
+    def clear(self):
+        self._cells.clear()
+        self._bounds = None
+
+    def corridor_cells(self, start, end1, end2, radius):
+        """
+        Find every cell that could hold a point within `radius` of the
+        triangle `start`, `end1`, `end2`, one row of cells at a time.  Cells
+        outside the ones that hold items are left out.
+
+        :type start: vector2d.Vector2D
+        :type end1: vector2d.Vector2D
+        :type end2: vector2d.Vector2D
+        :type radius: int or float
+        :rtype: list[(int, int)]
+        """
+        if self._bounds is None:
+            return []
+        min_column, min_row, max_column, max_row = self._bounds
+        size = self._cell_size
+        corners = (tuple(start), tuple(end1), tuple(end2))
+        edges = ((corners[0], corners[1]), (corners[1], corners[2]),
+                 (corners[2], corners[0]))
+        ys = [y for _, y in corners]
+        first_row = max(int(floor((min(ys) - radius) / size)), min_row)
+        last_row = min(int(floor((max(ys) + radius) / size)), max_row)
+
+        cells = []
+        for row in range(first_row, last_row + 1):
+            # anything within radius of this row of cells is within radius
+            # of the part of the triangle inside this band
+            band_bottom = row * size - radius
+            band_top = (row + 1) * size + radius
+            xs = []
+            for (ax, ay), (bx, by) in edges:
+                if ay == by:
+                    if band_bottom <= ay <= band_top:
+                        xs.append(ax)
+                        xs.append(bx)
+                    continue
+                t1 = (band_bottom - ay) / (by - ay)
+                t2 = (band_top - ay) / (by - ay)
+                low = max(min(t1, t2), 0)
+                high = min(max(t1, t2), 1)
+                if low <= high:
+                    xs.append(ax + low * (bx - ax))
+                    xs.append(ax + high * (bx - ax))
+            if not xs:
+                continue
+            first_column = max(int(floor((min(xs) - radius) / size)),
+                               min_column)
+            last_column = min(int(floor((max(xs) + radius) / size)),
+                              max_column)
+            for column in range(first_column, last_column + 1):
+                cells.append((column, row))
+        return cells
+
+    def items_in_cells(self, cells):
+        """
+        :type cells: collections.Iterable[(int, int)]
+        :rtype: list
+        """
+        items = []
+        for cell in cells:
+            items.extend(self._cells.get(cell, ()))
+        return items
+
+    def in_corridor(self, items, start, end1, end2, radius):
+        """
+        Filter `items`, which must all be in this grid, down to the ones
+        within `radius` of the triangle `start`, `end1`, `end2`, keeping
+        their order.  Items need a `position`.
+
+        :type items: list
+        :type start: vector2d.Vector2D
+        :type end1: vector2d.Vector2D
+        :type end2: vector2d.Vector2D
+        :type radius: int or float
+        :rtype: list
+        """
+        cells = self.corridor_cells(start, end1, end2, radius)
+        nearby = set(self.items_in_cells(cells))
+        return [item for item in items if item in nearby and
+                distance_to_triangle(item.position, start, end1,
+                                     end2) <= radius]
+
+    def __len__(self):
+        return sum(len(items) for items in self._cells.values())
@@ -0,0 +1,110 @@
+"""
+Exact free shooting windows, by an angular sweep around the actor ball.
+
+Every obstacle casts a shadow, the interval of directions in which the actor
+ball would hit it.  Sorting the shadows by where they start and merging the
+ones that overlap leaves the directions that are free, in one O(n log n)
+pass that does not depend on the order of the obstacles.
+"""
+
+from __future__ import division, print_function
+
+from math import asin, atan2, pi
+
+from angle import Angle
+from predicates import cross, dot, orientation
+
+__author__ = "Zander Otavka"
+
+
+def shadow(position, center, radius, start):
+    """
+    The directions from `position` in which a ball would pass within
+    `radius` of `center`, measured counterclockwise from `start`.  A ball
+    already within `radius` of `center` can still move away from it, so only
+    the half turn facing `center` is blocked.  The interval is centered
+    between -pi and pi, so it may reach past either of them.
+
+    :type position: vector2d.Vector2D
+    :type center: vector2d.Vector2D
+    :type radius: int or float
+    :param start: unit vector that angles are measured from
+    :type start: vector2d.Vector2D
+    :return: first and last blocked direction, or None if every direction is
+             blocked
+    :rtype: (float, float)
+    """
+    offset = center - position
+    distance = dot(offset, offset) ** 0.5
+    if distance == 0:
+        return None
+    middle = atan2(cross(start, offset), dot(start, offset))
+    if distance <= radius:
+        half_width = pi / 2
+    else:
+        half_width = asin(radius / distance)
+    return middle - half_width, middle + half_width
+
+
+def free_windows(position, point1, point2, obstacles, radius):
+    """
+    Every window of directions from `position` toward the segment between
+    `point1` and `point2` that misses all of `obstacles`.
+
+    :type position: vector2d.Vector2D
+    :type point1: vector2d.Vector2D
+    :type point2: vector2d.Vector2D
+    :param obstacles: centers of the balls in the way
+    :type obstacles: list[vector2d.Vector2D]
+    :param radius: closest a ball's center may pass to an obstacle's center
+    :type radius: int or float
+    :return: first and last direction of each window, counterclockwise, in
+             counterclockwise order
+    :rtype: list[(Angle, Angle)]
+    """
+    v1 = point1 - position
+    v2 = point2 - position
+    if orientation(position, point1, point2) < 0:
+        v1, v2 = v2, v1
+    start = v1.normalized()
+    end = v2.normalized()
+    width = atan2(cross(start, end), dot(start, end))
+
+    shadows = []
+    for center in obstacles:
+        interval = shadow(position, center, radius, start)
+        if interval is None:
+            return []
+
+        # a shadow reaching past half a turn wraps around to the other side
+        for turn in (-2 * pi, 0, 2 * pi):
+            blocked_from = interval[0] + turn
+            blocked_to = interval[1] + turn
+            if blocked_to > 0 and blocked_from < width:
+                shadows.append((blocked_from, blocked_to))
+    shadows.sort()
+
+    # sweep from the start of the target window, opening a window in every
+    # gap between merged shadows
+    windows = []
+    base = atan2(start.y, start.x)
+    free_from = 0.0
+    for blocked_from, blocked_to in shadows:
+        if blocked_from > free_from:
+            windows.append((Angle(base + free_from),
+                            Angle(base + blocked_from)))
+        free_from = max(free_from, blocked_to)
+        if free_from >= width:
+            break
+    if free_from < width:
+        windows.append((Angle(base + free_from), Angle(base + width)))
+    return windows
+
+
+def widest_window(windows):
+    """
+    :type windows: list[(Angle, Angle)]
+    :rtype: (Angle, Angle)
+    """
+    return max(windows,
+               key=lambda window: float(window[1] - window[0]) % (2 * pi))
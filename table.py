@@ -0,0 +1,296 @@
+"""Contains the Table of pockets and its compiled TableModel."""
+
+from __future__ import division, print_function
+
+from array import array
+from math import hypot, sqrt
+
+from pocket import Pocket
+from target import ShotTarget
+from vector2d import Vector2D
+
+__author__ = "Zander Otavka"
+
+
+class TableModel(object):
+    """
+    Everything the solver needs to know about the pockets, computed once and
+    stored in flat arrays, one fixed-size record per pocket in pocket order.
+    Models are never changed after they are built; a table builds a new one
+    when its pockets change.
+
+    :type _width: int or float
+    :type _height: int or float
+    :type _names: tuple[str]
+    :type _positions: array
+    :type _points: array
+    :type _forces: array
+    :type _cones: array
+    :type _targets: tuple[ShotTarget]
+    """
+
+    _width = None
+    _height = None
+    _names = None
+    _positions = None
+    _points = None
+    _forces = None
+    _cones = None
+    _targets = None
+
+    def __init__(self, width, height, pockets):
+        """
+        :type width: int or float
+        :type height: int or float
+        :type pockets: list[Pocket]
+        """
+        self._width = width
+        self._height = height
+        self._names = tuple(pocket.name for pocket in pockets)
+        self._positions = array("d")
+        self._points = array("d")
+        self._forces = array("d")
+        self._cones = array("d")
+        for pocket in pockets:
+            position = pocket.position
+            offset1 = pocket.offset1
+            offset2 = pocket.offset2
+            self._positions.extend((position.x, position.y))
+            self._points.extend((position.x + offset1.x,
+                                 position.y + offset1.y,
+                                 position.x + offset2.x,
+                                 position.y + offset2.y))
+            self._forces.extend((-(offset1.x + offset2.x) / 2,
+                                 -(offset1.y + offset2.y) / 2))
+
+            # balls can only come at the pocket from between its jaws
+            length1 = hypot(offset1.x, offset1.y)
+            length2 = hypot(offset2.x, offset2.y)
+            self._cones.extend((offset1.x / length1, offset1.y / length1,
+                                offset2.x / length2, offset2.y / length2))
+
+        self._targets = tuple(self._build_target(i)
+                              for i in range(len(self._names)))
+
+    def _build_target(self, index):
+        """
+        :type index: int
+        :rtype: ShotTarget
+        """
+        points = self._points[index * 4:index * 4 + 4]
+        forces = self._forces[index * 2:index * 2 + 2]
+        return ShotTarget(Vector2D((points[0], points[1])),
+                          Vector2D((points[2], points[3])),
+                          Vector2D((forces[0], forces[1])),
+                          name=self._names[index])
+
+    @property
+    def width(self):
+        return self._width
+
+    @property
+    def height(self):
+        return self._height
+
+    @property
+    def positions(self):
+        """
+        x and y of each pocket.
+
+        :rtype: array
+        """
+        return self._positions
+
+    @property
+    def points(self):
+        """
+        x and y of each pocket target's point1, then point2.
+
+        :rtype: array
+        """
+        return self._points
+
+    @property
+    def forces(self):
+        """
+        x and y of the force each pocket target needs.
+
+        :rtype: array
+        """
+        return self._forces
+
+    @property
+    def cones(self):
+        """
+        x and y of the unit vectors from each pocket along its jaws, which
+        bound the directions a ball can approach it from.
+
+        :rtype: array
+        """
+        return self._cones
+
+    @property
+    def targets(self):
+        """
+        :rtype: tuple[ShotTarget]
+        """
+        return self._targets
+
+    def packed_targets(self):
+        """
+        point1, point2 and force of each pocket target, six values apiece,
+        like `solver.targets_to_array` rows.
+
+        :rtype: array
+        """
+        packed = array("d")
+        for i in range(len(self)):
+            packed.extend(self._points[i * 4:i * 4 + 4])
+            packed.extend(self._forces[i * 2:i * 2 + 2])
+        return packed
+
+    def in_cone(self, index, position):
+        """
+        Whether `position` is between the jaws of pocket `index`, as seen
+        from the pocket.
+
+        :type index: int
+        :type position: Vector2D
+        :rtype: bool
+        """
+        px = self._positions[index * 2]
+        py = self._positions[index * 2 + 1]
+        e1x, e1y, e2x, e2y = self._cones[index * 4:index * 4 + 4]
+        dx = position.x - px
+        dy = position.y - py
+        span = e1x * e2y - e1y * e2x
+        cross1 = e1x * dy - e1y * dx
+        cross2 = dx * e2y - dy * e2x
+        if span > 0:
+            return cross1 >= 0 and cross2 >= 0
+        return cross1 <= 0 and cross2 <= 0
+
+    @classmethod
+    def of(cls, pockets):
+        """
+        The model of `pockets`, which is compiled only if it is not a
+        `Table` that already has one.
+
+        :type pockets: Table or list[Pocket]
+        :rtype: TableModel
+        """
+        if isinstance(pockets, Table):
+            return pockets.model
+        return cls(None, None, pockets)
+
+    def __len__(self):
+        return len(self._names)
+
+    def __eq__(self, other):
+        return (isinstance(other, TableModel) and
+                self._names == other._names and
+                self._positions == other._positions and
+                self._points == other._points and
+                self._forces == other._forces)
+
+    def __ne__(self, other):
+        return not self == other
+
+
+class Table(list):
+    """
+    The pockets of a table.  Pockets tell their table when they change, so
+    its model is rebuilt the next time it is needed.
+
+    :type _width: int or float
+    :type _height: int or float
+    :type _model: TableModel
+    """
+
+    _width = None
+    _height = None
+    _model = None
+
+    def __init__(self, width, height, pockets):
+        """
+        :type width: int or float
+        :type height: int or float
+        :type pockets: list[Pocket]
+        """
+        super(Table, self).__init__(pockets)
+        self._width = width
+        self._height = height
+        for pocket in self:
+            pocket.table = self
+
+    @classmethod
+    def standard(cls, width=1080, height=540, corner_pocket_opening=45,
+                 side_pocket_opening=50):
+        """
+        A table with four corner pockets and two side pockets.  Each pixel
+        is .1 inches.
+
+        :type width: int or float
+        :type height: int or float
+        :type corner_pocket_opening: int or float
+        :type side_pocket_opening: int or float
+        :rtype: Table
+        """
+        corner_pocket_offset = sqrt(corner_pocket_opening ** 2 / 2)
+        side_pocket_depth = sqrt(corner_pocket_offset ** 2 / 2)
+        return cls(width, height, [
+            Pocket(Vector2D((0, 0)),
+                   Vector2D((0, corner_pocket_offset)),
+                   Vector2D((corner_pocket_offset, 0)),
+                   name="Bottom Left"),
+
+            Pocket(Vector2D((width, 0)),
+                   Vector2D((-corner_pocket_offset, 0)),
+                   Vector2D((0, corner_pocket_offset)),
+                   name="Bottom Right"),
+
+            Pocket(Vector2D((width, height)),
+                   Vector2D((-corner_pocket_offset, 0)),
+                   Vector2D((0, -corner_pocket_offset)),
+                   name="Top Right"),
+
+            Pocket(Vector2D((0, height)),
+                   Vector2D((0, -corner_pocket_offset)),
+                   Vector2D((corner_pocket_offset, 0)),
+                   name="Top Left"),
+
+            Pocket(Vector2D((width / 2, -side_pocket_depth)),
+                   Vector2D((-side_pocket_opening / 2, side_pocket_depth)),
+                   Vector2D((side_pocket_opening / 2, side_pocket_depth)),
+                   name="Bottom Center"),
+
+            Pocket(Vector2D((width / 2, height + side_pocket_depth)),
+                   Vector2D((-side_pocket_opening / 2, -side_pocket_depth)),
+                   Vector2D((side_pocket_opening / 2, -side_pocket_depth)),
+                   name="Top Center"),
+        ])
+
+    @property
+    def width(self):
+        return self._width
+
+    @property
+    def height(self):
+        return self._height
+
+    @property
+    def model(self):
+        """
+        :rtype: TableModel
+        """
+        if self._model is None:
+            self._model = TableModel(self._width, self._height, self)
+        return self._model
+
+    def invalidate(self):
+        """Throw away the model, because a pocket changed."""
+        self._model = None
+
+    def delete(self):
+        for pocket in self:
+            pocket.delete()
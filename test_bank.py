@@ -0,0 +1,97 @@
+"""Checks bank targets against a simulated bounce off the cushions."""
+
+from __future__ import division, print_function
+
+import unittest
+
+import numpy as np
+
+from ball import Ball
+from bank import bank_targets
+from table import Table
+from vector2d import Vector2D
+
+__author__ = "Zander Otavka"
+
+
+def bounce(start, direction, width, height, bounces):
+    """
+    Roll a ball's center from `start` along `direction`, bouncing it one
+    radius short of each cushion.
+
+    :type start: (float, float)
+    :type direction: (float, float)
+    :type width: int or float
+    :type height: int or float
+    :type bounces: int
+    :return: the name of each cushion hit, and the ball's position and
+             direction after the last bounce
+    :rtype: (list[str], (float, float), (float, float))
+    """
+    walls = [(0, Ball.RADIUS, "Left"), (0, width - Ball.RADIUS, "Right"),
+             (1, Ball.RADIUS, "Bottom"), (1, height - Ball.RADIUS, "Top")]
+    position = list(start)
+    direction = list(direction)
+    hit = []
+    for _ in range(bounces):
+        times = []
+        for axis, value, name in walls:
+            if direction[axis] != 0:
+                t = (value - position[axis]) / direction[axis]
+                if t > 1e-9:
+                    times.append((t, axis, name))
+        t, axis, name = min(times)
+        position = [p + d * t for p, d in zip(position, direction)]
+        direction[axis] = -direction[axis]
+        hit.append(name)
+    return hit, tuple(position), tuple(direction)
+
+
+class BankTargetTest(unittest.TestCase):
+
+    def setUp(self):
+        self.table = Table.standard()
+        self.random_state = np.random.RandomState(0)
+
+    def check_banks(self, cushions):
+        width = self.table.width
+        height = self.table.height
+        banks = bank_targets(self.table, width, height, cushions)
+        checked = 0
+        for _ in range(200):
+            start = Vector2D((
+                self.random_state.uniform(Ball.RADIUS, width - Ball.RADIUS),
+                self.random_state.uniform(Ball.RADIUS, height - Ball.RADIUS)))
+            for bank in banks:
+                if not bank.reaches(start):
+                    continue
+                image = bank.target
+                aim = (image.point1 + image.point2) / 2
+                hit, position, direction = bounce(
+                    tuple(start), tuple(aim - start), width, height,
+                    len(bank.rails))
+                self.assertEqual(hit, [rail.name for rail in bank.rails])
+
+                # the unfolded line and the bounced ball end at the same
+                # spot in the pocket's mouth
+                pocket = self.table[bank.pocket_index].target
+                mouth = tuple((pocket.point1 + pocket.point2) / 2)
+                to_mouth = (mouth[0] - position[0], mouth[1] - position[1])
+                off_line = abs(to_mouth[0] * direction[1] -
+                               to_mouth[1] * direction[0]) / np.hypot(
+                                   *direction)
+                self.assertGreater(to_mouth[0] * direction[0] +
+                                   to_mouth[1] * direction[1], 0)
+                self.assertLess(off_line, 1e-6, bank.target.name)
+                checked += 1
+        self.assertGreater(checked, 0)
+
+    def test_one_cushion(self):
+        self.check_banks(1)
+
+    def test_two_cushions(self):
+        self.check_banks(2)
+
+
+if __name__ == "__main__":
+    unittest.main()
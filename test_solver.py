@@ -0,0 +1,177 @@
+"""Checks the vectorized solver against solving shots one at a time."""
+
+from __future__ import division, print_function
+
+import unittest
+
+import numpy as np
+
+from ball import Ball, BallGroup
+from bank import bank_targets
+from rng import generate_layouts
+from shot import ShotGroup
+from table import Table
+
+__author__ = "Zander Otavka"
+
+
+def describe(shots):
+    """
+    :type shots: ShotGroup
+    :return: the segments of every shot, rounded
+    :rtype: list[list[tuple]]
+    """
+    return [[tuple(segment.position) +
+             tuple(round(value, 6) for value in
+                   list(segment.target.point1) +
+                   list(segment.target.point2) +
+                   list(segment.target.force))
+             for segment in shot.segments] for shot in shots]
+
+
+def perturb(layouts, frames, width, height, random_state):
+    """
+    Follow each layout with frames where a few balls have moved a little,
+    like the camera sends while the table settles.
+
+    :type layouts: numpy.ndarray
+    :param frames: frames per layout, including the layout itself
+    :type frames: int
+    :type width: int
+    :type height: int
+    :type random_state: numpy.random.RandomState
+    :rtype: list[list[int]]
+    """
+    result = []
+    low = int(np.ceil(Ball.RADIUS))
+    for layout in layouts:
+        layout = layout.astype(int)
+        result.append(layout.tolist())
+        for _ in range(frames - 1):
+            layout = layout.copy()
+            positions = layout.reshape(-1, 2)
+            present = np.flatnonzero(positions.any(axis=1))
+            moved = random_state.choice(
+                present, min(len(present), random_state.randint(1, 4)),
+                replace=False)
+            positions[moved] += random_state.randint(-5, 6, (len(moved), 2))
+            positions[moved, 0] = np.clip(positions[moved, 0], low,
+                                          width - low)
+            positions[moved, 1] = np.clip(positions[moved, 1], low,
+                                          height - low)
+            result.append(layout.tolist())
+    return result
+
+
+class VectorizedSolverTest(unittest.TestCase):
+
+    def setUp(self):
+        self.table = Table.standard()
+        self.layouts = generate_layouts(
+            200, 16, self.table.width, self.table.height,
+            random_state=np.random.RandomState(0))
+        self.frames = perturb(self.layouts[:40], 5, self.table.width,
+                              self.table.height, np.random.RandomState(1))
+
+    def check_parity(self, incremental, cushions=0, count=None):
+        banks = bank_targets(self.table, self.table.width, self.table.height,
+                             cushions)
+        vectorized_balls = BallGroup()
+        serial_balls = BallGroup()
+        vectorized = ShotGroup(banks=banks, vectorized=True)
+        serial = ShotGroup(banks=banks, vectorized=False)
+        if incremental:
+            layouts = self.frames[:count]
+        else:
+            layouts = self.layouts[:count].tolist()
+        for layout in layouts:
+            changed = vectorized_balls.update(layout)
+            serial_balls.update(layout)
+            if not incremental:
+                changed = None
+            vectorized.update(self.table, vectorized_balls, changed)
+            serial.update(self.table, serial_balls, changed)
+            self.assertEqual(describe(vectorized), describe(serial))
+            if not incremental:
+                continue
+
+            # shots kept from earlier frames are the same as solving this
+            # one from scratch
+            fresh = ShotGroup(banks=banks, vectorized=False)
+            fresh.update(self.table, serial_balls)
+            self.assertEqual(describe(serial), describe(fresh))
+            if len(fresh) > 0:
+                self.assertEqual(describe([serial.best_shot]),
+                                 describe([fresh.best_shot]))
+                self.assertEqual(describe([vectorized.best_shot]),
+                                 describe([fresh.best_shot]))
+
+    def test_fresh_layouts(self):
+        self.check_parity(False)
+
+    def test_incremental_updates(self):
+        self.check_parity(True)
+
+    def test_one_cushion_banks(self):
+        self.check_parity(True, 1, 30)
+
+    def test_two_cushion_banks(self):
+        self.check_parity(True, 2, 10)
+
+    def test_segment_cache(self):
+        balls = BallGroup()
+        balls.update(self.layouts[0].tolist())
+        shots = ShotGroup(vectorized=True)
+        shots.update(self.table, balls)
+        first = describe(shots)
+        misses = shots.segment_cache.misses
+        self.assertEqual(shots.segment_cache.hits, 0)
+        self.assertGreater(misses, 0)
+
+        # solving the same layout from scratch finds every first segment
+        shots.update(self.table, balls)
+        self.assertEqual(describe(shots), first)
+        self.assertEqual(shots.segment_cache.hits, misses)
+        self.assertEqual(shots.segment_cache.misses, misses)
+
+
+class ExactWindowsTest(unittest.TestCase):
+
+    def setUp(self):
+        self.table = Table.standard()
+
+    def test_overlapping_obstacle(self):
+        # the third ball overlaps the cue ball from behind, which only
+        # blocks shots back towards it
+        balls = BallGroup()
+        balls.update([500, 270, 700, 270, 478, 270])
+        greedy = ShotGroup(vectorized=False)
+        exact = ShotGroup(exact_windows=True)
+        greedy.update(self.table, balls)
+        exact.update(self.table, balls)
+        self.assertGreater(len(greedy), 0)
+        self.assertGreaterEqual(len(exact), len(greedy))
+
+        balls.update([500, 270, 700, 270])
+        unobstructed = ShotGroup(exact_windows=True)
+        unobstructed.update(self.table, balls)
+        self.assertEqual(describe(exact), describe(unobstructed))
+
+class EmptyTableTest(unittest.TestCase):
+
+    def test_missing_balls(self):
+        table = Table.standard()
+        balls = BallGroup()
+        shots = ShotGroup()
+        for layout, has_shots in (([0, 0, 0, 0], False),
+                                  ([500, 270], False),
+                                  ([0, 0, 700, 270], False),
+                                  ([500, 270, 700, 270], True),
+                                  ([], False)):
+            changed = balls.update(layout)
+            self.assertTrue(shots.update(table, balls, changed))
+            self.assertEqual(len(shots) > 0, has_shots)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,156 @@
+"""Checks `VectorArray` against `Vector2D` and `Angle`, element by element."""
+
+from __future__ import division, print_function
+
+import unittest
+from math import pi
+
+import numpy as np
+
+from angle import Angle
+from vector2d import Vector2D, VectorArray
+
+__author__ = "Zander Otavka"
+
+
+class VectorArrayTest(unittest.TestCase):
+
+    def setUp(self):
+        self.random_state = np.random.RandomState(0)
+
+        # random vectors, then every axis and diagonal direction, then
+        # vectors a hair either side of each axis
+        x = self.random_state.uniform(-500, 500, 50).tolist()
+        y = self.random_state.uniform(-500, 500, 50).tolist()
+        for dx, dy in ((1, 0), (1, 1), (0, 1), (-1, 1), (-1, 0), (-1, -1),
+                       (0, -1), (1, -1), (-1, -0.0), (0, 0)):
+            x.append(dx * 7.0)
+            y.append(dy * 7.0)
+        for dx, dy in ((1, 0), (0, 1), (-1, 0), (0, -1)):
+            for offset in (-1e-9, 1e-9):
+                x.append(dx * 7.0 - dy * offset)
+                y.append(dy * 7.0 + dx * offset)
+        self.x = x
+        self.y = y
+        self.vectors = [Vector2D((vx, vy)) for vx, vy in zip(x, y)]
+        self.array = VectorArray(x, y)
+
+    def assertVectorsEqual(self, array, vectors):
+        self.assertEqual(len(array), len(vectors))
+        for actual, expected in zip(array, vectors):
+            self.assertAlmostEqual(actual.x, expected.x)
+            self.assertAlmostEqual(actual.y, expected.y)
+
+    def test_from_polar(self):
+        magnitude = self.random_state.uniform(-10, 100, 100)
+        direction = self.random_state.uniform(-4 * pi, 4 * pi, 100)
+        self.assertVectorsEqual(
+            VectorArray.from_polar(magnitude, direction),
+            [Vector2D.from_polar(m, d)
+             for m, d in zip(magnitude.tolist(), direction.tolist())])
+
+        # a scalar magnitude is broadcast over every direction
+        self.assertVectorsEqual(
+            VectorArray.from_polar(5, direction),
+            [Vector2D.from_polar(5, d) for d in direction.tolist()])
+
+    def test_from_flat(self):
+        flat = [value for vector in self.vectors for value in vector]
+        array = VectorArray.from_flat(flat)
+        self.assertVectorsEqual(array, self.vectors)
+        self.assertEqual(array.to_flat().tolist(), flat)
+        self.assertEqual(array.to_array().tolist(),
+                         [[v.x, v.y] for v in self.vectors])
+
+    def test_from_points(self):
+        self.assertVectorsEqual(VectorArray.from_points(self.vectors),
+                                self.vectors)
+        self.assertEqual(len(VectorArray.from_points([])), 0)
+
+    def test_magnitude(self):
+        for actual, vector in zip(self.array.magnitude.tolist(),
+                                  self.vectors):
+            self.assertAlmostEqual(actual, vector.magnitude)
+
+    def test_direction(self):
+        directions = self.array.direction
+        self.assertTrue(((directions >= 0) & (directions < 2 * pi)).all())
+        for actual, vector in zip(directions.tolist(), self.vectors):
+            self.assertAlmostEqual(actual, float(vector.direction),
+                                   msg=repr(vector))
+
+    def test_normalized(self):
+        self.assertVectorsEqual(self.array.normalized(),
+                                [v.normalized() for v in self.vectors])
+
+    def test_quadrant_of(self):
+        # every axis, exactly and a hair either side of it
+        radians = []
+        for axis in range(5):
+            for offset in (-1e-9, 0, 1e-9):
+                radians.append(axis * pi / 2 + offset)
+        radians = [float(Angle(r)) for r in radians]
+        quadrants = VectorArray.quadrant_of(np.array(radians)).tolist()
+        self.assertEqual(quadrants, [Angle(r).quadrant for r in radians])
+
+    def test_quadrant(self):
+        self.assertEqual(self.array.quadrant.tolist(),
+                         [v.direction.quadrant for v in self.vectors])
+
+    def test_angle_abs(self):
+        # pairs of directions either side of the wrap at pi and at 0
+        first = []
+        second = []
+        for a, b in ((pi - 0.1, -pi + 0.1), (-pi + 0.1, pi - 0.1),
+                     (0.1, 2 * pi - 0.1), (2 * pi - 0.1, 0.1),
+                     (pi, -pi), (0, pi), (3, -3), (-3, 3)):
+            first.append(a)
+            second.append(b)
+        first.extend(self.random_state.uniform(-4 * pi, 4 * pi, 50))
+        second.extend(self.random_state.uniform(-4 * pi, 4 * pi, 50))
+        first = np.array(first)
+        second = np.array(second)
+        actual = VectorArray.angle_abs(first - second)
+        self.assertTrue(((actual >= 0) & (actual <= pi)).all())
+        for value, a, b in zip(actual.tolist(), first.tolist(),
+                               second.tolist()):
+            self.assertAlmostEqual(value, abs(Angle(a) - Angle(b)))
+
+    def test_nonzero(self):
+        self.assertEqual(self.array.nonzero().tolist(),
+                         [bool(v) for v in self.vectors])
+        self.assertEqual(VectorArray([0, 0.0, -0.0, 1],
+                                     [0, 2, 0, 0]).nonzero().tolist(),
+                         [False, True, False, True])
+
+    def test_indexing(self):
+        for index in (0, 3, -1, len(self.vectors) - 1, np.int64(5)):
+            vector = self.array[index]
+            self.assertIsInstance(vector, Vector2D)
+            self.assertEqual(vector, self.vectors[index])
+
+        self.assertVectorsEqual(self.array[2:10], self.vectors[2:10])
+        self.assertVectorsEqual(self.array[::-3], self.vectors[::-3])
+        mask = self.array.nonzero() & (self.array.x > 0)
+        self.assertVectorsEqual(
+            self.array[mask],
+            [v for v in self.vectors if v and v.x > 0])
+        self.assertVectorsEqual(
+            self.array[np.array([4, 1, 4])],
+            [self.vectors[4], self.vectors[1], self.vectors[4]])
+
+    def test_arithmetic(self):
+        other = VectorArray(self.y, self.x)
+        others = list(other)
+        self.assertVectorsEqual(self.array + other,
+                                [a + b for a, b in zip(self.vectors, others)])
+        self.assertVectorsEqual(self.array - other,
+                                [a - b for a, b in zip(self.vectors, others)])
+        self.assertVectorsEqual(self.array * 3, [v * 3 for v in self.vectors])
+        self.assertVectorsEqual(3 * self.array, [3 * v for v in self.vectors])
+        self.assertVectorsEqual(self.array / 4, [v / 4 for v in self.vectors])
+        self.assertVectorsEqual(-self.array, [-v for v in self.vectors])
+
+
+if __name__ == "__main__":
+    unittest.main()
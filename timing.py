@@ -0,0 +1,258 @@
+"""
+Named stage timers for the frame pipeline.
+
+Each stage keeps a rolling window of its latest durations, and the stats of
+every stage, along with any counters that are watched, can be dumped now and
+then to a JSON file or a local UDP socket.
+Timing can be switched on and off at any time; while it is off, timing a
+stage costs one attribute check.
+"""
+
+from __future__ import division, print_function
+
+import json
+import os
+import socket
+from array import array
+from time import time
+
+import numpy as np
+
+__author__ = "Zander Otavka"
+
+
+class RollingHistogram(object):
+    """
+    The latest `size` samples, in a ring buffer.
+
+    :type _samples: array
+    :type _next: int
+    :type _total: int
+    """
+
+    # upper edge of each histogram bucket, in milliseconds
+    BUCKETS = (0.1, 0.5, 1, 2, 5, 10, 20, 50, 100, 200, 500)
+
+    _samples = None
+    _next = None
+    _total = None
+
+    def __init__(self, size=1024):
+        """
+        :type size: int
+        """
+        self._samples = array("d", [0.0] * size)
+        self._next = 0
+        self._total = 0
+
+    def add(self, seconds):
+        """
+        :type seconds: float
+        """
+        self._samples[self._next] = seconds
+        self._next = (self._next + 1) % len(self._samples)
+        self._total += 1
+
+    def __len__(self):
+        return min(self._total, len(self._samples))
+
+    def stats(self):
+        """
+        :return: count, mean, percentiles and maximum in milliseconds, and
+                 the count in each bucket of the window
+        :rtype: dict
+        """
+        window = np.frombuffer(self._samples, dtype=float)[:len(self)] * 1000
+        if not len(window):
+            return {"count": self._total}
+        p50, p95, p99 = np.percentile(window, [50, 95, 99])
+        counts = np.histogram(window, (0,) + self.BUCKETS + (np.inf,))[0]
+        return {"count": self._total, "mean_ms": float(window.mean()),
+                "p50_ms": float(p50), "p95_ms": float(p95),
+                "p99_ms": float(p99), "max_ms": float(window.max()),
+                "histogram_ms": dict(
+                    ("<{}".format(edge), int(count)) for edge, count in
+                    zip(self.BUCKETS + ("inf",), counts))}
+
+
+class _Stage(object):
+    """
+    Times one run of a stage, as a context manager.
+
+    :type _timers: StageTimers
+    :type _name: str
+    :type _start: float
+    """
+
+    __slots__ = ("_timers", "_name", "_start")
+
+    def __init__(self, timers, name):
+        self._timers = timers
+        self._name = name
+        self._start = None
+
+    def __enter__(self):
+        self._start = time()
+        return self
+
+    def __exit__(self, *exc_info):
+        self._timers.record(self._name, time() - self._start)
+        return False
+
+
+class _NullStage(object):
+    """Stands in for `_Stage` while timing is off."""
+
+    __slots__ = ()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        return False
+
+
+_NULL_STAGE = _NullStage()
+
+
+class StageTimers(object):
+    """
+    :type enabled: bool
+    :type _histograms: dict[str, RollingHistogram]
+    :type _counters: dict[str, () -> dict]
+    :type _window: int
+    :type _interval: float
+    :type _path: str
+    :type _address: (str, int)
+    :type _socket: socket.socket
+    :type _last_dump: float
+    """
+
+    enabled = False
+
+    _histograms = None
+    _counters = None
+    _window = None
+    _interval = None
+    _path = None
+    _address = None
+    _socket = None
+    _last_dump = None
+
+    def __init__(self, window=1024):
+        """
+        :param window: how many of the latest runs of each stage to keep
+        :type window: int
+        """
+        self._histograms = {}
+        self._counters = {}
+        self._window = window
+        self._last_dump = time()
+
+    def configure(self, enabled=True, window=None, interval=None, path=None,
+                  address=None):
+        """
+        :type enabled: bool
+        :param window: how many of the latest runs of each stage to keep
+        :type window: int
+        :param interval: seconds between dumps, or None to never dump
+        :type interval: float
+        :param path: JSON file to dump stats to
+        :type path: str
+        :param address: host and port to send stats to over UDP
+        :type address: (str, int)
+        """
+        self.enabled = enabled
+        if window is not None and window != self._window:
+            self._window = window
+            self._histograms = {}
+        self._interval = interval
+        self._path = path
+        self._address = address
+        if address is not None and self._socket is None:
+            self._socket = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+
+    def toggle(self, *args):
+        """Switch timing on or off; can be installed as a signal handler."""
+        self.enabled = not self.enabled
+
+    def stage(self, name):
+        """
+        Time a stage, as `with timers.stage("solve"):`.
+
+        :type name: str
+        """
+        if not self.enabled:
+            return _NULL_STAGE
+        return _Stage(self, name)
+
+    def record(self, name, seconds):
+        """
+        :type name: str
+        :type seconds: float
+        """
+        histogram = self._histograms.get(name)
+        if histogram is None:
+            histogram = self._histograms[name] = RollingHistogram(
+                self._window)
+        histogram.add(seconds)
+
+    def watch(self, name, counters):
+        """
+        Dump the counters that `counters` returns along with the stages,
+        e.g. a cache's hit rate.
+
+        :type name: str
+        :type counters: () -> dict
+        """
+        self._counters[name] = counters
+
+    def stats(self):
+        """
+        :return: stats of each stage, by name
+        :rtype: dict[str, dict]
+        """
+        return dict((name, histogram.stats())
+                    for name, histogram in self._histograms.items())
+
+    def maybe_dump(self):
+        """
+        Dump stats if timing is on and `interval` seconds passed since the
+        last dump.
+
+        :return: whether stats were dumped
+        :rtype: bool
+        """
+        if not self.enabled or self._interval is None:
+            return False
+        now = time()
+        if now - self._last_dump < self._interval:
+            return False
+        self._last_dump = now
+        self.dump()
+        return True
+
+    def dump(self):
+        """Write stats to the configured file and socket."""
+        data = json.dumps({"time": time(), "stages": self.stats(),
+                           "counters": dict(
+                               (name, counters()) for name, counters in
+                               self._counters.items())},
+                          sort_keys=True)
+        if self._path is not None:
+            # readers never see a half written file
+            partial = self._path + ".tmp"
+            with open(partial, "w") as f:
+                f.write(data)
+            os.rename(partial, self._path)
+        if self._socket is not None and self._address is not None:
+            self._socket.sendto(data.encode("utf-8"), self._address)
+
+    def close(self):
+        if self._socket is not None:
+            self._socket.close()
+            self._socket = None
+
+
+# the timers every stage of the frame pipeline reports to
+timers = StageTimers()
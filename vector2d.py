@@ -2,7 +2,9 @@
 
 from __future__ import division, print_function
 
-from math import atan2, hypot, sin, cos
+from math import atan2, hypot, sin, cos, pi
+
+import numpy as np
 
 from angle import Angle
 
@@ -11,17 +13,21 @@ __author__ = "Zander Otavka"
 
 class Vector2D(object):
     """
-    :type _components: list[int or float]
+    :type x: int or float
+    :type y: int or float
     """
 
-    _components = None
+    # plain slots instead of a component list behind properties, since
+    # vectors are created and read in every inner loop
+    __slots__ = ("x", "y")
 
     def __init__(self, (x, y)=(0, 0)):
         """
         :type x: int or float
         :type y: int or float
         """
-        self._components = [x, y]
+        self.x = x
+        self.y = y
 
     @classmethod
     def from_polar(cls, magnitude, direction):
@@ -29,22 +35,6 @@ class Vector2D(object):
         y = sin(direction) * magnitude
         return cls((x, y))
 
-    @property
-    def x(self):
-        return self._components[0]
-
-    @x.setter
-    def x(self, new):
-        self._components[0] = new
-
-    @property
-    def y(self):
-        return self._components[1]
-
-    @y.setter
-    def y(self, new):
-        self._components[1] = new
-
     @property
     def magnitude(self):
         return hypot(self.x, self.y)
@@ -66,7 +56,10 @@ class Vector2D(object):
         self.y = sin(new) * magnitude
 
     def normalized(self):
-        return Vector2D.from_polar(1, self.direction)
+        magnitude = hypot(self.x, self.y)
+        if magnitude == 0:
+            return Vector2D((1.0, 0.0))
+        return Vector2D((self.x / magnitude, self.y / magnitude))
 
     def copy(self):
         return +self
@@ -122,13 +115,210 @@ class Vector2D(object):
         return Vector2D((+self.x, +self.y))
 
     def __nonzero__(self):
-        return self.x or self.y
+        return bool(self.x or self.y)
 
     def __iter__(self):
-        return self._components.__iter__()
+        yield self.x
+        yield self.y
 
     def __repr__(self):
         return "Vector2D({}, {})".format(self.x, self.y)
 
     def __str__(self):
         return "<{}, {}>".format(self.x, self.y)
+
+
+class VectorArray(object):
+    """
+    Many vectors at once, as NumPy arrays of x and y, with the same
+    semantics as `Vector2D`.  Vectors built by the class methods share one
+    contiguous buffer, x row then y row.
+
+    :type _x: numpy.ndarray
+    :type _y: numpy.ndarray
+    """
+
+    _x = None
+    _y = None
+
+    def __init__(self, x=(), y=()):
+        """
+        :type x: numpy.ndarray or list[float]
+        :type y: numpy.ndarray or list[float]
+        """
+        self._x = np.asarray(x, dtype=float)
+        self._y = np.asarray(y, dtype=float)
+
+    @classmethod
+    def _from_buffer(cls, data):
+        """
+        :param data: x row then y row
+        :type data: numpy.ndarray
+        :rtype: VectorArray
+        """
+        return cls(data[0], data[1])
+
+    @classmethod
+    def from_flat(cls, values):
+        """
+        :param values: x and y of each vector, one after the other, like
+                       `BallGroup.update` takes
+        :type values: list[int or float]
+        :rtype: VectorArray
+        """
+        values = np.asarray(values, dtype=float).reshape(-1, 2)
+        return cls._from_buffer(np.ascontiguousarray(values.T))
+
+    @classmethod
+    def from_points(cls, points):
+        """
+        :type points: collections.Iterable[Vector2D]
+        :rtype: VectorArray
+        """
+        return cls.from_flat([value for point in points for value in point])
+
+    @classmethod
+    def from_polar(cls, magnitude, direction):
+        """
+        :type magnitude: numpy.ndarray or float
+        :type direction: numpy.ndarray or float
+        :rtype: VectorArray
+        """
+        magnitude, direction = np.broadcast_arrays(magnitude, direction)
+        data = np.empty((2,) + magnitude.shape)
+        np.multiply(np.cos(direction), magnitude, out=data[0])
+        np.multiply(np.sin(direction), magnitude, out=data[1])
+        return cls._from_buffer(data)
+
+    @staticmethod
+    def normalize_angle(radians):
+        """
+        Vectorized `Angle`, wrapping into [0, 2pi).
+
+        :type radians: numpy.ndarray
+        :rtype: numpy.ndarray
+        """
+        return np.mod(radians, 2 * pi)
+
+    @staticmethod
+    def angle_abs(radians):
+        """
+        Vectorized `abs(Angle(radians))`, the size of an angle either way
+        around.
+
+        :type radians: numpy.ndarray
+        :rtype: numpy.ndarray
+        """
+        radians = np.mod(radians, 2 * pi)
+        return np.minimum(radians, 2 * pi - radians)
+
+    @staticmethod
+    def quadrant_of(radians):
+        """
+        Vectorized `Angle.quadrant` of normalized angles.
+
+        :type radians: numpy.ndarray
+        :rtype: numpy.ndarray
+        """
+        return np.mod(np.ceil(radians / (pi / 2)), 4).astype(int)
+
+    @property
+    def x(self):
+        return self._x
+
+    @property
+    def y(self):
+        return self._y
+
+    @property
+    def magnitude(self):
+        return np.hypot(self._x, self._y)
+
+    @property
+    def direction(self):
+        """
+        Directions normalized like `Angle`.
+
+        :rtype: numpy.ndarray
+        """
+        return self.normalize_angle(np.arctan2(self._y, self._x))
+
+    @property
+    def quadrant(self):
+        return self.quadrant_of(self.direction)
+
+    def in_hemisphere(self, hemisphere):
+        """
+        :type hemisphere: (int, int)
+        :rtype: numpy.ndarray
+        """
+        return np.in1d(self.quadrant, hemisphere).reshape(self._x.shape)
+
+    def normalized(self):
+        """
+        :rtype: VectorArray
+        """
+        magnitude = self.magnitude
+        zero = magnitude == 0
+        magnitude = np.where(zero, 1, magnitude)
+        return VectorArray(np.where(zero, 1.0, self._x / magnitude),
+                           np.where(zero, 0.0, self._y / magnitude))
+
+    def nonzero(self):
+        """
+        Vectorized `bool(vector)`.
+
+        :rtype: numpy.ndarray
+        """
+        return (self._x != 0) | (self._y != 0)
+
+    def to_flat(self):
+        """
+        :return: x and y of each vector, one after the other
+        :rtype: numpy.ndarray
+        """
+        return np.column_stack((self._x, self._y)).ravel()
+
+    def to_array(self):
+        """
+        :return: one row of x and y per vector
+        :rtype: numpy.ndarray
+        """
+        return np.column_stack((self._x, self._y))
+
+    def __add__(self, other):
+        return VectorArray(self._x + other.x, self._y + other.y)
+
+    def __sub__(self, other):
+        return VectorArray(self._x - other.x, self._y - other.y)
+
+    def __mul__(self, scalar):
+        return VectorArray(self._x * scalar, self._y * scalar)
+
+    def __rmul__(self, scalar):
+        return VectorArray(scalar * self._x, scalar * self._y)
+
+    def __truediv__(self, scalar):
+        return VectorArray(self._x / scalar, self._y / scalar)
+
+    def __neg__(self):
+        return VectorArray(-self._x, -self._y)
+
+    def __len__(self):
+        return len(self._x)
+
+    def __getitem__(self, index):
+        """
+        :return: a `Vector2D` for an integer index, otherwise a
+                 `VectorArray`
+        """
+        if isinstance(index, (int, long, np.integer)):
+            return Vector2D((float(self._x[index]), float(self._y[index])))
+        return VectorArray(self._x[index], self._y[index])
+
+    def __iter__(self):
+        for x, y in zip(self._x.tolist(), self._y.tolist()):
+            yield Vector2D((x, y))
+
+    def __repr__(self):
+        return "VectorArray({!r}, {!r})".format(self._x, self._y)
@@ -0,0 +1,287 @@
+#!/usr/bin/env python
+"""
+Simulates the camera's XBee on a pseudo-terminal, for end-to-end tests of
+the serial path without any radios.
+
+The simulator streams ball frames, wrapped in XBee API receive packets, at a
+steady rate with some jitter, and captures the shot frames that come back in
+transmit requests.  Shot frames carry the sequence number of the ball frame
+they answer, so each one gives the latency from frame in to command out.
+
+Run `python xbeesim.py`, then point `port` in `config.json` at the device it
+prints, with `fake_data` false and `headless` true, and run `main.py`.
+"""
+
+from __future__ import division, print_function
+
+import os
+import random
+import tty
+from argparse import ArgumentParser
+from collections import OrderedDict
+from select import select
+from struct import Struct
+from threading import Event, Lock, Thread
+from time import sleep, time
+
+import numpy as np
+from xbee.frame import APIFrame
+
+from protocol import FrameError, pack_balls, unpack_shots
+from rng import get_ball_positions
+from table import Table
+
+__author__ = "Zander Otavka"
+
+
+# API identifier, source address, signal strength and options of a 16-bit
+# address receive packet
+RX_HEADER = Struct(">cHBB")
+RX_ID = b"\x81"
+
+# API identifier, frame id, destination address and options of a 16-bit
+# address transmit request
+TX_HEADER = Struct(">cBHB")
+TX_ID = b"\x01"
+
+
+class XBeeSimulator(object):
+    """
+    :type _master: int
+    :type _slave: int
+    :type _table: Table
+    :type _rate: float
+    :type _jitter: float
+    :type _layouts: int
+    :type _stopping: Event
+    :type _threads: list[Thread]
+    :type _timeout: float
+    :type _sent_lock: Lock
+    :type _sent_at: OrderedDict
+    :type latencies: list[float]
+    :type sent: int
+    :type answered: int
+    :type timed_out: int
+    :type corrupt: int
+    """
+
+    SOURCE_ADDRESS = 0x0002
+    DEFAULT_TIMEOUT = 1
+
+    _master = None
+    _slave = None
+    _table = None
+    _rate = None
+    _jitter = None
+    _layouts = None
+    _stopping = None
+    _threads = None
+    _timeout = None
+    _sent_lock = None
+    _sent_at = None
+
+    latencies = None
+    sent = 0
+    answered = 0
+    timed_out = 0
+    corrupt = 0
+
+    def __init__(self, rate=30, jitter=0, table=None, layouts=None,
+                 timeout=None):
+        """
+        :param rate: ball frames per second
+        :type rate: float
+        :param jitter: largest random change to the gap between frames, in
+                       seconds
+        :type jitter: float
+        :param table: table to lay out balls on, a standard one by default
+        :type table: Table
+        :param layouts: how many different layouts to cycle through, or None
+                        to make a new one for every frame
+        :type layouts: int
+        :param timeout: seconds to wait for a frame to be answered before
+                        giving up on it
+        :type timeout: float
+        """
+        self._master, self._slave = os.openpty()
+        tty.setraw(self._slave)
+        if table is None:
+            table = Table.standard()
+        self._table = table
+        self._rate = rate
+        self._jitter = jitter
+        self._layouts = layouts
+        if timeout is None:
+            timeout = XBeeSimulator.DEFAULT_TIMEOUT
+        self._stopping = Event()
+        self._timeout = timeout
+        self._sent_lock = Lock()
+        self._sent_at = OrderedDict()
+        self.latencies = []
+
+    @property
+    def device(self):
+        """
+        Path of the pseudo-terminal to open as the serial port.
+
+        :rtype: str
+        """
+        return os.ttyname(self._slave)
+
+    def start(self):
+        self._threads = [Thread(target=self._stream),
+                         Thread(target=self._capture)]
+        for thread in self._threads:
+            thread.daemon = True
+            thread.start()
+
+    def stop(self):
+        self._stopping.set()
+        for thread in self._threads:
+            thread.join()
+
+    def close(self):
+        os.close(self._master)
+        os.close(self._slave)
+
+    def _layout(self):
+        """
+        :rtype: list[int]
+        """
+        return get_ball_positions(16, self._table.width, self._table.height,
+                                  self._table)
+
+    def _stream(self):
+        """Write ball frames until stopped."""
+        layouts = None
+        if self._layouts is not None:
+            layouts = [self._layout() for _ in range(self._layouts)]
+        sequence = 0
+        next_time = time()
+        while not self._stopping.is_set():
+            if layouts is None:
+                positions = self._layout()
+            else:
+                positions = layouts[sequence % len(layouts)]
+            data = (RX_HEADER.pack(RX_ID, XBeeSimulator.SOURCE_ADDRESS, 40, 0)
+                    + bytes(pack_balls(sequence, positions)))
+            self._track(sequence & 0xFFFF)
+            os.write(self._master, APIFrame(data).output())
+            self.sent += 1
+            sequence += 1
+
+            next_time += (1 / self._rate +
+                          random.uniform(-self._jitter, self._jitter))
+            delay = next_time - time()
+            if delay > 0:
+                self._stopping.wait(delay)
+
+    def _track(self, sequence):
+        """
+        Remember when frame `sequence` was sent, and forget frames that
+        were sent more than `timeout` seconds ago without being answered.
+
+        :type sequence: int
+        """
+        now = time()
+        with self._sent_lock:
+            while self._sent_at:
+                oldest, sent_at = next(iter(self._sent_at.items()))
+                if now - sent_at <= self._timeout:
+                    break
+                del self._sent_at[oldest]
+                self.timed_out += 1
+            self._sent_at.pop(sequence, None)
+            self._sent_at[sequence] = now
+
+    def _capture(self):
+        """Read transmit requests and time the shot frames in them."""
+        frame = APIFrame()
+        while not self._stopping.is_set():
+            readable, _, _ = select([self._master], [], [], 0.1)
+            if not readable:
+                continue
+            for byte in os.read(self._master, 4096):
+                if not frame.raw_data and byte != APIFrame.START_BYTE:
+                    continue
+                frame.fill(byte)
+                if len(frame.raw_data) < 3 or frame.remaining_bytes() > 0:
+                    continue
+                try:
+                    frame.parse()
+                    self._receive(frame.data)
+                except (ValueError, FrameError):
+                    self.corrupt += 1
+                frame = APIFrame()
+
+    def _receive(self, data):
+        """
+        :param data: API frame data of a transmit request
+        :type data: str
+        """
+        if data[:1] != TX_ID:
+            return
+        sequence, _ = unpack_shots(data[TX_HEADER.size:])
+        with self._sent_lock:
+            sent_at = self._sent_at.pop(sequence, None)
+        if sent_at is not None:
+            self.latencies.append(time() - sent_at)
+            self.answered += 1
+
+    def report(self, elapsed):
+        """
+        :param elapsed: seconds the simulator ran for
+        :type elapsed: float
+        :rtype: str
+        """
+        lines = ["{} frames sent, {} answered ({:.1f}/s), {} timed out, {} "
+                 "corrupt".format(self.sent, self.answered,
+                                  self.answered / elapsed, self.timed_out,
+                                  self.corrupt)]
+        if self.latencies:
+            p50, p90, p99 = np.percentile(self.latencies, [50, 90, 99]) * 1000
+            lines.append("frame in to command out, ms: p50 {:.1f}, p90 "
+                         "{:.1f}, p99 {:.1f}, max {:.1f}".format(
+                             p50, p90, p99, max(self.latencies) * 1000))
+        return "\n".join(lines)
+
+
+def main():
+    parser = ArgumentParser(description="Simulate the camera's XBee on a "
+                                        "pseudo-terminal.")
+    parser.add_argument("--rate", type=float, default=30,
+                        help="ball frames per second")
+    parser.add_argument("--jitter", type=float, default=0.002,
+                        help="largest random change to the frame gap, in "
+                             "seconds")
+    parser.add_argument("--duration", type=float, default=None,
+                        help="seconds to run for, until interrupted if left "
+                             "out")
+    parser.add_argument("--layouts", type=int, default=None,
+                        help="number of layouts to cycle through")
+    parser.add_argument("--timeout", type=float, default=None,
+                        help="seconds to wait for a frame to be answered")
+    parser.add_argument("--seed", type=int, default=None)
+    args = parser.parse_args()
+
+    random.seed(args.seed)
+    simulator = XBeeSimulator(args.rate, args.jitter, layouts=args.layouts,
+                              timeout=args.timeout)
+    print("serial device: {}".format(simulator.device))
+    start = time()
+    simulator.start()
+    try:
+        if args.duration is None:
+            while True:
+                sleep(1)
+        else:
+            sleep(args.duration)
+    except KeyboardInterrupt:
+        pass
+    simulator.stop()
+    print(simulator.report(time() - start))
+    simulator.close()
+
+
+if __name__ == "__main__":
+    main()